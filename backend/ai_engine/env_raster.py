@@ -0,0 +1,246 @@
+"""
+Gridded environment raster for the NE region (memory-mapped).
+
+Four float32 bands on a regular lat/lng grid — rainfall (mm), soil moisture
+(%), slope (degrees) and landslide history (0..1) — stored as one .npy that
+workers np.load() with mmap_mode="r". lookup() samples every band for whole
+coordinate arrays with one vectorized bilinear interpolation, so a route's
+features come from a single call instead of a per-point data-source query.
+
+    python -m ai_engine.env_raster build                 # derive from the road network
+    python -m ai_engine.env_raster build bands.tif       # import a 4-band EPSG:4326 GeoTIFF (rasterio)
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from ai_engine.road_graph import MAX_SLOPE, SEGMENTS_CSV_PATH
+from ai_engine.road_store import write_manifest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ENV_RASTER_DIR = os.path.join(BASE_DIR, "data", "env_raster")
+BANDS_NAME = "bands.npy"
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+
+BANDS = ("rainfall", "moisture", "slope", "landslide_history")  # Feature order used by the risk model
+RESOLUTION_DEG = 0.005     # ~500 m cells
+MARGIN_DEG = 0.05          # Grid extends this far past the road network
+SMOOTH_CELLS = 2.0         # Gaussian sigma applied to the derived bands
+
+# Derived build: terrain grades each cell between valley and mountain baselines
+# (same envelopes the route scorer used to sample from)
+VALLEY = {"rainfall": 20.0, "moisture": 30.0}
+MOUNTAIN = {"rainfall": 350.0, "moisture": 95.0}
+HISTORY_SLOPE = 0.2        # Cell mean rise/run above which a landslide history is recorded
+
+
+class EnvRaster:
+    """bands: (4, rows, cols) array, row 0 at the north edge; cell centres at half steps."""
+
+    def __init__(self, bands, west, north, resolution, source=None):
+        self.bands = bands
+        self.west = float(west)
+        self.north = float(north)
+        self.resolution = float(resolution)
+        self.source = source
+
+    @property
+    def shape(self):
+        return self.bands.shape[1:]
+
+    @property
+    def bounds(self):
+        rows, cols = self.shape
+        return (self.west, self.north - rows * self.resolution, self.west + cols * self.resolution, self.north)
+
+    def contains(self, lat, lng):
+        west, south, east, north = self.bounds
+        lat, lng = np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64)
+        return (lat >= south) & (lat <= north) & (lng >= west) & (lng <= east)
+
+    def lookup(self, lat, lng):
+        """
+        (n, 4) float64 features for arrays of coordinates, bilinearly
+        interpolated between cell centres (clamped at the edges).
+        """
+        lat = np.asarray(lat, dtype=np.float64).ravel()
+        lng = np.asarray(lng, dtype=np.float64).ravel()
+        rows, cols = self.shape
+        r = np.clip((self.north - lat) / self.resolution - 0.5, 0, rows - 1)
+        c = np.clip((lng - self.west) / self.resolution - 0.5, 0, cols - 1)
+        r0 = np.minimum(r.astype(np.intp), rows - 2) if rows > 1 else np.zeros(len(r), dtype=np.intp)
+        c0 = np.minimum(c.astype(np.intp), cols - 2) if cols > 1 else np.zeros(len(c), dtype=np.intp)
+        r1 = np.minimum(r0 + 1, rows - 1)
+        c1 = np.minimum(c0 + 1, cols - 1)
+        fr = (r - r0)[None, :]
+        fc = (c - c0)[None, :]
+
+        bands = self.bands
+        top = bands[:, r0, c0] * (1 - fc) + bands[:, r0, c1] * fc
+        bottom = bands[:, r1, c0] * (1 - fc) + bands[:, r1, c1] * fc
+        return (top * (1 - fr) + bottom * fr).T.astype(np.float64)
+
+    def sample(self, lat, lng):
+        """Single point -> {"rainfall", "moisture", "slope", "landslide_history"}."""
+        return dict(zip(BANDS, (round(float(v), 3) for v in self.lookup([lat], [lng])[0])))
+
+
+# --- BUILD ---
+def derive_bands(graph, resolution=RESOLUTION_DEG, margin=MARGIN_DEG):
+    """
+    Bands from the road network: length-weighted segment slope (and rain,
+    where the dataset has it) per cell, gaps filled from the nearest road
+    cell, then smoothed. Rainfall/moisture baselines scale with terrain.
+    """
+    from scipy import ndimage
+
+    lat_min, lng_min = graph.poly_coords.min(axis=0) - margin
+    lat_max, lng_max = graph.poly_coords.max(axis=0) + margin
+    rows = int(np.ceil((lat_max - lat_min) / resolution))
+    cols = int(np.ceil((lng_max - lng_min) / resolution))
+    west, north = float(lng_min), float(lat_min + rows * resolution)
+
+    # Every polyline vertex carries its segment's attributes
+    owner = np.repeat(np.arange(graph.num_segments), np.diff(graph.poly_offsets))
+    r = ((north - graph.poly_coords[:, 0]) / resolution).astype(np.intp).clip(0, rows - 1)
+    c = ((graph.poly_coords[:, 1] - west) / resolution).astype(np.intp).clip(0, cols - 1)
+    cell = r * cols + c
+    weight = graph.seg_length[owner] / np.maximum(np.bincount(owner, minlength=graph.num_segments)[owner], 1)
+    total = np.bincount(cell, weights=weight, minlength=rows * cols)
+    covered = (total > 0).reshape(rows, cols)
+
+    def rasterize(values):
+        grid = np.bincount(cell, weights=values[owner] * weight, minlength=rows * cols)
+        grid = (grid / np.maximum(total, 1e-12)).reshape(rows, cols)
+        # Nearest covered cell for the gaps, then smooth the cell edges away
+        _, (ir, ic) = ndimage.distance_transform_edt(~covered, return_indices=True)
+        return ndimage.gaussian_filter(grid[ir, ic], SMOOTH_CELLS)
+
+    slope_ratio = rasterize(np.asarray(graph.seg_slope, dtype=np.float64))
+    rain = rasterize(np.asarray(graph.seg_rain, dtype=np.float64))
+    terrain = np.clip(slope_ratio / MAX_SLOPE, 0.0, 1.0)
+
+    bands = np.empty((len(BANDS), rows, cols), dtype=np.float32)
+    baseline = VALLEY["rainfall"] + terrain * (MOUNTAIN["rainfall"] - VALLEY["rainfall"])
+    bands[0] = np.maximum(rain, baseline)
+    bands[1] = VALLEY["moisture"] + terrain * (MOUNTAIN["moisture"] - VALLEY["moisture"])
+    bands[2] = np.degrees(np.arctan(slope_ratio))
+    bands[3] = ndimage.gaussian_filter((slope_ratio >= HISTORY_SLOPE).astype(np.float64), SMOOTH_CELLS / 2)
+    return bands, west, north
+
+
+def read_geotiff(path):
+    """4-band north-up EPSG:4326 GeoTIFF (band order as BANDS) -> (bands, west, north, resolution)."""
+    import rasterio
+
+    with rasterio.open(path) as src:
+        if src.count < len(BANDS):
+            raise ValueError(f"{path}: expected {len(BANDS)} bands, found {src.count}")
+        if src.crs is not None and src.crs.to_epsg() != 4326:
+            raise ValueError(f"{path}: expected EPSG:4326, found {src.crs}")
+        transform = src.transform
+        if transform.b != 0 or transform.d != 0 or abs(transform.a) != abs(transform.e):
+            raise ValueError(f"{path}: only square, north-up pixels are supported")
+        bands = src.read(list(range(1, len(BANDS) + 1)), masked=True).astype(np.float32)
+        # Nodata -> band mean, so lookups never return NaN
+        bands = np.stack([band.filled(band.mean() if band.count() else 0.0) for band in bands])
+        return np.asarray(bands), transform.c, transform.f, transform.a
+
+
+def build_env_raster(geotiff=None, out_dir=ENV_RASTER_DIR):
+    """Writes bands.npy + manifest.json; returns the (in-memory) raster."""
+    from ai_engine.road_store import source_checksum
+
+    started = time.time()
+    if geotiff:
+        bands, west, north, resolution = read_geotiff(geotiff)
+        source = {"kind": "geotiff", "path": os.path.abspath(geotiff), "sha256": source_checksum(geotiff)}
+    else:
+        from ai_engine.road_graph import get_road_graph
+
+        graph = get_road_graph()
+        if graph is None:
+            raise RuntimeError("road graph unavailable")
+        bands, west, north = derive_bands(graph)
+        resolution = RESOLUTION_DEG
+        source = {"kind": "road_network", "path": os.path.basename(SEGMENTS_CSV_PATH),
+                  "sha256": source_checksum(SEGMENTS_CSV_PATH)}
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, BANDS_NAME), np.ascontiguousarray(bands, dtype=np.float32))
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "bands": list(BANDS),
+        "shape": list(bands.shape),
+        "west": west,
+        "north": north,
+        "resolution": resolution,
+        "source": source,
+        "built_at": time.time(),
+    }
+    write_manifest(out_dir, manifest, MANIFEST_NAME)
+
+    print(f"✅ Env raster built in {time.time() - started:.2f}s ({bands.shape[1]}x{bands.shape[2]}) -> {out_dir}")
+    return EnvRaster(bands, west, north, resolution, source=source["kind"])
+
+
+def load_env_raster(out_dir=ENV_RASTER_DIR):
+    """Memory-maps a previous build (None if missing, or derived from a road CSV that has changed)."""
+    from ai_engine.road_store import source_checksum
+
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as fh:
+        manifest = json.load(fh)
+    source = manifest.get("source", {})
+    if manifest.get("format_version") != FORMAT_VERSION or list(manifest.get("bands", [])) != list(BANDS):
+        return None
+    if source.get("kind") == "road_network" and source.get("sha256") != source_checksum(SEGMENTS_CSV_PATH):
+        print("⚠️ Env raster is stale (road CSV changed). Run: python -m ai_engine.env_raster build")
+        return None
+    bands = np.load(os.path.join(out_dir, BANDS_NAME), mmap_mode="r")
+    return EnvRaster(bands, manifest["west"], manifest["north"], manifest["resolution"], source=source.get("kind"))
+
+
+# --- SHARED INSTANCE ---
+_raster = None
+_raster_error = None
+_raster_lock = threading.Lock()
+
+
+def get_env_raster():
+    """Loads the shared raster once (None if neither a build nor a road graph is available)."""
+    global _raster, _raster_error
+    if _raster is None and _raster_error is None:
+        with _raster_lock:
+            if _raster is None and _raster_error is None:
+                try:
+                    raster = load_env_raster()
+                    if raster is None:
+                        from ai_engine.road_graph import get_road_graph
+
+                        print("⚠️ No env raster build, deriving in memory (run: python -m ai_engine.env_raster build)")
+                        graph = get_road_graph()
+                        if graph is None:
+                            raise RuntimeError("road graph unavailable")
+                        bands, west, north = derive_bands(graph)
+                        raster = EnvRaster(bands, west, north, RESOLUTION_DEG, source="road_network")
+                    _raster = raster
+                    print(f"🌧️ Env Raster Ready: {raster.shape[0]}x{raster.shape[1]} cells ({raster.source})")
+                except Exception as e:
+                    _raster_error = str(e)
+                    print(f"⚠️ Env raster unavailable: {e}")
+    return _raster
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Usage: python -m ai_engine.env_raster build [bands.tif]")
+        sys.exit(1)
+    build_env_raster(sys.argv[2] if len(sys.argv) > 2 else None)
@@ -1,32 +1,69 @@
-import torch
-import torch.nn as nn
 import numpy as np
-import pandas as pd
 import os
 import math
-import random
-import joblib
+import threading
+import time
+
+from ai_engine.env_raster import get_env_raster
+from ai_engine.road_graph import MAX_SNAP_KM, RISK_WEIGHT, get_road_graph
+from ai_engine.tree_ensemble import load_packed_model
+from ai_engine.zone_index import get_zone_index
 
 # --- 1. CONFIG ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 XGB_MODEL_PATH = os.path.join(BASE_DIR, "models", "ne_risk_model.pkl")
+XGB_PACKED_PATH = os.path.join(BASE_DIR, "models", "ne_risk_model.npz")  # python -m ai_engine.tree_ensemble export
 
-# --- 2. LOAD TRAINED MODELS ---
+# --- 2. LOAD TRAINED MODELS (lazily: on first use or via warm_up()) ---
 xgb_model = None
+MODEL_STATUS = {"loaded": False, "model": None, "load_ms": None, "error": None}
+_model_lock = threading.Lock()
 
 def load_models():
+    """Loads the risk model once; safe to call from several threads."""
     global xgb_model
-    print("🔄 Loading AI Models...")
-    try:
-        if os.path.exists(XGB_MODEL_PATH):
-            xgb_model = joblib.load(XGB_MODEL_PATH)
-            print("✅ XGBoost Risk Model Loaded")
-        else:
-            print(f"⚠️ XGBoost Model not found at {XGB_MODEL_PATH}")
-    except Exception as e:
-        print(f"❌ Error loading XGBoost: {e}")
+    if MODEL_STATUS["loaded"]:
+        return xgb_model
+    with _model_lock:
+        if MODEL_STATUS["loaded"]:
+            return xgb_model
+        started = time.perf_counter()
+        try:
+            # Packed NumPy trees first: no sklearn/xgboost import, cheaper per call
+            xgb_model = load_packed_model(XGB_PACKED_PATH, XGB_MODEL_PATH)
+            if xgb_model is not None:
+                MODEL_STATUS["model"] = f"TreeEnsemble({xgb_model.kind})"
+                print("✅ Packed Risk Model Loaded")
+            elif os.path.exists(XGB_MODEL_PATH):
+                import joblib  # Unpickling pulls in sklearn/xgboost: only pay for it when a model exists
+                xgb_model = joblib.load(XGB_MODEL_PATH)
+                MODEL_STATUS["model"] = type(xgb_model).__name__
+                print("✅ XGBoost Risk Model Loaded")
+            else:
+                MODEL_STATUS["model"] = "heuristic"
+                print(f"⚠️ XGBoost Model not found at {XGB_MODEL_PATH}")
+        except Exception as e:
+            MODEL_STATUS["model"] = "heuristic"
+            MODEL_STATUS["error"] = str(e)
+            print(f"❌ Error loading XGBoost: {e}")
+        MODEL_STATUS["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        MODEL_STATUS["loaded"] = True
+    return xgb_model
 
-load_models()
+def get_model():
+    return xgb_model if MODEL_STATUS["loaded"] else load_models()
+
+def warm_up():
+    """
+    Startup hook: loads the model and road graph and runs one scoring pass,
+    so the first real request doesn't pay for any of it.
+    """
+    load_models()
+    get_road_graph()
+    get_zone_index()
+    get_env_raster()
+    _score_feature_matrix(get_env_matrix([[26.5, 90.1], [26.6, 90.2]]), np.array(["valley", "mountain"]))
+    return dict(MODEL_STATUS)
 
 # --- 3. HELPER: Haversine Distance Calculation (Real Math) ---
 def calculate_distance(lat1, lon1, lat2, lon2):
@@ -39,27 +76,153 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
     return R * c
 
-# --- 4. HELPER: Smart Mock Environment Data ---
-def get_mock_env_data(lat, lng, route_type="valley"):
-    # Ab random nahi, logical data banayenge
-    if route_type == "mountain":
-        # Mountain mein zyada slope aur risk
-        rainfall = random.uniform(100, 350)  # Heavy rain
-        moisture = random.uniform(60, 95)
-        slope = random.uniform(40, 75)       # Steep slope
-        landslide_history = 1
+# --- 4. HELPER: Environment Features (gridded raster, no per-point queries) ---
+ENV_RANGES = {
+    # route_type: (rainfall, moisture, slope, landslide_history) outside raster coverage
+    "mountain": ((100, 350), (60, 95), (40, 75), 1),
+    "valley": ((20, 150), (30, 70), (5, 25), 0),
+}
+
+def _envelope_midpoint(route_type):
+    rain, moist, slope, history = ENV_RANGES["mountain" if route_type == "mountain" else "valley"]
+    return [sum(rain) / 2, sum(moist) / 2, sum(slope) / 2, history]
+
+def get_env_matrix(coordinates, route_type="valley"):
+    """
+    (n_points, 4) features [rainfall, moisture, slope, landslide_history] for
+    [[lat, lng], ...] in one bilinear raster lookup. Points outside the raster
+    get the route type's envelope midpoint, so a coordinate always scores the same.
+    """
+    coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    features = np.tile(np.asarray(_envelope_midpoint(route_type), dtype=np.float64), (len(coords), 1))
+    raster = get_env_raster()
+    if raster is not None and len(coords):
+        inside = raster.contains(coords[:, 0], coords[:, 1])
+        if inside.any():
+            features[inside] = raster.lookup(coords[inside, 0], coords[inside, 1])
+    return features
+
+def get_env_data(lat, lng, route_type="valley"):
+    return get_env_matrix([[lat, lng]], route_type)[0].tolist()
+
+# --- 5. HELPER: Batched Scoring ---
+def _build_feature_matrix(routes):
+    """
+    Stacks the features of all route points into one matrix.
+    Returns (features, offsets) where rows offsets[i]:offsets[i+1] belong to routes[i].
+    """
+    blocks = [
+        r['features'] if 'features' in r else get_env_matrix(r['coordinates'], r['type'])
+        for r in routes
+    ]
+    offsets = np.zeros(len(blocks) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in blocks])
+    return np.vstack(blocks), offsets
+
+def _score_feature_matrix(features, route_types):
+    """
+    Scores every row with a single model call (or the manual formula),
+    then clamps to [0, 1]. route_types is a per-row array of route types.
+    """
+    is_mountain = (route_types == "mountain")
+    risks = None
+    xgb_model = get_model()
+    if xgb_model:
+        try:
+            if hasattr(xgb_model, "predict_proba"):
+                risks = xgb_model.predict_proba(features)[:, 1]
+            else:
+                risks = np.asarray(xgb_model.predict(features), dtype=float)
+        except Exception:
+            # Fallback if model fails
+            risks = np.where(is_mountain, 0.85, 0.2)
     else:
-        # Valley mein kam risk
-        rainfall = random.uniform(20, 150)   # Less rain
-        moisture = random.uniform(30, 70)
-        slope = random.uniform(5, 25)        # Gentle slope
-        landslide_history = 0
-    return [rainfall, moisture, slope, landslide_history]
+        # Manual Smart Logic
+        # Normalize logic: Mountain is naturally riskier
+        base_risk = np.where(is_mountain, 0.6, 0.1)
+        rain_factor = (features[:, 0] / 300) * 0.4  # Max 0.4 from rain
+        risks = base_risk + rain_factor
 
-# ==========================================
-# 🛡️ FUNCTION 1: LIFE SAVIOUR ROUTING (FIXED)
-# ==========================================
-def find_safest_route(start_lat, start_lng, end_lat, end_lng):
+    # Cap risk between 0 and 1
+    return np.clip(np.asarray(risks, dtype=float), 0.0, 1.0)
+
+# --- 6. ROUTE CANDIDATES ---
+MOUNTAIN_SLOPE = 0.2  # Avg rise/run above which a road counts as "mountain"
+
+def _road_network_routes(start_lat, start_lng, end_lat, end_lng):
+    """
+    Safest (risk-weighted) and shortest paths over the real road graph.
+    Returns [] when the graph is unavailable or the points are out of coverage.
+    """
+    graph = get_road_graph()
+    if graph is None:
+        return []
+
+    safest = graph.route(start_lat, start_lng, end_lat, end_lng, risk_weight=RISK_WEIGHT)
+    if safest is None:
+        return []
+    shortest = graph.route(start_lat, start_lng, end_lat, end_lng, risk_weight=0.0)
+
+    candidates = [("route_safest", "Safest Road Route", safest)]
+    if shortest is not None and shortest["edges"] != safest["edges"]:
+        candidates.append(("route_shortest", "Shortest Road Route (Higher Risk)", shortest))
+
+    routes = []
+    for route_id, name, path in candidates:
+        segs = path["vertex_segments"]
+        slope = graph.seg_slope[segs]
+        route_type = "mountain" if slope.mean() > MOUNTAIN_SLOPE else "valley"
+
+        # Raster features per vertex; the road's own slope is finer than a raster cell
+        features = get_env_matrix(path["coordinates"], route_type)
+        features[:, 0] = np.maximum(features[:, 0], graph.seg_rain[segs])
+        features[:, 2] = np.degrees(np.arctan(slope))
+
+        distance_km = round(path["distance_km"], 1)
+        routes.append({
+            "id": route_id,
+            "name": name,
+            "type": route_type,
+            "coordinates": np.round(path["coordinates"], 6).tolist(),
+            "features": features,
+            "distance_km": distance_km,
+            "avg_speed": path["distance_km"] / path["duration_h"] if path["duration_h"] > 0 else 30
+        })
+    return routes
+
+def _road_at(lat, lng):
+    """Slope/rain of the real road segment under a coordinate (None outside coverage)."""
+    graph = get_road_graph()
+    if graph is None or graph.spatial is None:
+        return None
+    return graph.spatial.road_at(lat, lng, max_distance_m=MAX_SNAP_KM * 1000)
+
+def _route_zones(routes):
+    """
+    Hazard zones each route passes through: one bulk R-tree lookup over every
+    coordinate of every route. Returns one list per route of
+    {"zone_id", "seismic_zone", "soil_stability"}, in travel order.
+    """
+    index = get_zone_index()
+    if index is None:
+        return [[] for _ in routes]
+    coords = [np.asarray(r['coordinates'], dtype=np.float64).reshape(-1, 2) for r in routes]
+    offsets = np.cumsum([0] + [len(c) for c in coords])
+    all_coords = np.vstack(coords)
+    zone_ids = index.lookup_bulk(all_coords[:, 0], all_coords[:, 1])
+
+    tagged = []
+    for start, end in zip(offsets[:-1], offsets[1:]):
+        ids = zone_ids[start:end]
+        ids = ids[ids >= 0]
+        _, first = np.unique(ids, return_index=True)
+        tagged.append([
+            {k: index.zones[z].get(k) for k in ("zone_id", "seismic_zone", "soil_stability")}
+            for z in ids[np.sort(first)]
+        ])
+    return tagged
+
+def _synthetic_routes(start_lat, start_lng, end_lat, end_lng):
     # 1. Calculate Real Aerial Distance
     aerial_dist = calculate_distance(start_lat, start_lng, end_lat, end_lng)
     
@@ -70,7 +233,7 @@ def find_safest_route(start_lat, start_lng, end_lat, end_lng):
     # Valley Route: Longer but safer (Aerial * 1.5 curvy factor)
     dist_valley = round(aerial_dist * 1.5, 1)
 
-    routes = [
+    return [
         {
             "id": "route_mountain",
             "name": "Mountain Shortcut (High Risk)",
@@ -89,45 +252,35 @@ def find_safest_route(start_lat, start_lng, end_lat, end_lng):
         }
     ]
 
+# ==========================================
+# 🛡️ FUNCTION 1: LIFE SAVIOUR ROUTING (FIXED)
+# ==========================================
+def find_safest_route(start_lat, start_lng, end_lat, end_lng):
+    # 1. Real Road Network first (risk-weighted search over the NE segments)
+    routes = _road_network_routes(start_lat, start_lng, end_lat, end_lng)
+
+    # 2. Outside network coverage -> synthetic corridor estimates
+    if not routes:
+        routes = _synthetic_routes(start_lat, start_lng, end_lat, end_lng)
+
     analyzed_routes = []
 
-    for route in routes:
-        segment_risks = []
-        max_segment_risk = 0
-        total_rainfall = 0
-        
-        for point in route['coordinates']:
-            # Get logical data based on route type
-            features = get_mock_env_data(point[0], point[1], route['type'])
-            total_rainfall += features[0]
-            
-            # Predict Risk (Model or Logical Fallback)
-            risk_score = 0
-            if xgb_model:
-                try:
-                    input_vector = np.array([features]).reshape(1, -1)
-                    if hasattr(xgb_model, "predict_proba"):
-                        risk_score = xgb_model.predict_proba(input_vector)[0][1]
-                    else:
-                        risk_score = float(xgb_model.predict(input_vector)[0])
-                except:
-                    # Fallback if model fails
-                    risk_score = 0.85 if route['type'] == 'mountain' else 0.2
-            else:
-                # Manual Smart Logic
-                # Normalize logic: Mountain is naturally riskier
-                base_risk = 0.6 if route['type'] == 'mountain' else 0.1
-                rain_factor = (features[0] / 300) * 0.4  # Max 0.4 from rain
-                risk_score = base_risk + rain_factor
-            
-            # Cap risk between 0 and 1
-            risk_score = max(0.0, min(1.0, risk_score))
-            
-            segment_risks.append(risk_score)
-            max_segment_risk = max(max_segment_risk, risk_score)
+    # 3. Batched Scoring: every point of every route goes through ONE matrix pass
+    features, offsets = _build_feature_matrix(routes)
+    route_types = np.repeat([r['type'] for r in routes], np.diff(offsets))
+    risks = _score_feature_matrix(features, route_types)
+
+    # Per-route aggregation (segments are contiguous row blocks)
+    starts = offsets[:-1]
+    counts = np.diff(offsets)
+    avg_risks = np.add.reduceat(risks, starts) / counts
+    max_risks = np.maximum.reduceat(risks, starts)
+    avg_rainfalls = np.add.reduceat(features[:, 0], starts) / counts
+    route_zones = _route_zones(routes)
 
-        avg_risk = sum(segment_risks) / len(segment_risks)
-        avg_rainfall = total_rainfall / len(route['coordinates'])
+    for route, avg_risk, max_segment_risk, avg_rainfall, zones in zip(routes, avg_risks, max_risks, avg_rainfalls, route_zones):
+        avg_risk = float(avg_risk)
+        max_segment_risk = float(max_segment_risk)
 
         # Logical Status Determination
         if max_segment_risk > 0.75: 
@@ -154,6 +307,7 @@ def find_safest_route(start_lat, start_lng, end_lat, end_lng):
                 "rainfall_mm": int(avg_rainfall),
                 "landslide_prob": int(max_segment_risk * 100)
             },
+            "hazard_zones": zones,
             "recommendation": "High landslide risk! Avoid this route." if status == "DANGER" else "Safe for travel."
         })
 
@@ -162,7 +316,11 @@ def find_safest_route(start_lat, start_lng, end_lat, end_lng):
     
     return {
         "best_route": analyzed_routes[0],
-        "alternatives": analyzed_routes[1:]
+        "alternatives": analyzed_routes[1:],
+        "road_context": {
+            "origin": _road_at(start_lat, start_lng),
+            "destination": _road_at(end_lat, end_lng)
+        }
     }
 
 # ==========================================
@@ -182,6 +340,7 @@ def predict_ne_risk(data):
         model_used = False
 
         # Try AI Model
+        xgb_model = get_model()
         if xgb_model:
             try:
                 input_vector = np.array([features]).reshape(1, -1)
@@ -0,0 +1,333 @@
+import csv
+import heapq
+import math
+import os
+import threading
+
+import numpy as np
+
+# --- 1. CONFIG ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SEGMENTS_CSV_PATH = os.path.join(BASE_DIR, "data", "Final_NE_Training_Set.csv")
+
+# Highway classes in the NE segment dataset -> (code, avg speed km/h)
+HIGHWAY_CLASSES = (
+    ("trunk", 50),
+    ("primary", 45),
+    ("secondary", 40),
+    ("secondary_link", 35),
+    ("tertiary", 35),
+    ("tertiary_link", 30),
+    ("unclassified", 25),
+    ("road", 25),
+    ("residential", 20),
+    ("living_street", 10),
+)
+HIGHWAY_CODES = {name: code for code, (name, _) in enumerate(HIGHWAY_CLASSES)}
+HIGHWAY_SPEEDS = np.array([speed for _, speed in HIGHWAY_CLASSES], dtype=np.float64)
+DEFAULT_HIGHWAY = HIGHWAY_CODES["unclassified"]
+
+# Risk weighting: cost = length * (1 + RISK_WEIGHT * edge_risk)
+RISK_WEIGHT = 4.0
+MAX_SLOPE = 0.35       # rise/run treated as "fully unstable"
+MAX_RAIN_MM = 300.0
+MAX_SNAP_KM = 30.0     # Farther than this from the network = outside coverage
+
+# Endpoints closer than this (in degrees, ~1cm) are merged into one node
+NODE_PRECISION = 7
+
+
+def _parse_highway(value):
+    # Some OSM ways carry a list like "['unclassified', 'residential']" -> first class wins
+    value = (value or "").strip("[]").split(",")[0].strip(" '\"")
+    return HIGHWAY_CODES.get(value, DEFAULT_HIGHWAY)
+
+
+def edge_risk_from_features(slope, rain_mm):
+    """Static 0..1 risk per segment from terrain slope and rainfall."""
+    slope_norm = np.minimum(np.asarray(slope, dtype=np.float64) / MAX_SLOPE, 1.0)
+    rain_norm = np.minimum(np.asarray(rain_mm, dtype=np.float64) / MAX_RAIN_MM, 1.0)
+    return np.clip(0.6 * slope_norm + 0.4 * rain_norm, 0.0, 1.0)
+
+
+class RoadGraph:
+    """
+    Compact array-backed road graph (CSR adjacency).
+
+    Nodes are merged segment endpoints. Every CSV segment becomes two directed
+    edges (u->v and v->u); edge attributes live in per-segment arrays and are
+    looked up through edge_segment. The arrays may be read-only memory maps
+    (see ai_engine.road_store).
+    """
+
+    def __init__(self, node_lat, node_lng, indptr, edge_target, edge_segment, edge_reversed,
+                 seg_length, seg_slope, seg_rain, seg_highway, poly_offsets, poly_coords, edge_source=None):
+        self.node_lat = node_lat            # float64 [num_nodes]
+        self.node_lng = node_lng            # float64 [num_nodes]
+        self.indptr = indptr                # int64 [num_nodes + 1]
+        self.edge_target = edge_target      # int32 [num_edges]
+        self.edge_segment = edge_segment    # int32 [num_edges]
+        self.edge_reversed = edge_reversed  # bool  [num_edges] (walks polyline backwards)
+        self.seg_length = seg_length        # float64 metres [num_segments]
+        self.seg_slope = seg_slope          # float64 [num_segments]
+        self.seg_rain = seg_rain            # float64 mm [num_segments]
+        self.seg_highway = seg_highway      # int8 code into HIGHWAY_CLASSES
+        self.poly_offsets = poly_offsets    # int64 [num_segments + 1]
+        self.poly_coords = poly_coords      # float64 [num_vertices, 2] (lat, lng)
+
+        if edge_source is None:
+            edge_source = np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+        self.edge_source = edge_source      # int32 [num_edges]
+        self.seg_risk = edge_risk_from_features(seg_slope, seg_rain)
+        self._weights_cache = {}
+        self.landmarks = None  # Optional ALT index (ai_engine.route_index)
+        self.spatial = None    # Optional segment STRtree (ai_engine.spatial_index)
+
+    # --- SIZE ---
+    @property
+    def num_nodes(self):
+        return len(self.node_lat)
+
+    @property
+    def num_edges(self):
+        return len(self.edge_target)
+
+    @property
+    def num_segments(self):
+        return len(self.seg_length)
+
+    # --- WEIGHTS ---
+    def set_segment_risk(self, seg_risk):
+        """Replaces the per-segment 0..1 risk (e.g. from a live model) and drops cached weights."""
+        self.seg_risk = np.clip(np.asarray(seg_risk, dtype=np.float64), 0.0, 1.0)
+        self._weights_cache.clear()
+        if self.landmarks is not None:
+            self.landmarks.recustomize()
+
+    def edge_weights(self, risk_weight=RISK_WEIGHT):
+        """Per directed edge cost: length * (1 + risk_weight * risk)."""
+        weights = self._weights_cache.get(risk_weight)
+        if weights is None:
+            seg_cost = self.seg_length * (1.0 + risk_weight * self.seg_risk)
+            weights = seg_cost[self.edge_segment]
+            self._weights_cache[risk_weight] = weights
+        return weights
+
+    # --- SNAPPING ---
+    def nearest_node(self, lat, lng):
+        """Returns (node_id, distance_km) using an equirectangular approximation."""
+        k = math.cos(math.radians(lat))
+        d2 = (self.node_lat - lat) ** 2 + ((self.node_lng - lng) * k) ** 2
+        node = int(np.argmin(d2))
+        return node, math.sqrt(float(d2[node])) * 111.195
+
+    def snap(self, lat, lng):
+        """Snaps via the road-segment index when attached, nearest node otherwise."""
+        if self.spatial is not None:
+            return self.spatial.snap_node(lat, lng)
+        return self.nearest_node(lat, lng)
+
+    # --- SEARCH ---
+    def search(self, source, target, risk_weight=RISK_WEIGHT):
+        """Uses the ALT index when attached, plain Dijkstra otherwise."""
+        if self.landmarks is not None:
+            return self.landmarks.query(source, target, risk_weight)
+        return self.shortest_path(source, target, self.edge_weights(risk_weight))
+
+    def shortest_path(self, source, target, weights):
+        """
+        Plain Dijkstra over the CSR arrays.
+        Returns (edge_ids, cost) or None if target is unreachable.
+        """
+        indptr, edge_target = self.indptr, self.edge_target
+        dist = {source: 0.0}
+        pred_edge = {}
+        done = set()
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            if u == target:
+                break
+            done.add(u)
+            for e in range(indptr[u], indptr[u + 1]):
+                v = int(edge_target[e])
+                nd = d + weights[e]
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    pred_edge[v] = e
+                    heapq.heappush(heap, (nd, v))
+        if target not in dist:
+            return None
+        return self._unwind(pred_edge, source, target), dist[target]
+
+    def _unwind(self, pred_edge, source, target):
+        edges = []
+        node = target
+        while node != source:
+            e = pred_edge[node]
+            edges.append(e)
+            node = int(self.edge_source[e])
+        edges.reverse()
+        return edges
+
+    # --- GEOMETRY & ATTRIBUTES ---
+    def path_coordinates(self, edges):
+        """
+        Concatenates the real road polylines of a path.
+        Returns (coords [n, 2] lat/lng, vertex_segments [n]) where vertex_segments
+        maps every vertex to the segment it was taken from.
+        """
+        if not edges:
+            return np.empty((0, 2)), np.empty(0, dtype=np.int64)
+        parts, owners = [], []
+        for i, e in enumerate(edges):
+            seg = int(self.edge_segment[e])
+            pts = self.poly_coords[self.poly_offsets[seg]:self.poly_offsets[seg + 1]]
+            if self.edge_reversed[e]:
+                pts = pts[::-1]
+            if i > 0:
+                pts = pts[1:]  # Joint vertex already emitted by the previous edge
+            parts.append(pts)
+            owners.append(np.full(len(pts), seg, dtype=np.int64))
+        return np.vstack(parts), np.concatenate(owners)
+
+    def path_stats(self, edges):
+        segs = self.edge_segment[edges]
+        lengths = self.seg_length[segs]
+        speeds = HIGHWAY_SPEEDS[self.seg_highway[segs]]
+        return {
+            "distance_km": float(lengths.sum()) / 1000.0,
+            "duration_h": float((lengths / 1000.0 / speeds).sum()),
+            "max_risk": float(self.seg_risk[segs].max()) if len(segs) else 0.0,
+        }
+
+    def route(self, start_lat, start_lng, end_lat, end_lng, risk_weight=RISK_WEIGHT, max_snap_km=MAX_SNAP_KM):
+        """
+        Snaps both ends to the network and runs a risk-weighted search.
+        Returns None when either end is outside coverage or no path exists.
+        """
+        source, snap_start = self.snap(start_lat, start_lng)
+        target, snap_end = self.snap(end_lat, end_lng)
+        if snap_start > max_snap_km or snap_end > max_snap_km:
+            return None
+        found = self.search(source, target, risk_weight)
+        if found is None:
+            return None
+        edges, cost = found
+        coords, vertex_segments = self.path_coordinates(edges)
+        result = {
+            "edges": edges,
+            "cost": cost,
+            "coordinates": coords,
+            "vertex_segments": vertex_segments,
+            "snap_km": (round(snap_start, 3), round(snap_end, 3)),
+        }
+        result.update(self.path_stats(edges))
+        return result
+
+
+def build_road_graph(csv_path=SEGMENTS_CSV_PATH):
+    """Parses the WKT segment CSV into a RoadGraph."""
+    import shapely
+
+    wkt, lengths, slopes, rains, highways = [], [], [], [], []
+    with open(csv_path, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            wkt.append(row["geometry"])
+            lengths.append(float(row["length"] or 0))
+            slopes.append(float(row["slope"] or 0))
+            rains.append(float(row["rain_mm"] or 0))
+            highways.append(_parse_highway(row["highway"]))
+
+    geoms = shapely.from_wkt(wkt)
+    coords, owner = shapely.get_coordinates(geoms, return_index=True)  # (lng, lat)
+    num_segments = len(wkt)
+    poly_offsets = np.zeros(num_segments + 1, dtype=np.int64)
+    poly_offsets[1:] = np.cumsum(np.bincount(owner, minlength=num_segments))
+    poly_coords = np.ascontiguousarray(coords[:, ::-1])  # -> (lat, lng)
+
+    # Merge segment endpoints into graph nodes
+    first = poly_coords[poly_offsets[:-1]]
+    last = poly_coords[poly_offsets[1:] - 1]
+    ends = np.round(np.vstack([first, last]), NODE_PRECISION)
+    nodes, inverse = np.unique(ends, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    u, v = inverse[:num_segments], inverse[num_segments:]
+
+    # Two directed edges per segment, sorted by source -> CSR
+    seg_ids = np.arange(num_segments, dtype=np.int32)
+    src = np.concatenate([u, v])
+    dst = np.concatenate([v, u]).astype(np.int32)
+    edge_segment = np.concatenate([seg_ids, seg_ids])
+    edge_reversed = np.concatenate([np.zeros(num_segments, bool), np.ones(num_segments, bool)])
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(src, minlength=len(nodes)))
+
+    return RoadGraph(
+        node_lat=np.ascontiguousarray(nodes[:, 0]),
+        node_lng=np.ascontiguousarray(nodes[:, 1]),
+        indptr=indptr,
+        edge_target=dst[order],
+        edge_segment=edge_segment[order],
+        edge_reversed=edge_reversed[order],
+        seg_length=np.asarray(lengths, dtype=np.float64),
+        seg_slope=np.asarray(slopes, dtype=np.float64),
+        seg_rain=np.asarray(rains, dtype=np.float64),
+        seg_highway=np.asarray(highways, dtype=np.int8),
+        poly_offsets=poly_offsets,
+        poly_coords=poly_coords,
+    )
+
+
+# --- 2. SHARED INSTANCE (built once per process) ---
+_graph = None
+_graph_error = None
+_graph_lock = threading.Lock()
+
+
+def load_road_graph():
+    """Builds the shared graph once; safe to call from every request."""
+    global _graph, _graph_error
+    if _graph is None and _graph_error is None:
+        with _graph_lock:
+            if _graph is None and _graph_error is None:
+                try:
+                    from ai_engine.road_store import load_road_store
+
+                    graph = load_road_store()
+                    if graph is None:
+                        print("⚠️ No road store build, parsing CSV (run: python -m ai_engine.road_store build)")
+                        graph = build_road_graph()
+                    _attach_landmarks(graph)
+                    _attach_spatial_index(graph)
+                    _graph = graph
+                    print(f"🛣️ Road Graph Ready: {_graph.num_nodes} nodes / {_graph.num_segments} segments")
+                except Exception as e:
+                    # Don't retry on every request; callers fall back to synthetic routes
+                    _graph_error = str(e)
+                    print(f"❌ Road Graph build failed: {e}")
+    return _graph
+
+
+def _attach_landmarks(graph):
+    from ai_engine.route_index import LandmarkIndex, load_landmark_index, select_landmarks
+
+    index = load_landmark_index(graph)
+    if index is None:
+        # No offline build yet: selection is cheap enough to do in-process
+        index = LandmarkIndex(graph, select_landmarks(graph))
+    index.customize(RISK_WEIGHT)
+    graph.landmarks = index
+
+
+def _attach_spatial_index(graph):
+    from ai_engine.spatial_index import SegmentIndex
+
+    graph.spatial = SegmentIndex(graph)
+
+
+def get_road_graph():
+    return _graph if _graph is not None else load_road_graph()
@@ -0,0 +1,122 @@
+"""
+Flat binary (memory-mapped) build of the NE road network.
+
+The CSV -> graph parse runs once at deploy time; every worker then np.load()s
+the arrays with mmap_mode="r", so boot is a few syscalls and all workers share
+the same page-cache pages instead of each holding a heap copy.
+
+    python -m ai_engine.road_store build
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from ai_engine.road_graph import SEGMENTS_CSV_PATH, RoadGraph, build_road_graph
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROAD_STORE_DIR = os.path.join(BASE_DIR, "data", "road_network")
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+
+# RoadGraph array attributes -> file names (one .npy each)
+ARRAYS = (
+    "node_lat", "node_lng",                                   # node coordinates
+    "indptr", "edge_source", "edge_target",                   # CSR adjacency
+    "edge_segment", "edge_reversed",
+    "seg_length", "seg_slope", "seg_rain", "seg_highway",     # per-segment attributes
+    "poly_offsets", "poly_coords",                            # packed polyline vertices
+)
+
+
+def source_checksum(csv_path=SEGMENTS_CSV_PATH):
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_manifest(out_dir, manifest, name=MANIFEST_NAME):
+    """Writes the manifest via a temp file + rename; call it last so a half-written build never looks valid."""
+    tmp_path = os.path.join(out_dir, name + ".tmp")
+    with open(tmp_path, "w") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, name))
+
+
+def build_road_store(csv_path=SEGMENTS_CSV_PATH, out_dir=ROAD_STORE_DIR):
+    """Parses the CSV once and writes every graph array as its own .npy file."""
+    started = time.time()
+    graph = build_road_graph(csv_path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    arrays = {}
+    for name in ARRAYS:
+        arr = np.ascontiguousarray(getattr(graph, name))
+        np.save(os.path.join(out_dir, f"{name}.npy"), arr)
+        arrays[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape)}
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "source_csv": os.path.basename(csv_path),
+        "source_sha256": source_checksum(csv_path),
+        "built_at": time.time(),
+        "num_nodes": graph.num_nodes,
+        "num_edges": graph.num_edges,
+        "num_segments": graph.num_segments,
+        "arrays": arrays,
+    }
+    write_manifest(out_dir, manifest)
+
+    print(f"✅ Road store built in {time.time() - started:.2f}s -> {out_dir}")
+    return graph
+
+
+def read_manifest(out_dir=ROAD_STORE_DIR):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def is_stale(manifest, csv_path=SEGMENTS_CSV_PATH):
+    return (
+        manifest is None
+        or manifest.get("format_version") != FORMAT_VERSION
+        or manifest.get("source_sha256") != source_checksum(csv_path)
+    )
+
+
+def load_road_store(out_dir=ROAD_STORE_DIR, csv_path=SEGMENTS_CSV_PATH):
+    """
+    Memory-maps a previous build. Returns None when there is no build or the
+    source CSV checksum no longer matches (stale build).
+    """
+    manifest = read_manifest(out_dir)
+    if manifest is None:
+        return None
+    if is_stale(manifest, csv_path):
+        print("⚠️ Road store is stale (source CSV changed). Run: python -m ai_engine.road_store build")
+        return None
+
+    arrays = {
+        name: np.load(os.path.join(out_dir, f"{name}.npy"), mmap_mode="r")
+        for name in ARRAYS
+    }
+    return RoadGraph(**arrays)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Usage: python -m ai_engine.road_store build")
+        sys.exit(1)
+    from ai_engine.route_index import build_landmark_index
+
+    built = build_road_store()
+    index = build_landmark_index(built)
+    print(f"✅ {len(index.landmarks)} landmarks saved")
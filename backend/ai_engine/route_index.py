@@ -0,0 +1,174 @@
+"""
+ALT (A*, Landmarks, Triangle inequality) speed-up index for the road graph.
+
+Offline step: pick landmarks spread across the network (farthest-point) and
+save them. Online: for each risk metric, "customize" by running one C-speed
+Dijkstra per landmark (scipy csgraph) to fill the distance tables. Queries run
+A* with the landmark lower bound. When risk weights change only the tables are
+recomputed; the landmark selection is reused.
+
+    python -m ai_engine.route_index build
+
+(python -m ai_engine.road_store build also rebuilds the landmarks.)
+"""
+import heapq
+import math
+import os
+import sys
+import threading
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LANDMARKS_PATH = os.path.join(BASE_DIR, "data", "road_network", "landmarks.npz")
+NUM_LANDMARKS = 16
+
+
+def _csgraph(graph, weights):
+    from scipy.sparse import csr_matrix
+
+    # Duplicate parallel edges are summed by scipy, so keep only the cheapest one
+    order = np.lexsort((weights, graph.edge_target, graph.edge_source))
+    src, dst, w = graph.edge_source[order], graph.edge_target[order], weights[order]
+    keep = np.ones(len(src), dtype=bool)
+    keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+    return csr_matrix((w[keep], (src[keep], dst[keep])), shape=(graph.num_nodes, graph.num_nodes))
+
+
+def _landmark_distances(graph, weights, landmarks):
+    from scipy.sparse.csgraph import dijkstra
+
+    # Every segment is two-way with equal cost both ways, so d(l, v) == d(v, l)
+    table = dijkstra(_csgraph(graph, weights), directed=True, indices=landmarks)
+    # Unreachable nodes get a finite sentinel so |a - b| stays meaningful (and 0 when both are inf)
+    table[~np.isfinite(table)] = 1e12
+    return table
+
+
+def select_landmarks(graph, count=NUM_LANDMARKS):
+    """Farthest-point landmark selection on the plain length metric."""
+    from scipy.sparse.csgraph import dijkstra
+
+    matrix = _csgraph(graph, graph.seg_length[graph.edge_segment])
+    # Start from the node farthest from the network centroid
+    k = math.cos(math.radians(float(graph.node_lat.mean())))
+    d2 = (graph.node_lat - graph.node_lat.mean()) ** 2 + ((graph.node_lng - graph.node_lng.mean()) * k) ** 2
+    landmarks = [int(np.argmax(d2))]
+    nearest = dijkstra(matrix, directed=True, indices=landmarks[0])
+    nearest[~np.isfinite(nearest)] = 0.0
+    while len(landmarks) < min(count, graph.num_nodes):
+        nxt = int(np.argmax(nearest))
+        if nearest[nxt] <= 0:
+            break
+        landmarks.append(nxt)
+        d = dijkstra(matrix, directed=True, indices=nxt)
+        d[~np.isfinite(d)] = 0.0
+        nearest = np.minimum(nearest, d)
+    return np.asarray(landmarks, dtype=np.int64)
+
+
+class LandmarkIndex:
+    """Landmark tables + adjacency lists per risk metric, re-customizable in place."""
+
+    def __init__(self, graph, landmarks):
+        self.graph = graph
+        self.landmarks = np.asarray(landmarks, dtype=np.int64)
+        self._metrics = {}  # risk_weight -> (table [k, n], adjacency lists)
+        self._lock = threading.Lock()
+
+    # --- CUSTOMIZATION ---
+    def customize(self, risk_weight):
+        """(Re)computes the landmark tables for one metric. Cost: k csgraph Dijkstras."""
+        graph = self.graph
+        weights = graph.edge_weights(risk_weight)
+        table = _landmark_distances(graph, weights, self.landmarks)
+
+        # Python lists make the A* inner loop several times faster than numpy scalar access
+        targets = graph.edge_target.tolist()
+        costs = weights.tolist()
+        indptr = graph.indptr.tolist()
+        adjacency = [
+            list(zip(targets[indptr[u]:indptr[u + 1]], costs[indptr[u]:indptr[u + 1]], range(indptr[u], indptr[u + 1])))
+            for u in range(graph.num_nodes)
+        ]
+        metric = (table, adjacency)
+        with self._lock:
+            self._metrics[risk_weight] = metric
+        return metric
+
+    def recustomize(self):
+        """Called after segment risks change: refresh every metric already in use."""
+        with self._lock:
+            weights = list(self._metrics)
+        for risk_weight in weights:
+            self.customize(risk_weight)
+
+    def _metric(self, risk_weight):
+        metric = self._metrics.get(risk_weight)
+        return metric if metric is not None else self.customize(risk_weight)
+
+    # --- QUERY ---
+    def query(self, source, target, risk_weight):
+        """
+        A* with the ALT lower bound h(v) = max_l |d(l, t) - d(l, v)|.
+        Returns (edge_ids, cost) or None if unreachable.
+        """
+        table, adjacency = self._metric(risk_weight)
+        heuristic = np.abs(table - table[:, target:target + 1]).max(axis=0).tolist()
+        if heuristic[source] >= 1e11:
+            return None  # Different components
+
+        dist = {source: 0.0}
+        pred_edge = {}
+        done = set()
+        heap = [(heuristic[source], 0.0, source)]
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            if u == target:
+                break
+            if u in done:
+                continue
+            done.add(u)
+            for v, w, e in adjacency[u]:
+                nd = d + w
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    pred_edge[v] = e
+                    heapq.heappush(heap, (nd + heuristic[v], nd, v))
+        if target not in dist:
+            return None
+        return self.graph._unwind(pred_edge, source, target), dist[target]
+
+
+# --- OFFLINE BUILD / LOAD ---
+def _fingerprint(graph):
+    return np.array([graph.num_nodes, graph.num_edges, graph.num_segments], dtype=np.int64)
+
+
+def build_landmark_index(graph, path=LANDMARKS_PATH, count=NUM_LANDMARKS):
+    landmarks = select_landmarks(graph, count)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, landmarks=landmarks, fingerprint=_fingerprint(graph))
+    return LandmarkIndex(graph, landmarks)
+
+
+def load_landmark_index(graph, path=LANDMARKS_PATH):
+    """Loads the saved landmarks; returns None if missing or built for another graph."""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if not np.array_equal(data["fingerprint"], _fingerprint(graph)):
+            print("⚠️ Landmark index is stale (graph changed). Run: python -m ai_engine.road_store build")
+            return None
+        return LandmarkIndex(graph, data["landmarks"])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Usage: python -m ai_engine.route_index build")
+        sys.exit(1)
+    from ai_engine.road_graph import build_road_graph
+
+    g = build_road_graph()
+    idx = build_landmark_index(g)
+    print(f"✅ {len(idx.landmarks)} landmarks saved to {LANDMARKS_PATH}")
@@ -0,0 +1,197 @@
+"""
+Per-tick ST-GNN scoring of every road segment.
+
+A background job runs one forward pass over the whole segment graph per
+weather tick and publishes the result to a double-buffered table: the pass
+writes into the back buffer, then a single reference swap makes it current.
+Request handlers read SEGMENT_RISK.get(segment_id) in O(1) and never see a
+half-written table. torch is imported by the job thread, not at import.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+from ai_engine.road_graph import MAX_RAIN_MM, MAX_SLOPE, edge_risk_from_features
+
+TICK_INTERVAL = float(os.getenv("STGNN_TICK_S", "60"))          # Fallback cadence without weather ticks
+TORCH_THREADS = int(os.getenv("STGNN_THREADS", str(min(2, os.cpu_count() or 1))))
+FEED_ROUTING = os.getenv("STGNN_FEED_ROUTING", "1") == "1"    # Push each table into RoadGraph weights
+DEFAULT_MOISTURE = 50.0  # % when no sensor reports soil moisture
+
+
+class SegmentRiskTable:
+    """Two preallocated buffers; publish() fills the back one and swaps."""
+
+    def __init__(self, num_segments=0):
+        self._buffers = [np.zeros(num_segments, dtype=np.float32), np.zeros(num_segments, dtype=np.float32)]
+        self._front = 0
+        self.current = None   # Front buffer, None until the first publish
+        self.version = 0
+        self.updated_at = None
+
+    def resize(self, num_segments):
+        self._buffers = [np.zeros(num_segments, dtype=np.float32), np.zeros(num_segments, dtype=np.float32)]
+        self.current = None
+
+    def back_buffer(self):
+        return self._buffers[1 - self._front]
+
+    def publish(self):
+        """Makes the back buffer current. Only the job thread writes, so no lock is needed."""
+        self._front = 1 - self._front
+        self.current = self._buffers[self._front]  # Atomic reference swap for readers
+        self.version += 1
+        self.updated_at = time.time()
+
+    # --- READ PATH (request handlers) ---
+    def get(self, segment_id, default=None):
+        table = self.current
+        return default if table is None else float(table[segment_id])
+
+    def snapshot(self):
+        """(version, array) — the array stays untouched for at least one full tick."""
+        return self.version, self.current
+
+
+class SegmentRiskJob:
+    """
+    Owns the ST-GNN, the segment adjacency and the per-segment LSTM state.
+    Ticks on every IoT weather refresh (tick()) and at least every
+    TICK_INTERVAL seconds.
+    """
+
+    def __init__(self, table, interval=TICK_INTERVAL, threads=TORCH_THREADS, feed_routing=FEED_ROUTING):
+        self.table = table
+        self.interval = interval
+        self.threads = threads
+        self.feed_routing = feed_routing
+
+        self.graph = None
+        self.model = None
+        self.adjacency = None
+        self.state = None          # LSTM (h, c) carried across ticks
+        self.weather = {"rain_mm": 0.0, "moisture": DEFAULT_MOISTURE}
+        self.stats = {"ticks": 0, "errors": 0, "last_ms": None, "avg_ms": None,
+                      "last_error": None, "disabled": None}
+        self._listeners = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    # --- LIFECYCLE ---
+    def start(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="segment-risk", daemon=True)
+                    self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def subscribe(self, callback):
+        """callback(table) runs on the job thread after every publish."""
+        self._listeners.append(callback)
+
+    def tick(self, readings=None):
+        """Weather hook (e.g. IoTPoller.subscribe): records the readings and wakes the job."""
+        if readings:
+            for sensor in readings:
+                if sensor["type"] == "RAIN_GAUGE":
+                    self.weather["rain_mm"] = float(sensor["value"])
+                elif sensor["type"] == "SOIL_MOISTURE":
+                    self.weather["moisture"] = float(sensor["value"])
+        self._wake.set()
+
+    # --- JOB ---
+    def _setup(self):
+        import torch
+
+        from ai_engine.road_graph import get_road_graph
+        from ai_engine.stgnn import load_stgnn, segment_adjacency
+
+        torch.set_num_threads(self.threads)
+        self.graph = get_road_graph()
+        if self.graph is None:
+            raise RuntimeError("road graph unavailable")
+        self.model = load_stgnn()
+        self.adjacency = segment_adjacency(self.graph)
+        self.static_risk = edge_risk_from_features(self.graph.seg_slope, self.graph.seg_rain)
+        self.table.resize(self.graph.num_segments)
+
+    def _run(self):
+        try:
+            self._setup()
+        except Exception as e:
+            self.stats["disabled"] = str(e)
+            print(f"⚠️ [ST-GNN] Segment risk job disabled: {e}")
+            return
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.stats["errors"] += 1
+                self.stats["last_error"] = str(e)
+                print(f"❌ [ST-GNN] Tick failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def features(self):
+        """(segments, 3) float32: rainfall, slope, soil moisture, each scaled to 0..1."""
+        graph = self.graph
+        x = np.empty((graph.num_segments, 3), dtype=np.float32)
+        x[:, 0] = np.minimum((graph.seg_rain + self.weather["rain_mm"]) / MAX_RAIN_MM, 1.0)
+        x[:, 1] = np.minimum(graph.seg_slope / MAX_SLOPE, 1.0)
+        x[:, 2] = min(self.weather["moisture"], 100.0) / 100.0
+        return x
+
+    def run_once(self):
+        import torch
+
+        started = time.perf_counter()
+        x = torch.from_numpy(self.features())
+        with torch.inference_mode():
+            risk, self.state = self.model(x, self.adjacency, self.state)
+            # Straight into the back buffer (shares memory with the numpy array)
+            torch.from_numpy(self.table.back_buffer()).copy_(risk)
+        self.table.publish()
+
+        if self.feed_routing:
+            # Never below the terrain baseline: the model only adds risk
+            self.graph.set_segment_risk(np.maximum(self.static_risk, self.table.current))
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        ticks = self.stats["ticks"] + 1
+        self.stats["ticks"] = ticks
+        self.stats["last_ms"] = round(elapsed_ms, 2)
+        self.stats["avg_ms"] = round(elapsed_ms if ticks == 1 else (self.stats["avg_ms"] * (ticks - 1) + elapsed_ms) / ticks, 2)
+        for callback in list(self._listeners):
+            try:
+                callback(self.table)
+            except Exception as e:
+                print(f" [ST-GNN] Listener Error: {e}")
+
+    def metrics(self):
+        table = self.table.current
+        return dict(
+            self.stats,
+            version=self.table.version,
+            age_s=round(time.time() - self.table.updated_at, 1) if self.table.updated_at else None,
+            threads=self.threads,
+            weather=dict(self.weather),
+            mean_risk=round(float(table.mean()), 4) if table is not None else None,
+            max_risk=round(float(table.max()), 4) if table is not None else None,
+        )
+
+
+# Shared table + job (started from main.py after warm-up)
+SEGMENT_RISK = SegmentRiskTable()
+SEGMENT_RISK_JOB = SegmentRiskJob(SEGMENT_RISK)
@@ -0,0 +1,135 @@
+"""
+In-process STRtree over the road segments for snapping and proximity lookups.
+
+Segments are projected once into a local metric plane (equirectangular around
+the network centre) so every distance the tree returns is already in metres.
+Single-point queries take tens of microseconds; the *_bulk variants push whole
+NumPy arrays of points through one shapely call.
+"""
+import math
+
+import numpy as np
+
+from ai_engine.road_graph import HIGHWAY_CLASSES
+from ai_engine.segment_risk import SEGMENT_RISK
+
+METRES_PER_DEG = 111195.0
+
+
+class SegmentIndex:
+    def __init__(self, graph):
+        import shapely
+
+        self._shapely = shapely
+        self.graph = graph
+        self.lat0 = float(np.mean(graph.node_lat))
+        self.lng0 = float(np.mean(graph.node_lng))
+        self.kx = METRES_PER_DEG * math.cos(math.radians(self.lat0))
+
+        coords = np.asarray(graph.poly_coords)
+        owner = np.repeat(np.arange(graph.num_segments), np.diff(graph.poly_offsets))
+        xy = np.column_stack(self._project(coords[:, 0], coords[:, 1]))
+        self.geoms = shapely.linestrings(xy, indices=owner)
+        self.tree = shapely.STRtree(self.geoms)
+
+        # Segment endpoints as graph nodes (forward edges walk the polyline as stored)
+        forward = ~np.asarray(graph.edge_reversed)
+        self.seg_u = np.empty(graph.num_segments, dtype=np.int64)
+        self.seg_v = np.empty(graph.num_segments, dtype=np.int64)
+        self.seg_u[graph.edge_segment[forward]] = graph.edge_source[forward]
+        self.seg_v[graph.edge_segment[forward]] = graph.edge_target[forward]
+
+    def _project(self, lat, lng):
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        return (lng - self.lng0) * self.kx, (lat - self.lat0) * METRES_PER_DEG
+
+    def _points(self, lat, lng):
+        x, y = self._project(lat, lng)
+        return self._shapely.points(x, y)
+
+    # --- SINGLE POINT ---
+    def nearest(self, lat, lng, k=1):
+        """k nearest segments as [(segment_id, distance_m)], closest first."""
+        point = self._points(lat, lng)
+        idx, dist = self.tree.query_nearest(point, return_distance=True, all_matches=False)
+        if len(idx) == 0:
+            return []
+        if k == 1:
+            return [(int(idx[0]), float(dist[0]))]
+        # Grow a search radius around the nearest hit until k candidates are inside
+        radius = max(float(dist[0]) * 2.0, 250.0)
+        while True:
+            found = self.within(lat, lng, radius)
+            if len(found) >= k or len(found) == self.graph.num_segments:
+                return found[:k]
+            radius *= 3.0
+
+    def within(self, lat, lng, radius_m):
+        """All segments within radius_m as [(segment_id, distance_m)], closest first."""
+        point = self._points(lat, lng)
+        idx = self.tree.query(point, predicate="dwithin", distance=radius_m)
+        if len(idx) == 0:
+            return []
+        dist = self._shapely.distance(self.geoms[idx], point)
+        order = np.argsort(dist)
+        return [(int(i), float(d)) for i, d in zip(idx[order], dist[order])]
+
+    # --- BULK ---
+    def nearest_bulk(self, lats, lngs, max_distance_m=None):
+        """
+        Nearest segment for every point in one call.
+        Returns (segment_ids, distances_m); -1 / inf where nothing is within max_distance_m.
+        """
+        points = self._points(lats, lngs)
+        pairs, dist = self.tree.query_nearest(
+            points, max_distance=max_distance_m, return_distance=True, all_matches=False
+        )
+        segment_ids = np.full(len(points), -1, dtype=np.int64)
+        distances = np.full(len(points), np.inf)
+        segment_ids[pairs[0]] = pairs[1]
+        distances[pairs[0]] = dist
+        return segment_ids, distances
+
+    def within_bulk(self, lats, lngs, radius_m):
+        """All (point_index, segment_id) pairs closer than radius_m, as two arrays."""
+        pairs = self.tree.query(self._points(lats, lngs), predicate="dwithin", distance=radius_m)
+        return pairs[0], pairs[1]
+
+    # --- SNAPPING & ATTRIBUTES ---
+    def snap_node(self, lat, lng):
+        """
+        Snaps to the nearest road segment, then to whichever of its end nodes
+        is closer. Returns (node_id, distance_km) like RoadGraph.nearest_node.
+        """
+        hit = self.nearest(lat, lng)
+        if not hit:
+            return self.graph.nearest_node(lat, lng)
+        seg, dist_m = hit[0]
+        u, v = int(self.seg_u[seg]), int(self.seg_v[seg])
+        x, y = self._project(lat, lng)
+        nx_, ny_ = self._project(self.graph.node_lat[[u, v]], self.graph.node_lng[[u, v]])
+        d2 = (nx_ - x) ** 2 + (ny_ - y) ** 2
+        return (u if d2[0] <= d2[1] else v), dist_m / 1000.0
+
+    def segment_info(self, segment_id, distance_m=None):
+        graph = self.graph
+        info = {
+            "segment_id": int(segment_id),
+            "highway": HIGHWAY_CLASSES[int(graph.seg_highway[segment_id])][0],
+            "length_m": round(float(graph.seg_length[segment_id]), 1),
+            "slope": round(float(graph.seg_slope[segment_id]), 4),
+            "rain_mm": round(float(graph.seg_rain[segment_id]), 1),
+            "risk": round(float(graph.seg_risk[segment_id]), 3),                  # What routing weighs
+            "stgnn_risk": round(SEGMENT_RISK.get(segment_id), 3) if SEGMENT_RISK.current is not None else None,
+        }
+        if distance_m is not None:
+            info["distance_m"] = round(distance_m, 1)
+        return info
+
+    def road_at(self, lat, lng, max_distance_m=None):
+        """Attributes of the road segment a coordinate is on (None if too far)."""
+        hit = self.nearest(lat, lng)
+        if not hit or (max_distance_m is not None and hit[0][1] > max_distance_m):
+            return None
+        return self.segment_info(*hit[0])
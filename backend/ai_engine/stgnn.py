@@ -0,0 +1,73 @@
+"""
+Spatio-temporal GNN over the road-segment graph (models/manual_stgnn.pth).
+
+Nodes are road segments, linked when they share an endpoint. Each tick one
+GCN layer mixes every segment's (rain, slope, moisture) with its neighbours',
+an LSTM cell carries per-segment state from tick to tick and a linear head
+gives P(landslide). Imported lazily: torch only loads with the risk job.
+"""
+import os
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STGNN_MODEL_PATH = os.path.join(BASE_DIR, "models", "manual_stgnn.pth")
+
+NUM_FEATURES = 3  # (rainfall, slope, soil moisture), each scaled to 0..1
+HIDDEN = 16
+
+
+class STGNN(nn.Module):
+    def __init__(self, num_features=NUM_FEATURES, hidden=HIDDEN):
+        super().__init__()
+        self.gcn_weight = nn.Linear(num_features, hidden)
+        self.lstm = nn.LSTM(hidden, hidden)
+        self.classifier = nn.Linear(hidden, 2)
+
+    def forward(self, x, adjacency, state=None):
+        """
+        x: (segments, features); adjacency: normalized sparse (segments, segments).
+        Returns (risk per segment, new LSTM state) — one time step per call.
+        """
+        spatial = torch.relu(self.gcn_weight(torch.sparse.mm(adjacency, x)))
+        out, state = self.lstm(spatial.unsqueeze(0), state)
+        risk = torch.softmax(self.classifier(out[0]), dim=1)[:, 1]
+        return risk, state
+
+
+def load_stgnn(path=STGNN_MODEL_PATH):
+    model = STGNN()
+    model.load_state_dict(torch.load(path, map_location="cpu", weights_only=True))
+    model.eval()
+    return model
+
+
+def segment_adjacency(graph):
+    """
+    Symmetric-normalized D^-1/2 (A + I) D^-1/2 of the segment line graph,
+    built from the CSR arrays: two segments are adjacent when they leave
+    the same node. Returns a coalesced torch sparse COO tensor.
+    """
+    # Every pair of edge slots (i, j) in the same CSR row shares that row's node
+    degree = np.diff(graph.indptr)
+    slot_node = np.repeat(np.arange(graph.num_nodes), degree)
+    count = degree[slot_node]
+    first = np.repeat(np.arange(len(slot_node)), count)
+    within = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    second = np.repeat(graph.indptr[slot_node], count) + within
+
+    n = graph.num_segments
+    a = graph.edge_segment[first].astype(np.int64)
+    b = graph.edge_segment[second].astype(np.int64)
+    # Self pairs (i == j) supply the + I term; duplicates collapse here
+    keys = np.unique(np.concatenate([a * n + b, np.arange(n, dtype=np.int64) * (n + 1)]))
+    rows, cols = keys // n, keys % n
+
+    deg = np.bincount(rows, minlength=n).astype(np.float32)
+    values = 1.0 / np.sqrt(deg[rows] * deg[cols])
+    adjacency = torch.sparse_coo_tensor(
+        torch.from_numpy(np.vstack([rows, cols])), torch.from_numpy(values), (n, n), check_invariants=False
+    )
+    return adjacency.coalesce()
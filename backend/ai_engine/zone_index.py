@@ -0,0 +1,130 @@
+"""
+In-process R-tree (shapely STRtree) over hazard / seismic zone polygons.
+
+Zones load once per process: from data/risk_zones.geojson when present,
+otherwise derived from the road network (a grid of cells graded by the
+length-weighted slope of the roads inside). lookup() answers one point,
+lookup_bulk() whole NumPy arrays through a single vectorized STRtree query
+— no ST_Contains round trip per point.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+from ai_engine.road_graph import MAX_SLOPE, get_road_graph
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ZONES_PATH = os.path.join(BASE_DIR, "data", "risk_zones.geojson")
+
+GRID_CELL_DEG = 0.05      # ~5 km cells for the derived zone grid
+SEISMIC_ZONE = "V"        # BIS IS 1893: the whole North-East is seismic zone V
+STABILITY_GRADES = ((0.5, "LOW"), (0.35, "MODERATE"))  # Share of MAX_SLOPE -> soil stability; else HIGH
+
+
+class ZoneIndex:
+    """zones: list of dicts with "polygon" ([[lat, lng], ...]) plus any properties."""
+
+    def __init__(self, zones):
+        import shapely
+
+        self._shapely = shapely
+        self.zones = [{k: v for k, v in zone.items() if k != "polygon"} for zone in zones]
+        self.geoms = np.array([shapely.Polygon([(lng, lat) for lat, lng in zone["polygon"]]) for zone in zones])
+        self.tree = shapely.STRtree(self.geoms)
+
+    def __len__(self):
+        return len(self.zones)
+
+    def lookup_bulk(self, lat, lng):
+        """
+        Zone index for every point (-1 outside all zones). Where zones overlap,
+        the one listed first wins. One STRtree query for the whole array.
+        """
+        lat = np.asarray(lat, dtype=np.float64).ravel()
+        lng = np.asarray(lng, dtype=np.float64).ravel()
+        result = np.full(len(lat), -1, dtype=np.int64)
+        if not len(lat) or not len(self.zones):
+            return result
+        points = self._shapely.points(lng, lat)
+        point_idx, zone_idx = self.tree.query(points, predicate="intersects")  # Boundary counts as inside
+        if len(point_idx):
+            best = np.full(len(lat), len(self.zones), dtype=np.int64)
+            np.minimum.at(best, point_idx, zone_idx)
+            hit = best < len(self.zones)
+            result[hit] = best[hit]
+        return result
+
+    def lookup(self, lat, lng):
+        """Properties of the zone containing the point, or None."""
+        idx = int(self.lookup_bulk([lat], [lng])[0])
+        return dict(self.zones[idx]) if idx >= 0 else None
+
+
+def load_zone_file(path=ZONES_PATH):
+    """GeoJSON FeatureCollection of Polygons -> zone dicts (outer rings only)."""
+    with open(path) as fh:
+        features = json.load(fh)["features"]
+    zones = []
+    for feature in features:
+        geometry = feature["geometry"]
+        rings = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+        for polygon in rings:
+            zone = dict(feature.get("properties") or {})
+            zone.setdefault("seismic_zone", SEISMIC_ZONE)
+            zone["polygon"] = [[lat, lng] for lng, lat in polygon[0]]
+            zones.append(zone)
+    return zones
+
+
+def derive_zones(graph, cell_deg=GRID_CELL_DEG):
+    """Grid cells that contain roads, graded by length-weighted mean slope."""
+    mid = (graph.poly_offsets[:-1] + graph.poly_offsets[1:] - 1) // 2
+    row = np.floor(graph.poly_coords[mid, 0] / cell_deg).astype(np.int64)
+    col = np.floor(graph.poly_coords[mid, 1] / cell_deg).astype(np.int64)
+    cells, inverse = np.unique(np.column_stack([row, col]), axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    length = np.bincount(inverse, weights=graph.seg_length)
+    slope = np.bincount(inverse, weights=graph.seg_slope * graph.seg_length) / np.maximum(length, 1e-9)
+
+    zones = []
+    for (r, c), mean_slope in zip(cells, slope):
+        share = mean_slope / MAX_SLOPE
+        stability = next((grade for limit, grade in STABILITY_GRADES if share >= limit), "HIGH")
+        lat0, lng0 = r * cell_deg, c * cell_deg
+        zones.append({
+            "zone_id": f"NE-ZN-{r:04d}-{c:04d}",
+            "seismic_zone": SEISMIC_ZONE,
+            "soil_stability": stability,
+            "mean_slope": round(float(mean_slope), 4),
+            "polygon": [[lat0, lng0], [lat0 + cell_deg, lng0], [lat0 + cell_deg, lng0 + cell_deg], [lat0, lng0 + cell_deg]],
+        })
+    return zones
+
+
+_zone_index = None
+_zone_error = None
+_zone_lock = threading.Lock()
+
+
+def get_zone_index():
+    """Builds the shared index once (None if there are no zones to load)."""
+    global _zone_index, _zone_error
+    if _zone_index is None and _zone_error is None:
+        with _zone_lock:
+            if _zone_index is None and _zone_error is None:
+                try:
+                    if os.path.exists(ZONES_PATH):
+                        zones, source = load_zone_file(), ZONES_PATH
+                    else:
+                        graph = get_road_graph()
+                        if graph is None:
+                            raise RuntimeError("no zone file and no road graph to derive zones from")
+                        zones, source = derive_zones(graph), "road network slope grid"
+                    _zone_index = ZoneIndex(zones)
+                    print(f"🗺️ Risk Zones Ready: {len(zones)} polygons ({source})")
+                except Exception as e:
+                    _zone_error = str(e)
+                    print(f"⚠️ Risk zones unavailable: {e}")
+    return _zone_index
@@ -0,0 +1,36 @@
+"""GiST + time indexes for routes and route_segments"""
+
+from alembic import op
+
+revision = "20261017_000002"
+down_revision = "20260124_000001"
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns, access method)
+INDEXES = (
+    ("ix_routes_start_geom", "routes", ["start_geom"], "gist"),
+    ("ix_routes_end_geom", "routes", ["end_geom"], "gist"),
+    ("ix_routes_created_at", "routes", ["created_at"], "btree"),
+    ("ix_route_segments_path", "route_segments", ["path"], "gist"),
+    ("ix_route_segments_route_id", "route_segments", ["route_id"], "btree"),
+)
+
+
+def upgrade():
+    # CONCURRENTLY keeps routes writable while a large table is indexed; it
+    # cannot run inside the migration transaction, hence the autocommit block.
+    with op.get_context().autocommit_block():
+        for name, table, columns, method in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_using=method, postgresql_concurrently=True, if_not_exists=True,
+            )
+    op.execute("ANALYZE routes")
+    op.execute("ANALYZE route_segments")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,135 @@
+"""
+Bulk insert throughput and spatial query latency of db.repository against a
+local PostGIS (run `alembic upgrade head` first).
+
+    DATABASE_URL=postgresql://localhost/drishti_bench python benchmarks/bench_route_repository.py [routes] [--cleanup]
+
+Default: 200k routes x 5 segments = 1M route_segments rows, spread over the
+NE road-network extent. Queries run twice: with the GiST indexes and with
+index scans disabled (sequential baseline). Rows are tagged risk_level=BENCH.
+"""
+import os
+import random
+import sys
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import text  # noqa: E402
+
+from db.repository import RouteRepository, polygon_wkt  # noqa: E402
+
+# NE road-network extent (lat, lng)
+LAT_RANGE = (26.19, 26.85)
+LNG_RANGE = (89.87, 90.41)
+SEGMENTS_PER_ROUTE = 5
+INSERT_BATCH = 2000    # Routes per save_analyses() call
+NUM_QUERIES = 200
+BOX_DEG = 0.02         # ~2 km query polygons
+WITHIN_KM = 2.0
+
+
+def _percentiles(samples):
+    ms = np.asarray(samples) * 1000
+    return f"p50={np.percentile(ms, 50):.2f}ms p99={np.percentile(ms, 99):.2f}ms"
+
+
+def _random_record(rng):
+    lat, lng = rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)
+    segments = []
+    for _ in range(SEGMENTS_PER_ROUTE):
+        path = [[lat, lng]]
+        for _ in range(4):
+            lat += rng.uniform(-0.003, 0.003)
+            lng += rng.uniform(-0.003, 0.003)
+            path.append([lat, lng])
+        segments.append({"coordinates": path, "score": rng.random(), "data": {"bench": True}})
+    return {
+        "start": segments[0]["coordinates"][0], "end": segments[-1]["coordinates"][-1],
+        "distance_km": rng.uniform(1, 50), "risk_level": "BENCH", "segments": segments,
+    }
+
+
+def bench_insert(repo, num_routes):
+    rng = random.Random(42)
+    started = time.perf_counter()
+    for done in range(0, num_routes, INSERT_BATCH):
+        batch = [_random_record(rng) for _ in range(min(INSERT_BATCH, num_routes - done))]
+        repo.save_analyses(batch)
+        if (done // INSERT_BATCH) % 20 == 0:
+            print(f"  inserted {done + len(batch)}/{num_routes} routes", flush=True)
+    elapsed = time.perf_counter() - started
+    rows = num_routes * (1 + SEGMENTS_PER_ROUTE)
+    print(f"Insert: {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+def bench_queries(repo, label):
+    rng = random.Random(7)
+    polygon_times, within_times, hits = [], [], 0
+    for _ in range(NUM_QUERIES):
+        lat, lng = rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)
+        box = [[lat, lng], [lat + BOX_DEG, lng], [lat + BOX_DEG, lng + BOX_DEG], [lat, lng + BOX_DEG]]
+
+        t0 = time.perf_counter()
+        hits += len(repo.routes_intersecting(box, limit=50))
+        polygon_times.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        hits += len(repo.routes_within_km(lat, lng, WITHIN_KM, limit=50))
+        within_times.append(time.perf_counter() - t0)
+    print(f"[{label}] intersecting polygon {_percentiles(polygon_times)}")
+    print(f"[{label}] within {WITHIN_KM:g} km       {_percentiles(within_times)}  ({hits} rows returned)")
+
+
+def explain(session_factory):
+    lat, lng = sum(LAT_RANGE) / 2, sum(LNG_RANGE) / 2
+    box = polygon_wkt([[lat, lng], [lat + BOX_DEG, lng], [lat + BOX_DEG, lng + BOX_DEG], [lat, lng + BOX_DEG]])
+    with session_factory() as session:
+        plan = session.execute(
+            text("EXPLAIN SELECT route_id FROM route_segments WHERE ST_Intersects(path, ST_GeogFromText(:box))"),
+            {"box": box},
+        ).scalars().all()
+    print("Plan (intersects):")
+    for line in plan:
+        print(f"  {line}")
+
+
+def main(num_routes=200_000, cleanup=False):
+    url = os.getenv("DATABASE_URL", "")
+    if urlparse(url.replace("postgresql+psycopg", "postgresql")).hostname not in ("localhost", "127.0.0.1", "::1"):
+        print("Refusing to write benchmark rows: DATABASE_URL must point at a local PostGIS")
+        sys.exit(1)
+
+    from db.session import SessionLocal
+
+    def seqscan_session():
+        # Same queries with the indexes hidden from the planner (sequential baseline)
+        session = SessionLocal()
+        session.execute(text("SET LOCAL enable_indexscan = off"))
+        session.execute(text("SET LOCAL enable_bitmapscan = off"))
+        return session
+
+    repo = RouteRepository(SessionLocal)
+    bench_insert(repo, num_routes)
+    with SessionLocal() as session:
+        session.execute(text("ANALYZE routes"))
+        session.execute(text("ANALYZE route_segments"))
+        session.commit()
+
+    explain(SessionLocal)
+    bench_queries(repo, "gist")
+    bench_queries(RouteRepository(seqscan_session), "seq scan")
+
+    if cleanup:
+        with SessionLocal() as session:
+            session.execute(text("DELETE FROM routes WHERE risk_level = 'BENCH'"))  # Segments cascade
+            session.commit()
+        print("Benchmark rows removed")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(int(args[0]) if args else 200_000, cleanup="--cleanup" in sys.argv)
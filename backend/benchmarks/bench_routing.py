@@ -0,0 +1,52 @@
+"""
+Route query latency: ALT index vs plain Dijkstra over the NE road graph.
+
+    python benchmarks/bench_routing.py [num_queries]
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ai_engine.road_graph import RISK_WEIGHT, get_road_graph  # noqa: E402
+
+
+def _percentiles(samples):
+    ms = np.asarray(samples) * 1000
+    return f"p50={np.percentile(ms, 50):.2f}ms p99={np.percentile(ms, 99):.2f}ms max={ms.max():.2f}ms"
+
+
+def main(num_queries=500):
+    graph = get_road_graph()
+    rng = random.Random(42)
+    pairs = [(rng.randrange(graph.num_nodes), rng.randrange(graph.num_nodes)) for _ in range(num_queries)]
+    weights = graph.edge_weights(RISK_WEIGHT)
+
+    alt, plain = [], []
+    for source, target in pairs:
+        t0 = time.perf_counter()
+        fast = graph.landmarks.query(source, target, RISK_WEIGHT)
+        alt.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        slow = graph.shortest_path(source, target, weights)
+        plain.append(time.perf_counter() - t0)
+
+        if (fast is None) != (slow is None) or (fast and abs(fast[1] - slow[1]) > 1e-6 * max(1.0, slow[1])):
+            raise AssertionError(f"ALT mismatch for {source}->{target}: {fast and fast[1]} vs {slow and slow[1]}")
+
+    print(f"Graph: {graph.num_nodes} nodes / {graph.num_edges} edges, {len(graph.landmarks.landmarks)} landmarks")
+    print(f"ALT      {_percentiles(alt)}")
+    print(f"Dijkstra {_percentiles(plain)}")
+
+    t0 = time.perf_counter()
+    graph.set_segment_risk(np.random.default_rng(0).random(graph.num_segments))
+    print(f"Re-customize after risk update: {(time.perf_counter() - t0) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
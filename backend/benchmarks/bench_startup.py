@@ -0,0 +1,88 @@
+"""
+Cold start: time from process start to first request served and to warm models.
+
+    python benchmarks/bench_startup.py [runs]
+
+Each run boots a fresh uvicorn worker and polls `/` (first request served)
+and `/system/readiness` (models + road graph warm) until they answer 200.
+Set DRISHTI_WARMUP=blocking|background|off to compare warm-up strategies.
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+import requests
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+POLL_INTERVAL = 0.01
+BOOT_TIMEOUT = 120.0
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _import_seconds():
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import main"], cwd=BACKEND_DIR, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def _wait_for(url, started, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return time.perf_counter() - started
+        except requests.ConnectionError:
+            pass
+        time.sleep(POLL_INTERVAL)
+    raise TimeoutError(f"{url} not ready after {BOOT_TIMEOUT:.0f}s")
+
+
+def _boot_once():
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + BOOT_TIMEOUT
+        first_request = _wait_for(f"{base}/", started, deadline)
+        ready = _wait_for(f"{base}/system/readiness", started, deadline)
+        report = requests.get(f"{base}/system/readiness", timeout=1).json()
+    finally:
+        server.terminate()
+        server.wait(10)
+    return first_request, ready, report
+
+
+def _summary(samples):
+    s = np.asarray(samples)
+    return f"median={np.median(s):.3f}s min={s.min():.3f}s max={s.max():.3f}s"
+
+
+def main(runs=5):
+    imports, first, ready = [], [], []
+    for _ in range(runs):
+        imports.append(_import_seconds())
+        first_request, warm, report = _boot_once()
+        first.append(first_request)
+        ready.append(warm)
+
+    print(f"Warm-up mode: {report['warmup_mode']}, model: {report['model']['model']}, runs: {runs}")
+    print(f"import main          {_summary(imports)}")
+    print(f"first request served {_summary(first)}")
+    print(f"models warm (ready)  {_summary(ready)}")
+    print(f"in-process warm-up   {report['warmup']['warmup_ms']}ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
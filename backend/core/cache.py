@@ -0,0 +1,173 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ResultCache:
+    """
+    Bounded LRU + TTL cache for expensive, repeatable results (routes, point
+    predictions, map tiles). Concurrent requests for the same key are
+    coalesced: the first one computes, the rest wait on its future.
+    invalidate() drops everything and makes results still being computed
+    uncacheable; discard() does the same for selected keys only.
+    """
+
+    def __init__(self, name, max_entries=1024, ttl_s=300.0, cacheable=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.cacheable = cacheable or (lambda result: True)
+
+        self._entries = OrderedDict()  # key -> (expires_at, result), least recently used first
+        self._in_flight = {}           # key -> Future shared by coalesced callers
+        self._generation = 0           # Bumped by invalidate()
+        self._stale = set()            # In-flight keys discard()ed before they finished
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0,
+                      "expirations": 0, "invalidations": 0, "discarded": 0, "errors": 0,
+                      "last_invalidation": None}
+
+    # --- LOOKUP ---
+    def _begin(self, key):
+        """Returns ("hit", result), ("wait", future) or ("compute", (future, generation))."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return "hit", entry[1]
+                del self._entries[key]
+                self.stats["expirations"] += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return "wait", future
+            future = Future()
+            self._in_flight[key] = future
+            self.stats["misses"] += 1
+            return "compute", (future, self._generation)
+
+    def _finish(self, key, future, generation, result=None, error=None):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            stale = key in self._stale
+            self._stale.discard(key)
+            if error is not None:
+                self.stats["errors"] += 1
+            elif generation == self._generation and not stale and self.cacheable(result):
+                self._entries[key] = (time.time() + self.ttl_s, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats["evictions"] += 1
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def run(self, key, compute):
+        """compute is a coroutine function, e.g. lambda: CPU_POOL.run(fn, ...); runs at most once per key at a time."""
+        state, value = self._begin(key)
+        if state == "hit":
+            return value
+        if state == "wait":
+            return await asyncio.wrap_future(value)
+        future, generation = value
+        try:
+            result = await compute()
+        except BaseException as e:
+            # Waiters must not hang on a cancelled leader: hand them the failure
+            self._finish(key, future, generation, error=e if isinstance(e, Exception) else RuntimeError("cancelled"))
+            raise
+        self._finish(key, future, generation, result)
+        return result
+
+    # --- MAINTENANCE ---
+    def invalidate(self, reason=None):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.stats["invalidations"] += 1
+            self.stats["last_invalidation"] = reason
+
+    def keys(self):
+        """Snapshot of cached and in-flight keys."""
+        with self._lock:
+            return list(self._entries) + [key for key in self._in_flight if key not in self._entries]
+
+    def discard(self, keys, reason=None):
+        """Drops the given keys; results for them still being computed won't be cached."""
+        dropped = 0
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    dropped += 1
+                if key in self._in_flight:
+                    self._stale.add(key)
+            self.stats["discarded"] += dropped
+            self.stats["last_invalidation"] = reason
+        return dropped
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+            size, in_flight = len(self._entries), len(self._in_flight)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        return dict(
+            stats,
+            size=size,
+            max_entries=self.max_entries,
+            ttl_s=self.ttl_s,
+            in_flight=in_flight,
+            hit_rate=round((stats["hits"] + stats["coalesced"]) / lookups, 3) if lookups else 0.0,
+        )
+
+
+# --- KEY QUANTIZATION ---
+# 3 decimals ~ 110 m: finer than the road graph's node spacing, so nearby
+# requests share a route. Feature steps are below what moves a risk score.
+COORD_DECIMALS = int(os.getenv("CACHE_COORD_DECIMALS", "3"))
+FEATURE_STEPS = {"rainfall": 1.0, "soil_moisture": 1.0, "slope": 0.5}
+
+
+def quantize_coords(*coords, decimals=COORD_DECIMALS):
+    return tuple(round(float(c), decimals) for c in coords)
+
+
+def quantize_features(data, steps=FEATURE_STEPS):
+    """
+    Snaps each known feature to its grid step; returns (snapped copy of data, key).
+    Unparseable values are passed through for the predictor to report.
+    """
+    snapped = dict(data)
+    for field, step in steps.items():
+        try:
+            snapped[field] = round(float(data.get(field, 0) or 0) / step) * step
+        except (TypeError, ValueError):
+            pass
+    return snapped, tuple(repr(snapped.get(field)) for field in steps)
+
+
+# Shared caches (invalidated from main.py on new weather / segment-risk data)
+ROUTE_CACHE = ResultCache(
+    "routes",
+    max_entries=int(os.getenv("ROUTE_CACHE_SIZE", "2048")),
+    ttl_s=float(os.getenv("ROUTE_CACHE_TTL_S", "300")),
+    cacheable=lambda result: "error" not in result,
+)
+TILE_CACHE = ResultCache(
+    "tiles",
+    max_entries=int(os.getenv("TILE_CACHE_SIZE", "4096")),
+    ttl_s=float(os.getenv("TILE_CACHE_TTL_S", "3600")),  # Changed source data discards tiles directly
+)
+PREDICTION_CACHE = ResultCache(
+    "predictions",
+    max_entries=int(os.getenv("PREDICTION_CACHE_SIZE", "10000")),
+    ttl_s=float(os.getenv("PREDICTION_CACHE_TTL_S", "600")),
+    cacheable=lambda result: result.get("risk_level") != "ERROR",
+)
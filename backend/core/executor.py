@@ -0,0 +1,102 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.responses import JSONResponse
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when the CPU pool's queue is full; callers should answer busy_response()."""
+
+
+def busy_response():
+    # CPU pool is full: shed load fast so SOS/alert traffic keeps flowing
+    return JSONResponse({"status": "error", "message": "Server busy, retry shortly"},
+                        status_code=503, headers={"Retry-After": "2"})
+
+
+def _timed_call(fn, args, kwargs):
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return result, started, time.time()
+
+
+class BoundedExecutor:
+    """
+    Offloads CPU-bound work (route search, model scoring) from the event loop.
+    At most max_workers jobs run and max_queue wait; anything beyond that is
+    rejected immediately instead of piling up behind SOS/alert traffic.
+
+    Threads only: jobs are bound methods of process-wide singletons
+    (RISK_TILES, OFFLINE_PACKS, the road graph, model caches) that neither
+    pickle nor may diverge between pool workers. For more CPU, run more
+    uvicorn workers; each builds its own singletons.
+    """
+
+    def __init__(self, max_workers=None, max_queue=None):
+        self.max_workers = max_workers or int(os.getenv("DRISHTI_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("DRISHTI_CPU_QUEUE", "64"))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cpu-pool")
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0,
+                      "wait_ms_total": 0.0, "run_ms_total": 0.0, "wait_ms_max": 0.0}
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.stats["rejected"] += 1
+                raise ExecutorSaturated(f"CPU pool saturated ({self._in_flight} jobs in flight)")
+            self._in_flight += 1
+            self.stats["submitted"] += 1
+
+        submitted = time.time()
+        loop = asyncio.get_running_loop()
+        try:
+            result, started, finished = await loop.run_in_executor(
+                self._pool, functools.partial(_timed_call, fn, args, kwargs)
+            )
+        except BaseException:
+            with self._lock:
+                self.stats["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        with self._lock:
+            wait_ms = max(0.0, started - submitted) * 1000
+            self.stats["completed"] += 1
+            self.stats["wait_ms_total"] += wait_ms
+            self.stats["wait_ms_max"] = max(self.stats["wait_ms_max"], wait_ms)
+            self.stats["run_ms_total"] += (finished - started) * 1000
+        return result
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+            in_flight = self._in_flight
+        done = stats.pop("completed")
+        wait_total = stats.pop("wait_ms_total")
+        run_total = stats.pop("run_ms_total")
+        return dict(
+            stats,
+            workers=self.max_workers,
+            max_queue=self.max_queue,
+            in_flight=in_flight,
+            queue_depth=max(0, in_flight - self.max_workers),
+            completed=done,
+            avg_wait_ms=round(wait_total / done, 2) if done else 0.0,
+            avg_run_ms=round(run_total / done, 2) if done else 0.0,
+        )
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Shared pool for model inference and routing
+CPU_POOL = BoundedExecutor()
@@ -5,8 +5,12 @@ import sys
 
 # Import the new "Government Grade" Model
 from intelligence.risk_model import LandslidePredictor
+from ai_engine.road_graph import MAX_SNAP_KM, get_road_graph
+from intelligence.analytics import AnalyticsEngine
+from core.executor import CPU_POOL, ExecutorSaturated, busy_response
 
-router = APIRouter(prefix="/api/v1/core", tags=["AI War Room"])
+# Own prefix: main.py already serves /api/v1/core/analyze-route (the XGBoost route planner the app calls)
+router = APIRouter(prefix="/api/v1/war-room", tags=["AI War Room"])
 
 class RouteRequest(BaseModel):
     start_lat: float
@@ -16,13 +20,20 @@ class RouteRequest(BaseModel):
     rain_intensity: int = 0
 
 @router.post("/analyze-route")
-def analyze_route(req: RouteRequest):
+async def analyze_route(req: RouteRequest):
     """
     The 'Brain' of the operation.
     1. Calibrates via IMD Data
     2. Runs Random Forest Logic
     3. Returns Telemetry for UI HUD
     """
+    # Model scoring and the road search run on the shared CPU pool, not the event loop
+    try:
+        return await CPU_POOL.run(_analyze_route, req)
+    except ExecutorSaturated:
+        return busy_response()
+
+def _analyze_route(req):
     predictor = LandslidePredictor.get_instance()
     
     # 1. Run the Prediction Model
@@ -31,9 +42,21 @@ def analyze_route(req: RouteRequest):
     mid_lng = (req.start_lng + req.end_lng) / 2
     
     prediction = predictor.predict(req.rain_intensity, mid_lat, mid_lng)
+    AnalyticsEngine.record_route_analysis(prediction['risk_level'])
     
-    # 2. Calculate Distance (Standard Haversine)
-    distance_km = _haversine((req.start_lat, req.start_lng), (req.end_lat, req.end_lng))
+    # 2. Calculate Distance (Real road path, Haversine if outside coverage)
+    graph = get_road_graph()
+    road = graph.route(req.start_lat, req.start_lng, req.end_lat, req.end_lng) if graph else None
+    road_context = {
+        "origin": graph.spatial.road_at(req.start_lat, req.start_lng, max_distance_m=MAX_SNAP_KM * 1000),
+        "destination": graph.spatial.road_at(req.end_lat, req.end_lng, max_distance_m=MAX_SNAP_KM * 1000)
+    } if graph and graph.spatial else None
+    if road:
+        distance_km = road["distance_km"]
+        coordinates = road["coordinates"].round(6).tolist()
+    else:
+        distance_km = _haversine((req.start_lat, req.start_lng), (req.end_lat, req.end_lng))
+        coordinates = [[req.start_lat, req.start_lng], [req.end_lat, req.end_lng]]
     
     # 3. Calculate ETA with Risk Penalty
     # If Risk is CRITICAL, speed drops by 70%
@@ -52,9 +75,11 @@ def analyze_route(req: RouteRequest):
             "eta_mins": int(real_time_mins),
             "risk_score": prediction['risk_score'],
             "risk_level": prediction['risk_level'],
+            "coordinates": coordinates,
             "risk_factors": prediction['telemetry'], # <--- FEEDS THE HUD
             "explanation": prediction['explanation']
         },
+        "road_context": road_context,
         "meta": {
             "model_version": "RF_v2.1_IMD_Calibrated",
             "data_source": "Ministry of Earth Sciences (Open Data)"
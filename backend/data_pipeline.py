@@ -1,5 +1,9 @@
-import time
+import argparse
+import asyncio
+import inspect
 import random
+import time
+from collections import deque
 from datetime import datetime
 
 # --- CONFIGURATION: SOVEREIGN DATA SOURCES ---
@@ -9,12 +13,20 @@ DATA_SOURCES = {
     "DISASTER": "NDMA_ALERT_FEED"
 }
 
-print(f"📡 [SYSTEM START] INITIALIZING DATA INGESTION PIPELINE...")
+# Per-source polling: seconds between polls, +/- jitter, per-fetch timeout, max backoff after errors
+SOURCE_SCHEDULE = {
+    "TERRAIN": {"interval_s": 60.0, "jitter_s": 5.0, "timeout_s": 10.0, "backoff_max_s": 300.0},
+    "WEATHER": {"interval_s": 5.0, "jitter_s": 1.0, "timeout_s": 3.0, "backoff_max_s": 60.0},
+    "DISASTER": {"interval_s": 10.0, "jitter_s": 2.0, "timeout_s": 3.0, "backoff_max_s": 60.0},
+}
+DEFAULT_SCHEDULE = {"interval_s": 30.0, "jitter_s": 3.0, "timeout_s": 5.0, "backoff_max_s": 120.0}  # Sources without a row
+QUEUE_SIZE = 1000  # Records buffered for consumers; producers wait (backpressure) when full
+
 
 def fetch_imd_weather():
     """Simulates polling the Indian Meteorological Dept API"""
     # Real-world: requests.get('https://api.imd.gov.in/v1/weather/ne-sector')
-    rain_mm = random.choice([45, 120, 210, 15, 300]) 
+    rain_mm = random.choice([45, 120, 210, 15, 300])
     return {"rainfall_24h": rain_mm, "source": "INSAT-3DR"}
 
 def fetch_isro_terrain():
@@ -25,29 +37,233 @@ def fetch_isro_terrain():
         "lithology": "SEDIMENTARY_SOFT"
     }
 
-def run_pipeline():
-    print("\n🔄 PIPELINE ACTIVE: Polling Satellites every 5s...")
-    while True:
-        # 1. EXTRACT
-        weather = fetch_imd_weather()
-        terrain = fetch_isro_terrain()
-        
-        # 2. TRANSFORM (Data Fusion)
+def fetch_ndma_alerts():
+    """Simulates the NDMA alert feed (usually empty)"""
+    if random.random() < 0.1:
+        return [{"id": f"NDMA-{int(time.time())}", "severity": "WARNING", "event": "Landslide Watch"}]
+    return []
+
+# --- NORMALIZERS: raw payload -> list of {"kind", "data"} ---
+def normalize_weather(raw):
+    return [{"kind": "weather", "data": {"rainfall_24h_mm": float(raw["rainfall_24h"]), "sensor": raw.get("source")}}]
+
+def normalize_terrain(raw):
+    return [{"kind": "terrain", "data": {
+        "slope_avg_deg": float(raw["slope_avg"]),
+        "soil_moisture_pct": float(raw["soil_moisture"]),
+        "lithology": raw.get("lithology"),
+    }}]
+
+def normalize_alerts(raw):
+    return [{"kind": "alert", "data": dict(alert)} for alert in raw]
+
+
+class Source:
+    """
+    One pollable feed. fetch is a plain or async callable returning the raw
+    payload; normalize turns it into records. Swap fetch for a local
+    stand-in to run the scheduler without the real upstream.
+    """
+
+    def __init__(self, name, fetch, normalize, provider=None, interval_s=5.0, jitter_s=0.0,
+                 timeout_s=5.0, backoff_max_s=60.0):
+        self.name = name
+        self.fetch = fetch
+        self.normalize = normalize
+        self.provider = provider or DATA_SOURCES.get(name, name)
+        self.interval_s = interval_s
+        self.jitter_s = jitter_s
+        self.timeout_s = timeout_s
+        self.backoff_max_s = backoff_max_s
+
+    async def poll(self):
+        if inspect.iscoroutinefunction(self.fetch):
+            return await asyncio.wait_for(self.fetch(), self.timeout_s)
+        # Blocking client: run it off the loop. A timed-out thread finishes in the background.
+        return await asyncio.wait_for(asyncio.to_thread(self.fetch), self.timeout_s)
+
+
+def default_sources():
+    fetchers = {
+        "TERRAIN": (fetch_isro_terrain, normalize_terrain),
+        "WEATHER": (fetch_imd_weather, normalize_weather),
+        "DISASTER": (fetch_ndma_alerts, normalize_alerts),
+    }
+    sources = []
+    for name in DATA_SOURCES:
+        if name not in fetchers:
+            # Nothing to call yet: register a Source for it with IngestionScheduler.register()
+            print(f"   ⚠️  [PIPELINE] No fetcher for {name}; not polled")
+            continue
+        sources.append(Source(name, *fetchers[name], **SOURCE_SCHEDULE.get(name, DEFAULT_SCHEDULE)))
+    return sources
+
+
+class IngestionScheduler:
+    """
+    Polls every registered source concurrently on its own interval (with
+    jitter), retries failures with exponential backoff, and puts normalized
+    records on one bounded asyncio.Queue. A full queue blocks the producers,
+    so slow consumers slow the polling instead of growing memory.
+    """
+
+    def __init__(self, sources=None, queue_size=QUEUE_SIZE):
+        self.sources = {}
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.metrics = {}
+        self.started_at = None
+        self._tasks = []
+        for source in sources if sources is not None else default_sources():
+            self.register(source)
+
+    def register(self, source):
+        self.sources[source.name] = source
+        self.metrics[source.name] = {
+            "polls": 0, "records": 0, "errors": 0, "timeouts": 0, "consecutive_failures": 0,
+            "last_error": None, "last_success_at": None, "last_latency_ms": None,
+            "lag_s": 0.0, "max_lag_s": 0.0, "queue_wait_s": 0.0, "next_poll_in_s": None,
+        }
+
+    # --- LIFECYCLE ---
+    def start(self):
+        self.started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._run_source(source), name=f"ingest-{name}")
+                       for name, source in self.sources.items()]
+        return self._tasks
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def records(self):
+        """Consumer side: yields records as they arrive."""
+        while True:
+            record = await self.queue.get()
+            try:
+                yield record
+            finally:
+                self.queue.task_done()
+
+    # --- PER-SOURCE LOOP ---
+    def _delay(self, source, failures):
+        base = source.interval_s if failures == 0 else min(source.interval_s * 2 ** failures, source.backoff_max_s)
+        return max(0.0, base + random.uniform(-source.jitter_s, source.jitter_s))
+
+    async def _run_source(self, source):
+        stats = self.metrics[source.name]
+        due = time.monotonic() + random.uniform(0, source.jitter_s)  # Spread the first polls
+        while True:
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            started = time.monotonic()
+            # Lag: how late this poll starts versus its schedule (a busy event loop shows up here)
+            stats["lag_s"] = round(started - due, 3)
+            stats["max_lag_s"] = max(stats["max_lag_s"], stats["lag_s"])
+            stats["polls"] += 1
+            try:
+                raw = await source.poll()
+                records = source.normalize(raw)
+            except asyncio.TimeoutError:
+                stats["timeouts"] += 1
+                stats["errors"] += 1
+                stats["consecutive_failures"] += 1
+                stats["last_error"] = f"timeout after {source.timeout_s}s"
+            except Exception as e:
+                stats["errors"] += 1
+                stats["consecutive_failures"] += 1
+                stats["last_error"] = str(e)
+            else:
+                stats["consecutive_failures"] = 0
+                stats["last_success_at"] = time.time()
+                stats["last_latency_ms"] = round((time.monotonic() - started) * 1000, 2)
+                ingested_at = time.time()
+                for record in records:
+                    record.update(source=source.name, provider=source.provider, ingested_at=ingested_at)
+                    wait_started = time.monotonic()
+                    await self.queue.put(record)  # Backpressure: blocks while the queue is full
+                    stats["queue_wait_s"] += time.monotonic() - wait_started
+                    stats["records"] += 1
+            delay = self._delay(source, stats["consecutive_failures"])
+            stats["next_poll_in_s"] = round(delay, 2)
+            due = time.monotonic() + delay
+
+    def get_metrics(self):
+        uptime = time.monotonic() - self.started_at if self.started_at else 0.0
+        sources = {}
+        for name, stats in self.metrics.items():
+            sources[name] = dict(
+                stats,
+                queue_wait_s=round(stats["queue_wait_s"], 3),
+                records_per_min=round(stats["records"] / uptime * 60, 2) if uptime else 0.0,
+                staleness_s=round(time.time() - stats["last_success_at"], 1) if stats["last_success_at"] else None,
+            )
+        return {"uptime_s": round(uptime, 1), "queue_depth": self.queue.qsize(),
+                "queue_size": self.queue.maxsize, "sources": sources}
+
+
+class FusionConsumer:
+    """Downstream consumer: fuses the latest weather + terrain into a risk packet and keeps a short history."""
+
+    def __init__(self, history=500):
+        self.latest = {}
+        self.packets = deque(maxlen=history)
+
+    def handle(self, record):
+        if record["kind"] == "alert":
+            print(f"   🚨 [NDMA] {record['data'].get('event')} ({record['data'].get('severity')})")
+            return None
+        self.latest[record["kind"]] = record["data"]
+        weather, terrain = self.latest.get("weather"), self.latest.get("terrain")
+        if record["kind"] != "weather" or terrain is None:
+            return None
+
+        # TRANSFORM (Data Fusion)
         timestamp = datetime.now().strftime('%H:%M:%S')
         data_packet = {
             "time": timestamp,
-            "rain": weather['rainfall_24h'],
-            "soil": terrain['soil_moisture'],
-            "risk_flag": "HIGH" if weather['rainfall_24h'] > 150 else "NORMAL"
+            "rain": weather["rainfall_24h_mm"],
+            "soil": terrain["soil_moisture_pct"],
+            "risk_flag": "HIGH" if weather["rainfall_24h_mm"] > 150 else "NORMAL"
         }
-        
-        # 3. LOAD (Visual Log for Judges)
-        print(f"   [{timestamp}] 💾 INGESTED: Rain={data_packet['rain']}mm | Soil={data_packet['soil']:.1f}% | Integrity: INDIGENOUS")
-        
+        self.packets.append(data_packet)
+
+        # LOAD (Visual Log for Judges)
+        print(f"   [{timestamp}] 💾 INGESTED: Rain={data_packet['rain']:.0f}mm | Soil={data_packet['soil']:.1f}% | Integrity: INDIGENOUS")
         if data_packet['rain'] > 200:
             print("   ⚠️  [ALERT] TRIGGERING DISASTER PROTOCOL (Code Red)")
-            
-        time.sleep(5)
+        return data_packet
+
+    async def consume(self, scheduler):
+        async for record in scheduler.records():
+            self.handle(record)
+
+
+async def run_pipeline_async(duration=None, metrics_every=30.0, sources=None):
+    scheduler = IngestionScheduler(sources)
+    consumer = FusionConsumer()
+    scheduler.start()
+    consumer_task = asyncio.create_task(consumer.consume(scheduler))
+    started = time.monotonic()
+    try:
+        while duration is None or time.monotonic() - started < duration:
+            remaining = None if duration is None else duration - (time.monotonic() - started)
+            await asyncio.sleep(metrics_every if remaining is None else min(metrics_every, remaining))
+            for name, stats in scheduler.get_metrics()["sources"].items():
+                print(f"   📊 {name}: polls={stats['polls']} records={stats['records']} errors={stats['errors']} "
+                      f"lag={stats['lag_s']}s rate={stats['records_per_min']}/min")
+    finally:
+        await scheduler.stop()
+        consumer_task.cancel()
+        await asyncio.gather(consumer_task, return_exceptions=True)
+    return scheduler.get_metrics()
+
+def run_pipeline(duration=None):
+    print(f"📡 [SYSTEM START] INITIALIZING DATA INGESTION PIPELINE...")
+    print(f"\n🔄 PIPELINE ACTIVE: Polling {len(DATA_SOURCES)} sources concurrently...")
+    return asyncio.run(run_pipeline_async(duration))
 
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Concurrent ingestion of the configured DATA_SOURCES")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    run_pipeline(parser.parse_args().duration)
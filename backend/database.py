@@ -1,5 +1,9 @@
 # MOCK POSTGIS DATABASE ADAPTER
 # In production, this connects to PostgreSQL with PostGIS extension.
+# Zone lookups are served in-process (ai_engine.zone_index R-tree).
+import numpy as np
+
+from ai_engine.zone_index import SEISMIC_ZONE, get_zone_index
 
 class GeoDatabase:
     def __init__(self):
@@ -8,12 +12,28 @@ class GeoDatabase:
 
     def query_risk_zone(self, lat, lng):
         """
-        Simulates: SELECT risk_level FROM landslide_zones WHERE ST_Contains(geom, POINT(lat, lng))
+        Replaces: SELECT risk_level FROM landslide_zones WHERE ST_Contains(geom, POINT(lat, lng))
+        Answered from the in-process zone R-tree: no database round trip.
         """
-        # Mocking a spatial query result
+        index = get_zone_index()
+        zone = index.lookup(lat, lng) if index is not None else None
+        return zone if zone is not None else self._region_default(lat)
+
+    def query_risk_zones(self, lats, lngs):
+        """Batch form: one vectorized lookup for arrays of points, one dict per point."""
+        lats = np.asarray(lats, dtype=np.float64)
+        index = get_zone_index()
+        if index is None:
+            return [self._region_default(lat) for lat in lats]
+        zone_ids = index.lookup_bulk(lats, lngs)
+        return [dict(index.zones[z]) if z >= 0 else self._region_default(lat) for z, lat in zip(zone_ids, lats)]
+
+    @staticmethod
+    def _region_default(lat):
+        # Outside every mapped zone: NE-wide seismic zone, coarse stability by latitude
         return {
-            "zone_id": "NE-ZN-04",
-            "seismic_zone": "V",
+            "zone_id": None,
+            "seismic_zone": SEISMIC_ZONE,
             "soil_stability": "LOW" if lat > 26.0 else "MODERATE"
         }
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Enum, text
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Enum, Index, text
 from sqlalchemy.dialects import postgresql as pg
 from sqlalchemy.sql import func
 from geoalchemy2 import Geography
@@ -16,6 +16,13 @@ class Route(Base):
     risk_level = Column(String(length=32), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    # Created by migration 20261017_000002 (spatial_index=False keeps GeoAlchemy from adding its own)
+    __table_args__ = (
+        Index("ix_routes_start_geom", "start_geom", postgresql_using="gist"),
+        Index("ix_routes_end_geom", "end_geom", postgresql_using="gist"),
+        Index("ix_routes_created_at", "created_at"),
+    )
+
 
 class RouteSegment(Base):
     __tablename__ = "route_segments"
@@ -26,6 +33,11 @@ class RouteSegment(Base):
     score = Column(Float, nullable=True)
     segment_data = Column(pg.JSONB, server_default=text("'{}'::jsonb"), nullable=False)
 
+    __table_args__ = (
+        Index("ix_route_segments_path", "path", postgresql_using="gist"),
+        Index("ix_route_segments_route_id", "route_id"),
+    )
+
 class AuthorityDecision(Base):
     __tablename__ = "authority_decisions"
 
@@ -0,0 +1,169 @@
+"""
+Persistence for analyzed routes.
+
+Writes go out as chunked multi-row INSERTs (ids are generated client-side,
+so a route and its segments need no RETURNING round trip). Reads are
+shaped so PostGIS can use the GiST indexes from 20261017_000002:
+ST_Intersects / ST_DWithin on route_segments.path, then a join on
+routes.id. created_at filters use ix_routes_created_at.
+"""
+import uuid
+
+from sqlalchemy import func, insert, select
+
+from db.models import Route, RouteSegment
+
+BATCH_ROWS = 1000  # Rows per INSERT statement (well under the 65535 bind-parameter limit)
+
+
+def point_wkt(lat, lng):
+    return f"SRID=4326;POINT({float(lng)} {float(lat)})"
+
+
+def linestring_wkt(coordinates):
+    """[[lat, lng], ...] (the API's order) -> EWKT LINESTRING (lng lat order)."""
+    if len(coordinates) < 2:
+        coordinates = list(coordinates) * 2  # A single point still needs two vertices
+    return "SRID=4326;LINESTRING(" + ", ".join(f"{float(lng)} {float(lat)}" for lat, lng in coordinates) + ")"
+
+
+def polygon_wkt(vertices):
+    """[[lat, lng], ...] ring (closed automatically) or a ready WKT/EWKT string."""
+    if isinstance(vertices, str):
+        return vertices
+    ring = list(vertices)
+    if ring[0] != ring[-1]:
+        ring.append(ring[0])
+    return "SRID=4326;POLYGON((" + ", ".join(f"{float(lng)} {float(lat)}" for lat, lng in ring) + "))"
+
+
+def analysis_records(start, end, result):
+    """
+    One stored route per find_safest_route() analysis: the route row carries
+    the best option's risk, and every option (best + alternatives) becomes a
+    route segment with its own path and score.
+    """
+    options = [result["best_route"]] + list(result.get("alternatives", []))
+    return {
+        "start": start,
+        "end": end,
+        "distance_km": result["best_route"].get("distance_km"),
+        "risk_level": result["best_route"].get("risk_level"),
+        "segments": [
+            {
+                "coordinates": option["coordinates"],
+                "score": option.get("risk_score"),
+                "data": {k: option.get(k) for k in ("id", "name", "risk_level", "eta", "distance_km")},
+            }
+            for option in options
+        ],
+    }
+
+
+def _chunks(rows, size=BATCH_ROWS):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+class RouteRepository:
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from db.session import SessionLocal  # Deferred: needs DATABASE_URL
+
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+
+    # --- WRITE ---
+    def save_analyses(self, records):
+        """
+        records: [{"start": (lat, lng), "end": (lat, lng), "distance_km", "risk_level",
+                   "created_at" (optional), "segments": [{"coordinates", "score", "data"}]}]
+        Returns the new route ids. One transaction; multi-row INSERTs of BATCH_ROWS.
+        """
+        route_rows, segment_rows = [], []
+        for record in records:
+            route_id = uuid.uuid4()
+            row = {
+                "id": route_id,
+                "start_geom": point_wkt(*record["start"]),
+                "end_geom": point_wkt(*record["end"]),
+                "distance_km": record.get("distance_km"),
+                "risk_level": record.get("risk_level"),
+            }
+            if record.get("created_at") is not None:
+                row["created_at"] = record["created_at"]
+            route_rows.append(row)
+            for segment in record.get("segments", []):
+                segment_rows.append({
+                    "id": uuid.uuid4(),
+                    "route_id": route_id,
+                    "path": linestring_wkt(segment["coordinates"]),
+                    "score": segment.get("score"),
+                    "segment_data": segment.get("data") or {},
+                })
+
+        with self.session_factory() as session:
+            # Rows with and without created_at can't share one VALUES list
+            for has_time in (False, True):
+                rows = [r for r in route_rows if ("created_at" in r) == has_time]
+                for chunk in _chunks(rows):
+                    session.execute(insert(Route).values(chunk))
+            for chunk in _chunks(segment_rows):
+                session.execute(insert(RouteSegment).values(chunk))
+            session.commit()
+        return [row["id"] for row in route_rows]
+
+    # --- READ ---
+    @staticmethod
+    def _route_columns():
+        return (
+            Route.id,
+            func.ST_Y(func.geometry(Route.start_geom)).label("start_lat"),
+            func.ST_X(func.geometry(Route.start_geom)).label("start_lng"),
+            func.ST_Y(func.geometry(Route.end_geom)).label("end_lat"),
+            func.ST_X(func.geometry(Route.end_geom)).label("end_lng"),
+            Route.distance_km,
+            Route.risk_level,
+            Route.created_at,
+        )
+
+    @staticmethod
+    def _as_dict(row, distance_m=None):
+        route = {
+            "id": str(row.id),
+            "start": [row.start_lat, row.start_lng],
+            "end": [row.end_lat, row.end_lng],
+            "distance_km": row.distance_km,
+            "risk_level": row.risk_level,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+        }
+        if distance_m is not None:
+            route["distance_from_point_km"] = round(distance_m / 1000, 3)
+        return route
+
+    def routes_intersecting(self, polygon, since=None, limit=100):
+        """Routes with any segment crossing the polygon ([[lat, lng], ...] or WKT), newest first."""
+        area = func.ST_GeogFromText(polygon_wkt(polygon))
+        hits = select(RouteSegment.route_id).where(func.ST_Intersects(RouteSegment.path, area))
+        stmt = select(*self._route_columns()).where(Route.id.in_(hits))
+        if since is not None:
+            stmt = stmt.where(Route.created_at >= since)
+        stmt = stmt.order_by(Route.created_at.desc()).limit(limit)
+        with self.session_factory() as session:
+            return [self._as_dict(row) for row in session.execute(stmt)]
+
+    def routes_within_km(self, lat, lng, km, since=None, limit=100):
+        """Routes passing within km of a point, nearest first."""
+        point = func.ST_GeogFromText(point_wkt(lat, lng))
+        nearby = (
+            select(RouteSegment.route_id, func.min(func.ST_Distance(RouteSegment.path, point)).label("distance_m"))
+            .where(func.ST_DWithin(RouteSegment.path, point, float(km) * 1000))
+            .group_by(RouteSegment.route_id)
+            .subquery()
+        )
+        stmt = select(*self._route_columns(), nearby.c.distance_m).join(nearby, nearby.c.route_id == Route.id)
+        if since is not None:
+            stmt = stmt.where(Route.created_at >= since)
+        stmt = stmt.order_by(nearby.c.distance_m, Route.created_at.desc()).limit(limit)
+        with self.session_factory() as session:
+            return [self._as_dict(row, row.distance_m) for row in session.execute(stmt)]
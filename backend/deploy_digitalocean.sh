@@ -46,6 +46,10 @@ pip install -r backend/requirements.txt
 mkdir -p backend/ai_models/distilbert
 echo "🧠 [AI] Model directory structure confirmed."
 
+# 5b. ROAD NETWORK BUILD (mmap arrays shared by all workers)
+echo "🛣️ [DATA] Building binary road network..."
+(cd backend && python -m ai_engine.road_store build && python -m ai_engine.env_raster build)
+
 # 6. SYSTEMD SERVICE
 echo "⚙️ [SERVICE] Configuring Systemd..."
 # Ensure the service file points to the right path (/root/DrishtiApp/backend)
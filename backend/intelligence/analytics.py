@@ -1,41 +1,139 @@
 # backend/intelligence/analytics.py
-import random
+import threading
 import time
-from intelligence.crowdsource import CrowdManager
+from collections import deque
+
+
+class RollingCounter:
+    """
+    Event count over a sliding time window, kept in a fixed ring of buckets.
+    Memory is constant and reads cost at most one pass over the ring.
+    """
+
+    def __init__(self, window_s, buckets=60):
+        self.bucket_s = window_s / buckets
+        self.slots = [0] * buckets
+        self.total = 0
+        self.head = int(time.time() // self.bucket_s)
+
+    def _advance(self, now):
+        idx = int(now // self.bucket_s)
+        steps = idx - self.head
+        if steps <= 0:
+            return
+        n = len(self.slots)
+        for k in range(1, min(steps, n) + 1):
+            slot = (self.head + k) % n
+            self.total -= self.slots[slot]
+            self.slots[slot] = 0
+        self.head = idx
+
+    def add(self, amount=1, now=None):
+        now = time.time() if now is None else now
+        self._advance(now)
+        self.slots[self.head % len(self.slots)] += amount
+        self.total += amount
+
+    def value(self, now=None):
+        self._advance(time.time() if now is None else now)
+        return self.total
+
+
+def _window_counters(windows, events):
+    return {event: {w: RollingCounter(s) for w, s in windows.items()} for event in events}
+
 
 class AnalyticsEngine:
     """
     Generates high-level situational awareness metrics for the Command Center.
+    Counters are updated as events arrive, so a dashboard poll is O(1)
+    no matter how many events have been ingested.
     """
 
+    WINDOWS = {"1m": 60, "15m": 15 * 60, "1h": 60 * 60}
+
+    # Route risk levels (ne_predictor + core.routing) -> dashboard buckets
+    RISK_BUCKETS = {
+        "SAFE": "safe", "LOW": "safe",
+        "CAUTION": "moderate", "MODERATE": "moderate",
+        "HIGH": "critical", "DANGER": "critical", "DANGEROUS": "critical", "CRITICAL": "critical",
+    }
+    EVENTS = ("crowd_reports", "routes_safe", "routes_moderate", "routes_critical", "dispatches")
+
+    _lock = threading.Lock()
+    _counters = _window_counters(WINDOWS, EVENTS)
+    _totals = dict.fromkeys(EVENTS, 0)
+    _recent_hazards = deque(maxlen=5)
+    _field_units = {"online": 0}
+
+    # --- INGEST (called by the subsystems as events happen) ---
+    @staticmethod
+    def _record(event, now=None):
+        now = time.time() if now is None else now
+        with AnalyticsEngine._lock:
+            for counter in AnalyticsEngine._counters[event].values():
+                counter.add(1, now)
+            AnalyticsEngine._totals[event] += 1
+
+    @staticmethod
+    def record_crowd_report(report):
+        AnalyticsEngine._record("crowd_reports", report.get("timestamp"))
+        AnalyticsEngine._recent_hazards.append(report)
+
+    @staticmethod
+    def record_route_analysis(risk_level):
+        bucket = AnalyticsEngine.RISK_BUCKETS.get(str(risk_level).upper(), "moderate")
+        AnalyticsEngine._record(f"routes_{bucket}")
+
+    @staticmethod
+    def record_dispatch():
+        AnalyticsEngine._record("dispatches")
+
+    @staticmethod
+    def update_field_units(online_delta=0):
+        with AnalyticsEngine._lock:
+            units = AnalyticsEngine._field_units
+            units["online"] = max(0, units["online"] + online_delta)
+
+    # --- READ ---
+    @staticmethod
+    def _window_counts(now):
+        return {
+            window: {event: AnalyticsEngine._counters[event][window].value(now) for event in AnalyticsEngine.EVENTS}
+            for window in AnalyticsEngine.WINDOWS
+        }
+
     @staticmethod
     def get_live_stats():
-        # Simulate active user base distribution
-        total_users = random.randint(1200, 1500)
-        offline_users = random.randint(300, 450)
-        
-        # Get real crowd reports
-        reports = CrowdManager.active_reports
-        
-        # Calculate Risk Distribution (Simulated for Demo based on current rain)
-        # In prod, this would query the DB for all active route calculations
-        safe_routes = random.randint(60, 80)
-        critical_routes = random.randint(10, 20)
-        moderate_routes = 100 - safe_routes - critical_routes
+        now = time.time()
+        with AnalyticsEngine._lock:
+            windows = AnalyticsEngine._window_counts(now)
+            online = AnalyticsEngine._field_units["online"]
+            totals = dict(AnalyticsEngine._totals)
+            hazards = list(AnalyticsEngine._recent_hazards)
+
+        # Risk Distribution = share of route analyses in the last hour
+        last_hour = windows["1h"]
+        routed = last_hour["routes_safe"] + last_hour["routes_moderate"] + last_hour["routes_critical"]
+
+        def share(key):
+            return round(100 * last_hour[key] / routed) if routed else 0
 
         return {
-            "timestamp": time.time(),
+            "timestamp": now,
             "system_status": "OPERATIONAL",
+            # Units out on missions (LogisticsManager); nothing reports offline units yet
             "field_units": {
-                "total": total_users,
-                "online": total_users - offline_users,
-                "offline_survival_mode": offline_users
+                "total": online,
+                "online": online
             },
             "risk_distribution": [
-                {"name": "Safe", "value": safe_routes, "color": "#10b981"},
-                {"name": "Moderate", "value": moderate_routes, "color": "#f59e0b"},
-                {"name": "Critical", "value": critical_routes, "color": "#ef4444"}
+                {"name": "Safe", "value": share("routes_safe"), "color": "#10b981"},
+                {"name": "Moderate", "value": share("routes_moderate"), "color": "#f59e0b"},
+                {"name": "Critical", "value": share("routes_critical"), "color": "#ef4444"}
             ],
-            "recent_hazards": reports[-5:] if reports else [], # Last 5 reports
+            "windows": windows,
+            "totals": totals,
+            "recent_hazards": hazards, # Last 5 reports
             "isro_feed_status": "CONNECTED (Latency: 45ms)"
         }
@@ -1,6 +1,139 @@
 # backend/intelligence/audit.py
+import os
+import queue
+import threading
 import time
-from datetime import datetime
+import atexit
+from collections import deque
+from datetime import datetime, timezone
+
+# --- CONFIG ---
+RING_SIZE = int(os.getenv("AUDIT_RING_SIZE", "1000"))       # Hot in-memory window (newest first)
+QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "50000"))    # Pending DB writes before we start dropping
+BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))      # Rows per multi-row INSERT
+FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))  # Max seconds an entry waits for a batch
+
+
+class AuditWriter:
+    """
+    Background persistence for the black box.
+    Request threads only do a non-blocking put(); one daemon thread drains the
+    queue in batches into the audit_log table with a single multi-row INSERT.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.enabled = bool(os.getenv("DATABASE_URL"))
+        self.stats = {
+            "enqueued": 0,
+            "persisted": 0,
+            "dropped": 0,     # Queue full (DB can't keep up)
+            "failed": 0,      # Rows lost to DB errors after retry
+            "batches": 0,
+            "max_lag_s": 0.0  # Worst enqueue -> commit delay seen
+        }
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, entry):
+        if not self.enabled:
+            return False
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((time.time(), entry))
+            self._count("enqueued")
+            return True
+        except queue.Full:
+            self._count("dropped")
+            return False
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        try:
+            from sqlalchemy import insert
+            from db.models import AuditLog
+            from db.session import SessionLocal
+        except Exception as e:
+            print(f" [AUDIT] DB persistence disabled: {e}")
+            self.enabled = False
+            return
+
+        while not (self._stop.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write(batch, insert, AuditLog, SessionLocal)
+
+    def _next_batch(self):
+        """Blocks for the first entry, then collects up to BATCH_SIZE or FLUSH_INTERVAL."""
+        try:
+            batch = [self.queue.get(timeout=FLUSH_INTERVAL)]
+        except queue.Empty:
+            return []
+        deadline = time.time() + FLUSH_INTERVAL
+        while len(batch) < BATCH_SIZE:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0 and not self._stop.is_set():
+                    batch.append(self.queue.get(timeout=remaining))
+                else:
+                    batch.append(self.queue.get_nowait())  # Take what's ready, don't wait
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch, insert, AuditLog, SessionLocal):
+        rows = [
+            {
+                "actor": entry["actor"],
+                "action": entry["action"],
+                "payload": {
+                    "id": entry["id"],
+                    "details": entry["details"],
+                    "severity": entry["severity"]
+                },
+                "created_at": entry["created_at"]
+            }
+            for _, entry in batch
+        ]
+        for attempt in range(2):
+            try:
+                with SessionLocal() as session:
+                    session.execute(insert(AuditLog).values(rows))
+                    session.commit()
+                break
+            except Exception as e:
+                if attempt == 1:
+                    print(f" [AUDIT] Batch of {len(rows)} lost: {e}")
+                    self._count("failed", len(rows))
+                    return
+                time.sleep(0.5)
+        with self._lock:
+            self.stats["persisted"] += len(rows)
+            self.stats["batches"] += 1
+            self.stats["max_lag_s"] = max(self.stats["max_lag_s"], round(time.time() - batch[0][0], 3))
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        return dict(stats, enabled=self.enabled, queue_depth=self.queue.qsize())
+
+    def shutdown(self, timeout=10.0):
+        """Flush everything still queued, then stop the writer."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
 
 class AuditLogger:
     """
@@ -8,31 +141,39 @@ class AuditLogger:
     Records critical events for post-disaster forensic analysis.
     """
     
-    # In-memory storage for hackathon (Use PostgreSQL/Blockchain in prod)
-    LOGS = []
+    # Fixed-size ring for the dashboard (O(1) insert, newest first);
+    # the full history goes to the audit_log table via WRITER.
+    LOGS = deque(maxlen=RING_SIZE)
+    WRITER = AuditWriter()
 
     @staticmethod
     def log(actor, action, details, severity="INFO"):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        now = datetime.now()
         entry = {
             "id": f"LOG_{int(time.time()*1000)}",
-            "time": timestamp,
+            "time": now.strftime("%Y-%m-%d %H:%M:%S"),
             "actor": actor,       # e.g., "SYSTEM", "ADMIN", "USER_101"
             "action": action,     # e.g., "ROUTE_CLOSE", "SOS_DISPATCH"
             "details": details,
             "severity": severity  # INFO, WARN, CRITICAL
         }
-        # Prepend to keep newest first
-        AuditLogger.LOGS.insert(0, entry)
-        # Keep only last 100 logs
-        if len(AuditLogger.LOGS) > 100:
-            AuditLogger.LOGS.pop()
+        # Prepend to keep newest first (oldest falls off the ring)
+        AuditLogger.LOGS.appendleft(entry)
+        AuditLogger.WRITER.submit(dict(entry, created_at=now.astimezone(timezone.utc)))
         
         return entry
 
     @staticmethod
     def get_logs():
-        return AuditLogger.LOGS
+        return list(AuditLogger.LOGS)
+
+    @staticmethod
+    def get_stats():
+        return AuditLogger.WRITER.get_stats()
+
+    @staticmethod
+    def shutdown():
+        AuditLogger.WRITER.shutdown()
 
     @staticmethod
     def generate_cap_xml(alert_msg, lat, lng):
@@ -63,3 +204,6 @@ class AuditLogger:
             </info>
         </alert>
         """
+
+
+atexit.register(AuditLogger.shutdown)
@@ -1,6 +1,10 @@
 # backend/intelligence/crowdsource.py
+import math
+import threading
 import time
 
+from intelligence.analytics import AnalyticsEngine
+
 class CrowdManager:
     """
     Manages the 'Human Sensor Network'.
@@ -14,6 +18,25 @@ class CrowdManager:
     THRESHOLD_WARNING = 3  # 3 user reports = Mark as Risky
     THRESHOLD_CRITICAL = 5 # 5 reports = Mark as Closed
 
+    # SPATIAL BUCKET INDEX
+    # A zone is the box |dlat| < 0.01 and |dlng| < 0.01 (approx 1km) around a point.
+    # Reports are bucketed into cells a quarter of that radius wide, so a lookup
+    # touches a fixed 9x9 block of cells: interior cells are summed from their
+    # counters, only the border ring is filtered point by point.
+    CLUSTER_RADIUS = 0.01
+    CELL_SIZE = CLUSTER_RADIUS / 4
+    _EPS = 1e-9  # Guards floor() rounding at cell edges
+
+    _cell_counts = {}  # (i, j) -> number of reports in the cell
+    _cell_points = {}  # (i, j) -> {(lat, lng): number of reports at that exact spot}
+    _lock = threading.Lock()
+    _listeners = []
+
+    @staticmethod
+    def subscribe(callback):
+        """callback(report) runs after every new report (user or admin)."""
+        CrowdManager._listeners.append(callback)
+
     @staticmethod
     def submit_report(lat: float, lng: float, hazard_type: str):
         report = {
@@ -23,9 +46,29 @@ class CrowdManager:
             "timestamp": time.time(),
             "verified": False
         }
-        CrowdManager.active_reports.append(report)
+        CrowdManager._add_report(report)
+        AnalyticsEngine.record_crowd_report(report)
         return CrowdManager.evaluate_zone(lat, lng)
 
+    @staticmethod
+    def _cell(lat, lng):
+        return (math.floor(lat / CrowdManager.CELL_SIZE), math.floor(lng / CrowdManager.CELL_SIZE))
+
+    @staticmethod
+    def _add_report(report):
+        cell = CrowdManager._cell(report["lat"], report["lng"])
+        spot = (report["lat"], report["lng"])
+        with CrowdManager._lock:
+            CrowdManager.active_reports.append(report)
+            CrowdManager._cell_counts[cell] = CrowdManager._cell_counts.get(cell, 0) + 1
+            points = CrowdManager._cell_points.setdefault(cell, {})
+            points[spot] = points.get(spot, 0) + 1
+        for callback in list(CrowdManager._listeners):
+            try:
+                callback(report)
+            except Exception as e:
+                print(f" [Crowd] Listener Error: {e}")
+
     @staticmethod
     def evaluate_zone(lat, lng):
         """
@@ -33,12 +76,7 @@ class CrowdManager:
         Returns the derived risk level.
         """
         # Simple Clustering Logic (approx 1km radius)
-        nearby_reports = [
-            r for r in CrowdManager.active_reports 
-            if abs(r["lat"] - lat) < 0.01 and abs(r["lng"] - lng) < 0.01
-        ]
-        
-        count = len(nearby_reports)
+        count = CrowdManager._count_nearby(lat, lng)
         
         if count >= CrowdManager.THRESHOLD_CRITICAL:
             return {"risk": "CRITICAL", "source": f"Confirmed by {count} Citizens"}
@@ -49,6 +87,32 @@ class CrowdManager:
         
         return None # No crowd data
 
+    @staticmethod
+    def _count_nearby(lat, lng):
+        """Number of reports with |dlat| < CLUSTER_RADIUS and |dlng| < CLUSTER_RADIUS."""
+        r, size, eps = CrowdManager.CLUSTER_RADIUS, CrowdManager.CELL_SIZE, CrowdManager._EPS
+        i0, i1 = math.floor((lat - r) / size), math.floor((lat + r) / size)
+        j0, j1 = math.floor((lng - r) / size), math.floor((lng + r) / size)
+        # A cell is "interior" when every point it can hold is strictly inside the box
+        lng_interior = {j: j * size > lng - r + eps and (j + 1) * size < lng + r - eps for j in range(j0, j1 + 1)}
+
+        count = 0
+        counts, points = CrowdManager._cell_counts, CrowdManager._cell_points
+        for i in range(i0, i1 + 1):
+            lat_interior = i * size > lat - r + eps and (i + 1) * size < lat + r - eps
+            for j in range(j0, j1 + 1):
+                cell_count = counts.get((i, j))
+                if not cell_count:
+                    continue
+                if lat_interior and lng_interior[j]:
+                    count += cell_count
+                else:
+                    count += sum(
+                        n for (p_lat, p_lng), n in list(points[(i, j)].items())
+                        if abs(p_lat - lat) < r and abs(p_lng - lng) < r
+                    )
+        return count
+
     @staticmethod
     def admin_override(lat: float, lng: float, status: str):
         """
@@ -57,7 +121,7 @@ class CrowdManager:
         """
         # Fake an overwhelming number of reports to force the logic
         for _ in range(10):
-            CrowdManager.active_reports.append({
+            CrowdManager._add_report({
                 "lat": lat, "lng": lng, 
                 "type": f"ADMIN_OVERRIDE_{status}", 
                 "timestamp": time.time(),
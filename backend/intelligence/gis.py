@@ -1,5 +1,15 @@
 # backend/intelligence/gis.py
+import gzip
+import hashlib
+import json
 import random
+import threading
+import time
+
+import numpy as np
+
+from core.cache import TILE_CACHE
+from intelligence.iot_network import RAIN_CRITICAL_MM, RIVER_CRITICAL_CM
 
 class GISEngine:
     """
@@ -12,6 +22,7 @@ class GISEngine:
         """
         Generates simulated 'Red Zones' around the area.
         In production, this would read Shapefiles/PostGIS.
+        Map clients should page through RISK_TILES (/api/v1/gis/tiles/{z}/{x}/{y}) instead.
         """
         layers = {
             "flood_zones": [],
@@ -46,3 +57,247 @@ class GISEngine:
             })
 
         return layers
+
+
+# ==========================================
+# 🗺️ VECTOR TILES (z/x/y, Web Mercator)
+# ==========================================
+EXTENT = 4096            # Tile-local integer grid (as in Mapbox Vector Tiles)
+TILE_BUFFER = 64         # Clip margin in tile units, so strokes don't break at tile edges
+MAX_ZOOM = 18
+ROAD_MIN_ZOOM = 10       # Below this the segment layer is omitted (too dense to read)
+RISK_STEP = 0.05         # Segment risk is served in these steps; smaller changes keep tiles valid
+FLOOD_HIGH_RAIN_MM = RAIN_CRITICAL_MM / 2        # Flood zones go HIGH at half the breach rainfall
+FLOOD_HIGH_RIVER_CM = RIVER_CRITICAL_CM * 2 / 3  # ... or two thirds of the breach river level
+
+
+def tile_bounds(z, x, y):
+    """(west, south, east, north) in degrees; also works on NumPy arrays."""
+    n = 2.0 ** z
+    west = np.asarray(x) / n * 360.0 - 180.0
+    east = (np.asarray(x) + 1) / n * 360.0 - 180.0
+    north = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y) / n))))
+    south = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (np.asarray(y) + 1) / n))))
+    return west, south, east, north
+
+
+def _buffered_bounds(z, x, y):
+    west, south, east, north = tile_bounds(z, x, y)
+    pad_x = (east - west) * TILE_BUFFER / EXTENT
+    pad_y = (north - south) * TILE_BUFFER / EXTENT
+    return west - pad_x, south - pad_y, east + pad_x, north + pad_y
+
+
+def _to_tile_coords(z, x, y):
+    """Vectorized (lng, lat) -> tile-local (px, py) transform for shapely.transform."""
+    n = 2.0 ** z
+
+    def transform(coords):
+        lng, lat = coords[:, 0], np.radians(coords[:, 1])
+        px = ((lng + 180.0) / 360.0 * n - x) * EXTENT
+        py = ((1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0 * n - y) * EXTENT
+        return np.column_stack([px, py])
+
+    return transform
+
+
+class TileLayer:
+    """One source layer: geometries (lng/lat) + properties behind an STRtree."""
+
+    def __init__(self, name, geoms, features, min_zoom=0):
+        import shapely
+
+        self._shapely = shapely
+        self.name = name
+        self.geoms = np.asarray(geoms, dtype=object)
+        self.features = features
+        self.min_zoom = min_zoom
+        self.tree = shapely.STRtree(self.geoms)
+        self.bounds = shapely.bounds(self.geoms)  # (n, 4) west, south, east, north
+
+    def update(self, indices, **props):
+        """Sets props (arrays aligned with indices) on features; returns the changed bounds."""
+        for column, values in props.items():
+            for i, value in zip(indices, values):
+                self.features[i][column] = value
+        return self.bounds[indices]
+
+    def render(self, z, x, y):
+        """Features clipped to the (buffered) tile, simplified to 1 unit and snapped to the integer grid."""
+        shapely = self._shapely
+        if z < self.min_zoom or not len(self.geoms):
+            return []
+        clip = _buffered_bounds(z, x, y)
+        hits = self.tree.query(shapely.box(*clip), predicate="intersects")
+        if not len(hits):
+            return []
+        hits.sort()
+        geoms = shapely.clip_by_rect(self.geoms[hits], *clip)
+        geoms = shapely.transform(geoms, _to_tile_coords(z, x, y))
+        geoms = shapely.simplify(geoms, 1.0)
+        geoms = shapely.set_precision(geoms, 1.0)
+
+        rendered = []
+        for i, geom in zip(hits, geoms):
+            if geom is None or geom.is_empty:
+                continue
+            parts = shapely.get_parts(geom)
+            if geom.geom_type.endswith("Polygon"):
+                geometry = [
+                    [self._flat(ring) for ring in [part.exterior, *part.interiors]]
+                    for part in parts if part.geom_type == "Polygon"
+                ]
+                kind = "polygon"
+            else:
+                geometry = [self._flat(part) for part in parts if part.geom_type == "LineString"]
+                kind = "line"
+            if geometry:
+                rendered.append(dict(self.features[i], type=kind, geometry=geometry))
+        return rendered
+
+    def _flat(self, line):
+        # [x0, y0, x1, y1, ...] as ints: the most compact JSON form of a ring/line
+        return self._shapely.get_coordinates(line).astype(np.int32).ravel().tolist()
+
+
+class RiskTileService:
+    """
+    Serves flood zones, landslide clusters and road-segment risk as z/x/y
+    tiles: pre-clipped, simplified, quantized JSON, gzipped once. Tiles live
+    in a bounded ResultCache keyed by (z, x, y); when a layer's source
+    changes, only tiles overlapping the changed features are discarded.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.layers = None
+        self.flood_level = None
+        self._lock = threading.Lock()
+        self.stats = {"rendered": 0, "render_ms_total": 0.0, "bytes_raw": 0, "bytes_gzip": 0,
+                      "source_updates": 0, "tiles_discarded": 0}
+
+    # --- SOURCES ---
+    def _build_layers(self):
+        import shapely
+
+        from ai_engine.road_graph import get_road_graph
+        from ai_engine.zone_index import get_zone_index
+
+        layers = {}
+        graph = get_road_graph()
+        if graph is not None:
+            lines = shapely.linestrings(graph.poly_coords[:, ::-1], indices=np.repeat(
+                np.arange(graph.num_segments), np.diff(graph.poly_offsets)))
+            risk = self._risk_steps(graph.seg_risk)
+            features = [{"id": int(i), "risk": float(r)} for i, r in enumerate(risk)]
+            layers["road_risk"] = TileLayer("road_risk", lines, features, min_zoom=ROAD_MIN_ZOOM)
+
+        index = get_zone_index()
+        zones = index.zones if index is not None else []
+        # Steep cells (unstable soil) are landslide clusters; flat valley-floor cells are the flood plains
+        for name, stability, info in (
+            ("landslide_clusters", "LOW", "Unstable Slope (mean {mean_slope:.2f})"),
+            ("flood_zones", "HIGH", "Valley Floor Flood Plain"),
+        ):
+            picked = [i for i, zone in enumerate(zones) if zone.get("soil_stability") == stability]
+            features = [{
+                "id": zones[i]["zone_id"],
+                "risk_level": "HIGH" if name == "landslide_clusters" else self.flood_level or "WATCH",
+                "info": info.format(mean_slope=zones[i].get("mean_slope", 0.0)),
+            } for i in picked]
+            layers[name] = TileLayer(name, index.geoms[picked] if picked else [], features)
+        return layers
+
+    def get_layers(self):
+        if self.layers is None:
+            with self._lock:
+                if self.layers is None:
+                    self.layers = self._build_layers()
+        return self.layers
+
+    @staticmethod
+    def _risk_steps(risk):
+        return np.round(np.round(np.asarray(risk, dtype=np.float64) / RISK_STEP) * RISK_STEP, 2)
+
+    # --- RENDER ---
+    def render_tile(self, z, x, y):
+        """Returns {"etag", "body" (gzip), "size"} for one tile."""
+        started = time.perf_counter()
+        payload = {
+            "z": z, "x": x, "y": y, "extent": EXTENT,
+            "layers": {name: layer.render(z, x, y) for name, layer in self.get_layers().items()},
+        }
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        body = gzip.compress(raw, compresslevel=6)
+        self.stats["rendered"] += 1
+        self.stats["render_ms_total"] += (time.perf_counter() - started) * 1000
+        self.stats["bytes_raw"] += len(raw)
+        self.stats["bytes_gzip"] += len(body)
+        return {"etag": '"%s"' % hashlib.sha1(raw).hexdigest()[:20], "body": body, "size": len(raw)}
+
+    # --- INVALIDATION ---
+    def invalidate_bounds(self, bounds, reason):
+        """Discards cached tiles (any zoom) that overlap one of the (west, south, east, north) boxes."""
+        import shapely
+
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        keys = self.cache.keys()
+        if not len(bounds) or not keys:
+            return 0
+        z, x, y = (np.array(column) for column in zip(*keys))
+        tiles = shapely.box(*_buffered_bounds(z, x, y))
+        changed = shapely.STRtree(shapely.box(bounds[:, 0], bounds[:, 1], bounds[:, 2], bounds[:, 3]))
+        tile_idx, _ = changed.query(tiles, predicate="intersects")
+        stale = [keys[i] for i in np.unique(tile_idx)]
+        self.cache.discard(stale, reason)
+        self.stats["source_updates"] += 1
+        self.stats["tiles_discarded"] += len(stale)
+        return len(stale)
+
+    def on_segment_risk(self, risk):
+        """Segment risk hook (e.g. SEGMENT_RISK_JOB.subscribe): re-tiles only where a risk step changed."""
+        layer = self.get_layers().get("road_risk")
+        if layer is None:
+            return 0
+        new = self._risk_steps(risk)
+        old = np.fromiter((f["risk"] for f in layer.features), dtype=np.float64, count=len(layer.features))
+        changed = np.flatnonzero(np.abs(new - old) > RISK_STEP / 2)
+        if not len(changed):
+            return 0
+        bounds = layer.update(changed, risk=new[changed].tolist())
+        return self.invalidate_bounds(bounds, "segment_risk")
+
+    def on_weather(self, readings):
+        """IoT hook: flood-zone tiles change only when the flood level does."""
+        values = {sensor["type"]: sensor["value"] for sensor in readings or []}
+        try:
+            rain = float(values.get("RAIN_GAUGE", 0) or 0)
+            river = float(values.get("RIVER_LEVEL", 0) or 0)
+        except (TypeError, ValueError):
+            return 0  # Offline / status readings
+        if rain > RAIN_CRITICAL_MM or river > RIVER_CRITICAL_CM:
+            level = "CRITICAL"  # Same thresholds as IoTManager.check_critical_breach
+        elif rain > FLOOD_HIGH_RAIN_MM or river > FLOOD_HIGH_RIVER_CM:
+            level = "HIGH"
+        else:
+            level = "WATCH"
+        if level == self.flood_level:
+            return 0
+        self.flood_level = level
+        layer = self.get_layers()["flood_zones"]
+        indices = np.arange(len(layer.features))
+        bounds = layer.update(indices, risk_level=[level] * len(indices))
+        return self.invalidate_bounds(bounds, "flood_level")
+
+    def metrics(self):
+        rendered = self.stats["rendered"]
+        return dict(
+            self.stats,
+            render_ms_total=round(self.stats["render_ms_total"], 1),
+            avg_render_ms=round(self.stats["render_ms_total"] / rendered, 2) if rendered else None,
+            flood_level=self.flood_level,
+            cache=self.cache.metrics(),
+        )
+
+
+RISK_TILES = RiskTileService(TILE_CACHE)
@@ -0,0 +1,177 @@
+"""
+Push channel for IoT readings and breach events (Server-Sent Events).
+
+One producer: IoTPoller.subscribe(...) hands every refresh to publish(),
+which assesses the readings once, encodes each event once and appends it
+to a shared, sequence-numbered ring. Subscribers are async generators on
+the event loop that read the ring from their own cursor, so a sensor update
+costs one computation and one wake-up call no matter how many clients
+watch. A client's backlog is bounded: if it falls more than CLIENT_BUFFER
+events behind (or off the end of the ring) it is dropped and can reconnect
+with Last-Event-ID to resume — or, if that sequence is gone, get a fresh
+snapshot.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from intelligence.iot_network import REFRESH_INTERVAL, IoTManager
+
+REPLAY_EVENTS = int(os.getenv("IOT_FEED_REPLAY", "512"))        # Ring size available for resume
+CLIENT_BUFFER = int(os.getenv("IOT_FEED_CLIENT_BUFFER", "64"))  # Max events a client may lag behind
+HEARTBEAT_S = float(os.getenv("IOT_FEED_HEARTBEAT_S", "15"))    # Keeps proxies from closing idle streams
+RETRY_MS = 3000                                                  # EventSource reconnect delay
+
+
+def encode_event(seq, event, data):
+    return f"id: {seq}\nevent: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class IoTFeed:
+    def __init__(self, replay=REPLAY_EVENTS, client_buffer=CLIENT_BUFFER, heartbeat_s=HEARTBEAT_S):
+        self.client_buffer = client_buffer
+        self.heartbeat_s = heartbeat_s
+
+        self.seq = 0
+        self.latest = None            # Last assessed state (also served by /api/v1/iot/feed)
+        self.checked_at = None        # Last publish() call, changed or not
+        self._events = deque(maxlen=replay)  # (seq, encoded SSE bytes), oldest first
+        self._last_readings = None
+        self._breach = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+        self._loop = None
+        self._changed = None          # Future shared by every waiting subscriber; resolved on publish
+        self._closed = False
+        self.subscribers = 0
+        self.stats = {"published": 0, "unchanged": 0, "breach_events": 0, "connects": 0,
+                      "resumed": 0, "resets": 0, "dropped_slow": 0}
+
+    # --- PRODUCER (poller thread) ---
+    def publish(self, readings):
+        """Assesses one reading set and broadcasts it; identical readings are not re-sent."""
+        now = time.time()
+        with self._lock:
+            self.checked_at = now
+            if readings == self._last_readings:
+                self.stats["unchanged"] += 1
+                return False
+            self._last_readings = [dict(r) for r in readings]
+
+            assessment = IoTManager.assess(readings)
+            state = dict(assessment, readings=self._last_readings, updated_at=now)
+            events = [("readings", state)]
+            if assessment["breach"] != self._breach:
+                events.append(("breach", {"breach": assessment["breach"], "previous": self._breach,
+                                          "threat_level": assessment["threat_level"], "at": now}))
+                self._breach = assessment["breach"]
+                self.stats["breach_events"] += 1
+            for event, data in events:
+                self.seq += 1
+                self._events.append((self.seq, encode_event(self.seq, event, dict(data, seq=self.seq))))
+            self.latest = dict(state, seq=self.seq)
+            self.stats["published"] += 1
+        self._notify()
+        return True
+
+    def current(self, max_age_s=REFRESH_INTERVAL):
+        """Latest state, refreshed (once, for all concurrent callers) when older than max_age_s."""
+        if self.checked_at is None or time.time() - self.checked_at > max_age_s:
+            with self._refresh_lock:
+                if self.checked_at is None or time.time() - self.checked_at > max_age_s:
+                    self.publish(IoTManager.get_live_readings())
+        return self.latest
+
+    def _notify(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake)
+
+    # --- FAN-OUT (event loop) ---
+    def attach(self, loop):
+        """Binds the feed to the serving event loop (lifespan startup)."""
+        self._loop = loop
+        self._closed = False
+
+    def close(self):
+        self._closed = True
+        self._notify()
+
+    def _wake(self):
+        future, self._changed = self._changed, None
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    def _next_change(self):
+        if self._changed is None:
+            self._changed = asyncio.get_running_loop().create_future()
+        return self._changed
+
+    def _after(self, seq):
+        """(events newer than seq, gap) — gap means seq fell off the ring."""
+        with self._lock:
+            if not self._events or seq >= self.seq:
+                return [], False
+            gap = seq < self._events[0][0] - 1
+            return [event for event in self._events if event[0] > seq], gap
+
+    def _snapshot_event(self):
+        """(seq, encoded snapshot) of the latest state; the cursor continues from its seq."""
+        with self._lock:
+            state, seq = self.latest, self.seq
+        return (state["seq"], encode_event(state["seq"], "snapshot", state)) if state else (seq, None)
+
+    async def stream(self, last_seq=None):
+        """SSE byte stream for one client; last_seq resumes after that event."""
+        self.subscribers += 1
+        self.stats["connects"] += 1
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            cursor = None
+            if last_seq is not None and last_seq <= self.seq:
+                backlog, gap = self._after(last_seq)
+                if not gap:
+                    self.stats["resumed"] += 1
+                    for _, blob in backlog:
+                        yield blob
+                    cursor = backlog[-1][0] if backlog else last_seq
+            if cursor is None:
+                # New client, or its sequence is no longer in the ring: start from a full snapshot
+                if last_seq is not None:
+                    self.stats["resets"] += 1
+                cursor, snapshot = self._snapshot_event()
+                if snapshot:
+                    yield snapshot
+
+            while not self._closed:
+                if self.seq <= cursor:  # Nothing published while we were sending
+                    try:
+                        await asyncio.wait_for(asyncio.shield(self._next_change()), self.heartbeat_s)
+                    except asyncio.TimeoutError:
+                        yield b": ping\n\n"
+                        continue
+                events, gap = self._after(cursor)
+                for seq, blob in events:
+                    if gap or self.seq - cursor > self.client_buffer:
+                        # Slow consumer: cut it loose rather than buffer for it
+                        self.stats["dropped_slow"] += 1
+                        yield encode_event(cursor, "dropped", {"reason": "slow consumer", "resume_from": cursor})
+                        return
+                    yield blob
+                    cursor = seq
+        finally:
+            self.subscribers -= 1
+
+    def metrics(self):
+        with self._lock:
+            ring = len(self._events)
+        return dict(self.stats, seq=self.seq, subscribers=self.subscribers, ring=ring,
+                    client_buffer=self.client_buffer,
+                    threat_level=self.latest["threat_level"] if self.latest else None)
+
+
+IOT_FEED = IoTFeed()
@@ -1,16 +1,195 @@
+import os
+import threading
+import time
+
 import requests
-import random
+from requests.adapters import HTTPAdapter
+
 from .simulation import SimulationManager
 
+# --- UPSTREAM CONFIG (override IOT_UPSTREAM_URL to point at a local stand-in) ---
+UPSTREAM_URL = os.getenv("IOT_UPSTREAM_URL", "https://api.open-meteo.com/v1/forecast")
+REFRESH_INTERVAL = float(os.getenv("IOT_REFRESH_S", "60"))   # Normal poll cadence
+REQUEST_TIMEOUT = float(os.getenv("IOT_TIMEOUT_S", "2"))
+FIRST_FETCH_WAIT = 2.0  # Cold start: how long a request may wait for the very first snapshot
+
+# Safety thresholds (check_critical_breach) and the soil moisture that saturates the risk index
+RAIN_CRITICAL_MM = 80.0
+RIVER_CRITICAL_CM = 150.0
+MOISTURE_SATURATED = 100.0
+
+OFFLINE_READINGS = [{"id": "S-ERR", "type": "STATUS", "value": "OFFLINE", "unit": ""}]
+
+
+class CircuitBreaker:
+    """
+    CLOSED -> (failure_threshold consecutive errors) -> OPEN -> (reset_timeout) -> HALF_OPEN
+    A HALF_OPEN trial call closes the breaker on success or re-opens it on failure.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "CLOSED"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "OPEN" and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = "HALF_OPEN"
+            return self.state != "OPEN"
+
+    def record_success(self):
+        with self._lock:
+            self.state = "CLOSED"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "HALF_OPEN" or self.failures >= self.failure_threshold:
+                self.state = "OPEN"
+                self.opened_at = time.time()
+
+
+class IoTPoller:
+    """
+    One background thread per process polls the weather upstream over a pooled
+    session and publishes an immutable snapshot. Requests read the snapshot
+    (stale-while-revalidate): a stale read nudges the poller but never waits on it.
+    """
+
+    def __init__(self, lat, lng, url=UPSTREAM_URL, interval=REFRESH_INTERVAL,
+                 timeout=REQUEST_TIMEOUT, breaker=None):
+        self.lat = lat
+        self.lng = lng
+        self.url = url
+        self.interval = interval
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.snapshot = None  # {"readings": [...], "fetched_at": float}
+        self.stats = {"fetches": 0, "errors": 0, "skipped_open_circuit": 0, "last_error": None}
+        self._listeners = []
+        self._wake = threading.Event()
+        self._first = threading.Event()
+        self._waited = False  # The one-off cold-start wait has been spent
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    # --- LIFECYCLE ---
+    def start(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="iot-poller", daemon=True)
+                    self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(self.timeout + 1)
+            self._thread = None
+        self.session.close()
+
+    def subscribe(self, callback):
+        """callback(snapshot) runs on the poller thread after every successful refresh."""
+        self._listeners.append(callback)
+
+    # --- POLLING ---
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._wake.wait(self.interval if self.snapshot else min(self.interval, 5.0))
+            self._wake.clear()
+
+    def refresh(self):
+        if not self.breaker.allow():
+            self.stats["skipped_open_circuit"] += 1
+            return False
+        try:
+            response = self.session.get(
+                self.url,
+                params={"latitude": self.lat, "longitude": self.lng, "current": "rain,wind_speed_10m"},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            current = response.json().get("current", {})
+        except Exception as e:
+            self.breaker.record_failure()
+            self.stats["errors"] += 1
+            self.stats["last_error"] = str(e)
+            print(f" [IoT] Sensor Error: {e}")
+            return False
+
+        self.breaker.record_success()
+        self.stats["fetches"] += 1
+        real_rain = current.get("rain", 0.0)
+        real_wind = current.get("wind_speed_10m", 5.0)
+        self.snapshot = {
+            "readings": [
+                {"id": "S-01", "type": "RAIN_GAUGE", "value": real_rain, "unit": "mm"},
+                {"id": "S-02", "type": "RIVER_LEVEL", "value": 45, "unit": "cm"}, # Nominal
+                {"id": "S-03", "type": "WIND_SENSOR", "value": real_wind, "unit": "km/h"}
+            ],
+            "fetched_at": time.time(),
+        }
+        self._first.set()
+        for callback in list(self._listeners):
+            try:
+                callback(self.snapshot)
+            except Exception as e:
+                print(f" [IoT] Listener Error: {e}")
+        return True
+
+    # --- READ PATH ---
+    def get_snapshot(self):
+        """Latest snapshot (None until the first successful fetch)."""
+        self.start()
+        if self.snapshot is None:
+            if self._may_wait():
+                self._first.wait(FIRST_FETCH_WAIT)
+                self._waited = True
+        elif time.time() - self.snapshot["fetched_at"] > self.interval:
+            self._wake.set()  # Revalidate in the background; serve stale now
+        return self.snapshot
+
+    def _may_wait(self):
+        # Only a cold start waits, and only once per process: during an outage or
+        # an open circuit callers fall back to OFFLINE_READINGS straight away
+        return (not self._waited and self.breaker.state != "OPEN"
+                and threading.current_thread() is not self._thread)
+
+    def get_status(self):
+        snap = self.snapshot
+        return dict(
+            self.stats,
+            circuit=self.breaker.state,
+            snapshot_age_s=round(time.time() - snap["fetched_at"], 1) if snap else None,
+        )
+
+
 class IoTManager:
     # Guwahati Coordinates (Center of Ops)
     LAT = 26.14
     LNG = 91.73
-    
+
+    POLLER = IoTPoller(LAT, LNG)
+
     @staticmethod
     def get_live_readings():
         """
-        Fetches REAL weather data from OpenMeteo API.
+        Serves REAL weather data (OpenMeteo) from the shared poller snapshot.
         If Simulation is ACTIVE, it overrides with 'Disaster Data'.
         """
         # 1. CHECK FOR SIMULATION OVERRIDE (The "Drill" Logic)
@@ -23,30 +202,50 @@ class IoTManager:
                 {"id": "S-03", "type": "SOIL_MOISTURE", "value": 98, "unit": "%"}
             ]
 
-        # 2. FETCH REAL DATA (The "Live" Logic)
-        try:
-            url = f"https://api.open-meteo.com/v1/forecast?latitude={IoTManager.LAT}&longitude={IoTManager.LNG}&current=rain,wind_speed_10m"
-            response = requests.get(url, timeout=2)
-            data = response.json()
-            
-            real_rain = data.get("current", {}).get("rain", 0.0)
-            real_wind = data.get("current", {}).get("wind_speed_10m", 5.0)
-            
-            return [
-                {"id": "S-01", "type": "RAIN_GAUGE", "value": real_rain, "unit": "mm"},
-                {"id": "S-02", "type": "RIVER_LEVEL", "value": 45, "unit": "cm"}, # Nominal
-                {"id": "S-03", "type": "WIND_SENSOR", "value": real_wind, "unit": "km/h"}
-            ]
-        except Exception as e:
-            print(f" [IoT] Sensor Error: {e}")
-            return [{"id": "S-ERR", "type": "STATUS", "value": "OFFLINE", "unit": ""}]
+        # 2. SERVE THE LIVE SNAPSHOT (The "Live" Logic, refreshed in the background)
+        snapshot = IoTManager.POLLER.get_snapshot()
+        if snapshot is None:
+            return list(OFFLINE_READINGS)
+        return [dict(reading) for reading in snapshot["readings"]]
 
     @staticmethod
     def check_critical_breach(readings):
         """Returns True if any sensor exceeds safety thresholds."""
         for sensor in readings:
-            if sensor["type"] == "RAIN_GAUGE" and float(sensor["value"]) > 80:
+            if sensor["type"] == "RAIN_GAUGE" and float(sensor["value"]) > RAIN_CRITICAL_MM:
                 return "FLOOD_RISK"
-            if sensor["type"] == "RIVER_LEVEL" and float(sensor["value"]) > 150:
+            if sensor["type"] == "RIVER_LEVEL" and float(sensor["value"]) > RIVER_CRITICAL_CM:
                 return "EMBANKMENT_BREACH"
         return None
+
+    @staticmethod
+    def assess(readings):
+        """
+        Dashboard summary of one reading set: risk_index (0-100, share of the
+        nearest breach threshold), threat_level and the breach, if any.
+        """
+        values = {}
+        for sensor in readings:
+            try:
+                values[sensor["type"]] = float(sensor["value"])
+            except (TypeError, ValueError):
+                pass  # e.g. the OFFLINE status reading
+        if not values:
+            return {"risk_index": None, "threat_level": "UNKNOWN", "breach": None}
+
+        breach = IoTManager.check_critical_breach(readings)
+        shares = [
+            values.get("RAIN_GAUGE", 0.0) / RAIN_CRITICAL_MM,
+            values.get("RIVER_LEVEL", 0.0) / RIVER_CRITICAL_CM,
+            0.6 * values.get("SOIL_MOISTURE", 0.0) / MOISTURE_SATURATED,  # Wet soil alone never breaches
+        ]
+        risk_index = int(round(min(max(shares), 1.0) * 100))
+        if breach or risk_index >= 85:
+            threat_level = "CRITICAL"
+        elif risk_index >= 60:
+            threat_level = "HIGH"
+        elif risk_index >= 30:
+            threat_level = "MODERATE"
+        else:
+            threat_level = "LOW"
+        return {"risk_index": risk_index, "threat_level": threat_level, "breach": breach}
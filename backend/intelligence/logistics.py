@@ -1,66 +1,222 @@
-import time
+import itertools
 import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from intelligence.analytics import AnalyticsEngine
+
+TICK_HZ = float(os.getenv("LOGISTICS_TICK_HZ", "5"))          # Fixed engine tick rate
+HISTORY_SIZE = int(os.getenv("LOGISTICS_HISTORY", "10000"))   # Arrived missions kept for status reads
+SPAWN_OFFSET_DEG = 0.02    # Units spawn ~2-3 km from the caller
+UNIT_SPEED_DPS = 0.00015   # Degrees per second (~60 km/h drone ambulance)
+ARRIVE_DEG = 0.0005        # ~50 m: close enough to count as arrived
+INITIAL_CAPACITY = 1024
+
+
+class MissionEngine:
+    """
+    All active missions live in NumPy arrays (one slot per mission). A
+    background thread ticks at a fixed rate and moves every unit towards its
+    caller by speed x elapsed wall time in one vectorized step, so positions
+    don't depend on how often anyone polls. With no active missions the
+    thread parks until the next dispatch. Arrived missions are retired into
+    a bounded history of compact tuples and their slots are reused. Status
+    reads are a dict lookup plus a few array reads.
+    """
+
+    def __init__(self, tick_hz=TICK_HZ, history=HISTORY_SIZE, capacity=INITIAL_CAPACITY):
+        self.tick_interval = 1.0 / tick_hz
+        self.history_size = history
+
+        self._alloc(capacity)
+        self._slots = {}               # mission_id -> slot
+        self._slot_ids = {}            # slot -> mission_id
+        self._free = list(range(capacity - 1, -1, -1))
+        self.history = OrderedDict()   # mission_id -> (unit_id, start_time, arrived_at, dest_lat, dest_lng)
+        self._ids = itertools.count(1)
+        self._last_tick = time.time()
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()   # Set by dispatch() to unpark the tick thread
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.stats = {"ticks": 0, "dispatched": 0, "arrived": 0, "overruns": 0,
+                      "last_tick_ms": None, "max_tick_ms": 0.0}
+
+    def _alloc(self, capacity):
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2))        # Unit lat, lng
+        self.target = np.zeros((capacity, 2))     # Caller lat, lng
+        self.speed = np.zeros(capacity)           # Degrees per second
+        self.start_time = np.zeros(capacity)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.unit_ids = [None] * capacity
+
+    def _grow(self):
+        old = self.capacity
+        arrays = (self.pos, self.target, self.speed, self.start_time, self.active, self.unit_ids)
+        self._alloc(old * 2)
+        self.pos[:old], self.target[:old], self.speed[:old] = arrays[0], arrays[1], arrays[2]
+        self.start_time[:old], self.active[:old] = arrays[3], arrays[4]
+        self.unit_ids[:old] = arrays[5]
+        self._free.extend(range(self.capacity - 1, old - 1, -1))
+
+    # --- LIFECYCLE ---
+    def start(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._stop.clear()
+                    self._last_tick = time.time()
+                    self._thread = threading.Thread(target=self._run, name="mission-engine", daemon=True)
+                    self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(2)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            if not self._slots:
+                self._wakeup.wait()  # Parked: nothing to move
+                continue
+            started = time.time()
+            self.tick(started)
+            elapsed = time.time() - started
+            if elapsed > self.tick_interval:
+                self.stats["overruns"] += 1
+            self._stop.wait(max(0.0, self.tick_interval - elapsed))
+
+    # --- WRITE PATH ---
+    def dispatch(self, unit_lat, unit_lng, target_lat, target_lng, unit_id="UNIT-ALPHA", speed=UNIT_SPEED_DPS):
+        now = time.time()
+        mission_id = f"MSN-{int(now)}-{next(self._ids)}"
+        with self._lock:
+            if not self._slots:
+                self._last_tick = now  # Engine was idle: don't credit the idle time to this unit
+            if not self._free:
+                self._grow()
+            slot = self._free.pop()
+            self.pos[slot] = (unit_lat, unit_lng)
+            self.target[slot] = (target_lat, target_lng)
+            self.speed[slot] = speed
+            self.start_time[slot] = now
+            self.active[slot] = True
+            self.unit_ids[slot] = unit_id
+            self._slots[mission_id] = slot
+            self._slot_ids[slot] = mission_id
+            self.stats["dispatched"] += 1
+        self.start()
+        self._wakeup.set()
+        return mission_id
+
+    def tick(self, now=None):
+        """Advances every active unit by the wall time since the last tick; returns arrivals."""
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        with self._lock:
+            dt = max(0.0, now - self._last_tick)
+            self._last_tick = now
+            idx = np.flatnonzero(self.active)
+            arrived_ids = []
+            if len(idx):
+                delta = self.target[idx] - self.pos[idx]
+                distance = np.hypot(delta[:, 0], delta[:, 1])
+                step = self.speed[idx] * dt
+                arrived = distance <= np.maximum(step, ARRIVE_DEG)
+                moving = ~arrived
+                self.pos[idx[moving]] += delta[moving] * (step[moving] / distance[moving])[:, None]
+
+                done = idx[arrived]
+                if len(done):
+                    self.pos[done] = self.target[done]
+                    self.active[done] = False
+                    for slot in done.tolist():
+                        mission_id = self._slot_ids.pop(slot)
+                        del self._slots[mission_id]
+                        self.history[mission_id] = (self.unit_ids[slot], float(self.start_time[slot]), now,
+                                                    float(self.target[slot, 0]), float(self.target[slot, 1]))
+                        self.unit_ids[slot] = None
+                        self._free.append(slot)
+                        arrived_ids.append(mission_id)
+                    while len(self.history) > self.history_size:
+                        self.history.popitem(last=False)
+                    self.stats["arrived"] += len(done)
+            self.stats["ticks"] += 1
+            tick_ms = (time.perf_counter() - started) * 1000
+            self.stats["last_tick_ms"] = round(tick_ms, 3)
+            self.stats["max_tick_ms"] = round(max(self.stats["max_tick_ms"], tick_ms), 3)
+        if arrived_ids:
+            AnalyticsEngine.update_field_units(online_delta=-len(arrived_ids))  # One hook call per tick
+        return arrived_ids
+
+    # --- READ PATH ---
+    def status(self, mission_id):
+        with self._lock:
+            slot = self._slots.get(mission_id)
+            if slot is not None:
+                lat, lng = self.pos[slot]
+                target_lat, target_lng = self.target[slot]
+                speed = float(self.speed[slot])
+                distance = math.hypot(target_lat - lat, target_lng - lng)
+                return {
+                    "mission_id": mission_id,
+                    "status": "DISPATCHED",
+                    "start_time": float(self.start_time[slot]),
+                    "user_loc": (float(target_lat), float(target_lng)),
+                    "unit": {"id": self.unit_ids[slot], "type": "DRONE_AMBULANCE",
+                             "lat": float(lat), "lng": float(lng), "speed": speed},
+                    "eta_minutes": math.ceil(distance / speed / 60) if speed > 0 else None,
+                }
+            record = self.history.get(mission_id)
+        if record is None:
+            return None
+        unit_id, start_time, arrived_at, target_lat, target_lng = record
+        return {
+            "mission_id": mission_id,
+            "status": "ARRIVED",
+            "start_time": start_time,
+            "arrived_at": arrived_at,
+            "user_loc": (target_lat, target_lng),
+            "unit": {"id": unit_id, "type": "DRONE_AMBULANCE", "lat": target_lat, "lng": target_lng, "speed": 0.0},
+            "eta_minutes": 0,
+        }
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, active=len(self._slots), capacity=self.capacity,
+                        history=len(self.history), tick_hz=round(1.0 / self.tick_interval, 2),
+                        running=self._thread is not None)
+
 
 class LogisticsManager:
-    # Simulating a database of active missions
-    active_missions = {}
+    ENGINE = MissionEngine()
 
     @staticmethod
     def request_dispatch(user_lat, user_lng):
-        mission_id = f"MSN-{int(time.time())}"
-        
         # 1. Spawn Unit slightly away from user (approx 2-3km)
-        # 0.02 deg ~ 2.2km
-        start_lat = user_lat + 0.02
-        start_lng = user_lng + 0.02
-
-        mission = {
-            "mission_id": mission_id,
-            "status": "DISPATCHED",
-            "start_time": time.time(),
-            "user_loc": (user_lat, user_lng),
-            "unit": {
-                "id": "UNIT-ALPHA",
-                "type": "DRONE_AMBULANCE",
-                "lat": start_lat,
-                "lng": start_lng,
-                "speed": 0.0005 # Lat/Lng movement per tick
-            }
-        }
-        
-        LogisticsManager.active_missions[mission_id] = mission
-        return mission
+        mission_id = LogisticsManager.ENGINE.dispatch(
+            user_lat + SPAWN_OFFSET_DEG, user_lng + SPAWN_OFFSET_DEG, user_lat, user_lng
+        )
+        AnalyticsEngine.record_dispatch()
+        AnalyticsEngine.update_field_units(online_delta=1)
+        return LogisticsManager.ENGINE.status(mission_id)
 
     @staticmethod
     def get_mission_status(mission_id):
-        mission = LogisticsManager.active_missions.get(mission_id)
-        if not mission:
-            return None
+        # 2. Position comes from the engine's last tick (no movement on read)
+        return LogisticsManager.ENGINE.status(mission_id)
 
-        # 2. CALCULATE MOVEMENT (Linear Interpolation)
-        # Move unit closer to user
-        unit_lat, unit_lng = mission['unit']['lat'], mission['unit']['lng']
-        target_lat, target_lng = mission['user_loc']
-
-        # Vector towards target
-        d_lat = target_lat - unit_lat
-        d_lng = target_lng - unit_lng
-        distance = math.sqrt(d_lat**2 + d_lng**2)
-
-        # Stop if close enough
-        if distance < 0.0005:
-            mission['status'] = "ARRIVED"
-            mission['eta_minutes'] = 0
-        else:
-            # Move by speed factor
-            speed = mission['unit']['speed']
-            move_lat = (d_lat / distance) * speed
-            move_lng = (d_lng / distance) * speed
-            
-            mission['unit']['lat'] += move_lat
-            mission['unit']['lng'] += move_lng
-            
-            # Estimate ETA (Simple distance / speed)
-            mission['eta_minutes'] = int(distance * 100) # Rough scaler
-
-        return mission
+    @staticmethod
+    def get_metrics():
+        return LogisticsManager.ENGINE.metrics()
@@ -0,0 +1,237 @@
+"""
+Offline region packs for field devices (/offline-pack).
+
+A pack is one binary bundle: a small JSON header followed by raw
+little-endian sections (road network, segment risk, resource locations,
+offline voice phrases). Its version is the SHA-256 of those bytes, so equal
+content always has the same version. Packs travel xz-compressed; coordinates
+are fixed-point and delta-encoded so they compress well over 2G links.
+
+A client that already holds an older version can ask for a delta instead:
+unchanged sections are skipped, same-size sections (e.g. the risk table)
+are sent XORed against the old bytes (mostly zeros, so they compress to
+almost nothing), and only the rest is sent in full. Packs are rebuilt only
+when the fingerprint of their inputs changes.
+"""
+import hashlib
+import json
+import lzma
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from intelligence.languages import LanguageConfig
+from intelligence.resources import ResourceSentinel
+
+PACK_MAGIC = b"DRPK"
+DELTA_MAGIC = b"DRPD"
+FORMAT_VERSION = 1
+REGIONS = ("NE-Alpha",)       # Region ids served (the NE road-network coverage)
+COORD_SCALE = 1e5             # Fixed-point degrees: ~1 m
+PACK_HISTORY = 8              # Old versions kept per region for deltas
+XZ_PRESET = 6
+
+
+def _section(name, array, encoding="raw"):
+    array = np.ascontiguousarray(array)
+    return name, array.dtype.newbyteorder("<").str, list(array.shape), encoding, array.astype(array.dtype.newbyteorder("<")).tobytes()
+
+
+def _json_section(name, value):
+    return name, "json", [], "utf-8", json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def encode_pack(region_id, sections):
+    """sections: [(name, dtype, shape, encoding, bytes)] -> (raw pack bytes, header)."""
+    header = {"format_version": FORMAT_VERSION, "region_id": region_id, "sections": []}
+    offset = 0
+    for name, dtype, shape, encoding, blob in sections:
+        header["sections"].append({"name": name, "dtype": dtype, "shape": shape, "encoding": encoding,
+                                   "offset": offset, "nbytes": len(blob), "sha256": hashlib.sha256(blob).hexdigest()})
+        offset += len(blob)
+    head = json.dumps(header, sort_keys=True, separators=(",", ":")).encode()
+    raw = PACK_MAGIC + struct.pack("<I", len(head)) + head + b"".join(blob for *_, blob in sections)
+    return raw, header
+
+
+def decode_header(raw, magic=PACK_MAGIC):
+    if raw[:4] != magic:
+        raise ValueError("not a Drishti pack")
+    (length,) = struct.unpack_from("<I", raw, 4)
+    return json.loads(raw[8:8 + length]), 8 + length
+
+
+def _section_bytes(raw, header, body_start):
+    return {s["name"]: raw[body_start + s["offset"]:body_start + s["offset"] + s["nbytes"]] for s in header["sections"]}
+
+
+def encode_delta(base_raw, target_raw, base_version, target_version):
+    """Section-level binary delta from base to target (xz-compressed)."""
+    base_header, base_start = decode_header(base_raw)
+    target_header, target_start = decode_header(target_raw)
+    old = _section_bytes(base_raw, base_header, base_start)
+    new = _section_bytes(target_raw, target_header, target_start)
+
+    ops, blobs, offset = [], [], 0
+    for name, blob in new.items():
+        previous = old.get(name)
+        if previous == blob:
+            ops.append({"name": name, "op": "keep"})
+            continue
+        if previous is not None and len(previous) == len(blob):
+            payload = (np.frombuffer(blob, np.uint8) ^ np.frombuffer(previous, np.uint8)).tobytes()
+            op = "xor"
+        else:
+            payload, op = blob, "replace"
+        ops.append({"name": name, "op": op, "offset": offset, "nbytes": len(payload)})
+        blobs.append(payload)
+        offset += len(payload)
+
+    head = json.dumps({"base": base_version, "target": target_version, "ops": ops, "target_header": target_header},
+                      sort_keys=True, separators=(",", ":")).encode()
+    return lzma.compress(DELTA_MAGIC + struct.pack("<I", len(head)) + head + b"".join(blobs), preset=XZ_PRESET)
+
+
+def apply_delta(base_raw, delta):
+    """Client-side reconstruction (reference implementation): returns the target pack bytes."""
+    delta = lzma.decompress(delta)
+    info, body_start = decode_header(delta, DELTA_MAGIC)
+    base_header, base_start = decode_header(base_raw)
+    old = _section_bytes(base_raw, base_header, base_start)
+
+    sections = []
+    for op in info["ops"]:
+        if op["op"] == "keep":
+            blob = old[op["name"]]
+        else:
+            payload = delta[body_start + op["offset"]:body_start + op["offset"] + op["nbytes"]]
+            blob = payload if op["op"] == "replace" else (
+                np.frombuffer(payload, np.uint8) ^ np.frombuffer(old[op["name"]], np.uint8)).tobytes()
+        sections.append(blob)
+    head = json.dumps(info["target_header"], sort_keys=True, separators=(",", ":")).encode()
+    raw = PACK_MAGIC + struct.pack("<I", len(head)) + head + b"".join(sections)
+    if hashlib.sha256(raw).hexdigest()[:len(info["target"])] != info["target"]:
+        raise ValueError("delta produced a pack with the wrong checksum")
+    return raw
+
+
+class OfflinePackBuilder:
+    """Builds, versions and caches packs per region; deltas are computed on demand and cached."""
+
+    def __init__(self, history=PACK_HISTORY):
+        self.history = history
+        self._packs = {}               # region -> OrderedDict(version -> {"raw", "body", ...}), oldest first
+        self._current = {}             # region -> (fingerprint, version)
+        self._deltas = OrderedDict()   # (base, target) -> compressed delta
+        self._road_sections = None     # Static per process: the road graph never changes under us
+        self._lock = threading.Lock()
+        self.stats = {"builds": 0, "reuses": 0, "deltas_built": 0, "last_build_ms": None}
+
+    # --- INPUTS ---
+    def _road_network(self, graph):
+        if self._road_sections is None:
+            coords = np.round(graph.poly_coords * COORD_SCALE).astype(np.int32)
+            coords[1:] -= coords[:-1].copy()  # Delta-encoded: neighbouring vertices are metres apart
+            nodes = np.round(np.column_stack([graph.node_lat, graph.node_lng]) * COORD_SCALE).astype(np.int32)
+            self._road_sections = [
+                _section("road.nodes", nodes, "fixed1e5"),
+                _section("road.indptr", graph.indptr.astype(np.int32)),
+                _section("road.edge_target", graph.edge_target.astype(np.int32)),
+                _section("road.edge_segment", graph.edge_segment.astype(np.int32)),
+                _section("road.edge_reversed", graph.edge_reversed.astype(np.uint8)),
+                _section("road.seg_length", graph.seg_length.astype(np.float32)),
+                _section("road.seg_slope", graph.seg_slope.astype(np.float16)),
+                _section("road.seg_highway", graph.seg_highway.astype(np.int8)),
+                _section("road.poly_offsets", graph.poly_offsets.astype(np.int32)),
+                _section("road.poly_coords", coords, "fixed1e5+delta"),
+            ]
+        return self._road_sections
+
+    def _inputs(self):
+        """Current input sections (cheap: the road network is cached, the rest is small)."""
+        from ai_engine.road_graph import get_road_graph
+
+        graph = get_road_graph()
+        sections = []
+        if graph is not None:
+            sections += self._road_network(graph)
+            # Routing risk (terrain + live ST-GNN when it feeds routing), 1/255 steps
+            sections.append(_section("risk.segment", np.round(np.clip(graph.seg_risk, 0, 1) * 255).astype(np.uint8), "u8/255"))
+        resources = [{k: r.get(k) for k in ("id", "type", "lat", "lng", "qty", "verified")}
+                     for r in ResourceSentinel.get_all()]
+        sections.append(_json_section("resources", resources))
+        sections.append(_json_section("phrases", LanguageConfig.OFFLINE_RESPONSES))
+        return sections
+
+    @staticmethod
+    def _fingerprint(sections):
+        digest = hashlib.sha256()
+        for name, _, _, _, blob in sections:
+            digest.update(name.encode())
+            digest.update(hashlib.sha256(blob).digest() if len(blob) > 65536 else blob)
+        return digest.hexdigest()
+
+    # --- BUILD ---
+    def get_pack(self, region_id):
+        """Current pack for the region: {"version", "body" (xz), "size", "built_at", "header"}."""
+        if region_id not in REGIONS:
+            raise KeyError(region_id)
+        sections = self._inputs()
+        fingerprint = self._fingerprint(sections)
+        with self._lock:
+            current = self._current.get(region_id)
+            if current is not None and current[0] == fingerprint:
+                self.stats["reuses"] += 1
+                return self._packs[region_id][current[1]]
+
+            started = time.perf_counter()
+            raw, header = encode_pack(region_id, sections)
+            version = hashlib.sha256(raw).hexdigest()[:16]
+            packs = self._packs.setdefault(region_id, OrderedDict())
+            if version not in packs:
+                packs[version] = {
+                    "version": version, "raw": raw, "header": header, "size": len(raw),
+                    "body": lzma.compress(raw, preset=XZ_PRESET), "built_at": time.time(),
+                }
+                while len(packs) > self.history:
+                    packs.popitem(last=False)
+            packs.move_to_end(version)
+            self._current[region_id] = (fingerprint, version)
+            self.stats["builds"] += 1
+            self.stats["last_build_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            return packs[version]
+
+    def get_delta(self, region_id, base_version):
+        """(pack, delta bytes) against an older version, or (pack, None) if the base is unknown."""
+        pack = self.get_pack(region_id)
+        with self._lock:
+            base = self._packs[region_id].get(base_version)
+            if base is None or base_version == pack["version"]:
+                return pack, None
+            key = (base_version, pack["version"])
+            delta = self._deltas.get(key)
+            if delta is None:
+                delta = encode_delta(base["raw"], pack["raw"], base_version, pack["version"])
+                self._deltas[key] = delta
+                while len(self._deltas) > self.history * 2:
+                    self._deltas.popitem(last=False)
+                self.stats["deltas_built"] += 1
+            return pack, delta
+
+    def metrics(self):
+        with self._lock:
+            return dict(
+                self.stats,
+                regions={
+                    region: {"version": self._current[region][1], "versions_held": len(packs),
+                             "raw_bytes": packs[self._current[region][1]]["size"],
+                             "xz_bytes": len(packs[self._current[region][1]]["body"])}
+                    for region, packs in self._packs.items()
+                },
+            )
+
+
+OFFLINE_PACKS = OfflinePackBuilder()
@@ -1,16 +1,28 @@
-import joblib
 import os
 import numpy as np
 
 class RandomForestPredictor:
     def __init__(self):
         self.model_path = "intelligence/landslide_model.pkl"
+        self.packed_path = "intelligence/landslide_model.npz"  # python -m ai_engine.tree_ensemble export
         self.model = None
         self._load_model()
 
     def _load_model(self):
+        try:
+            from ai_engine.tree_ensemble import load_packed_model
+
+            # Packed NumPy trees: same predictions without importing sklearn
+            self.model = load_packed_model(self.packed_path, self.model_path)
+            if self.model is not None:
+                print(f"🌲 [AI] Random Forest Loaded (packed): {self.packed_path}")
+                return
+        except Exception as e:
+            print(f"⚠️ [AI] Packed Model Load Failed: {e}")
+
         if os.path.exists(self.model_path):
             try:
+                import joblib  # Deferred: only needed when a trained model is on disk
                 self.model = joblib.load(self.model_path)
                 print(f"🌲 [AI] Random Forest Loaded: {self.model_path}")
             except Exception as e:
@@ -47,4 +59,53 @@ class RandomForestPredictor:
         rain = features.get('rainfall', 0)
         if rain > 80: return 0.85
         if rain > 50: return 0.55
-        return 0.2
\ No newline at end of file
+        return 0.2
+
+class LandslidePredictor:
+    """
+    Shared predictor used by the core routing API.
+    Wraps the Random Forest (or its heuristic fallback) and adds the
+    telemetry/explanation fields the UI HUD expects.
+    """
+    _instance = None
+
+    def __init__(self):
+        self.model = RandomForestPredictor()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def predict(self, rain_intensity, lat, lng):
+        # Real road slope under the point when the road network covers it
+        slope_deg = 30.0
+        try:
+            from ai_engine.road_graph import MAX_SNAP_KM, get_road_graph
+
+            graph = get_road_graph()
+            road = graph.spatial.road_at(lat, lng, max_distance_m=MAX_SNAP_KM * 1000) if graph and graph.spatial else None
+            if road:
+                slope_deg = float(np.degrees(np.arctan(road["slope"])))
+        except Exception:
+            pass
+
+        features = {"rainfall": rain_intensity, "slope": slope_deg, "soil": 50}
+        risk_score = self.model.predict_risk(features)
+
+        if risk_score >= 0.8: risk_level = "CRITICAL"
+        elif risk_score >= 0.5: risk_level = "DANGEROUS"
+        elif risk_score >= 0.3: risk_level = "MODERATE"
+        else: risk_level = "SAFE"
+
+        return {
+            "risk_score": round(risk_score, 2),
+            "risk_level": risk_level,
+            "telemetry": {
+                "rainfall_mm": rain_intensity,
+                "slope_deg": round(slope_deg, 1),
+                "soil_moisture": features["soil"]
+            },
+            "explanation": f"{risk_level}: rain {rain_intensity}mm on {slope_deg:.0f}° slope"
+        }
@@ -1,6 +1,24 @@
 # backend/intelligence/vision.py
+import asyncio
+import os
+import queue
+import threading
 import time
 import random
+import uuid
+from collections import deque
+
+# --- CONFIG ---
+VISION_WORKERS = int(os.getenv("VISION_WORKERS", "2"))
+VISION_QUEUE_SIZE = int(os.getenv("VISION_QUEUE_SIZE", "200"))
+VISION_BATCH_SIZE = int(os.getenv("VISION_BATCH_SIZE", "8"))
+VISION_BATCH_WINDOW = float(os.getenv("VISION_BATCH_WINDOW_S", "0.05"))  # Wait this long to fill a batch
+MAX_FINISHED_JOBS = 1000  # Results kept for polling before the oldest are evicted
+
+# Simulated inference cost: fixed per batch (model call) + small per image
+BATCH_LATENCY_S = 2.4
+PER_IMAGE_LATENCY_S = 0.1
+
 
 class VisionEngine:
     """
@@ -8,16 +26,23 @@ class VisionEngine:
     (Simulated Deep Learning Inference for Hackathon Stability)
     """
 
+    @staticmethod
+    def analyze_batch(filenames):
+        # Simulate processing delay (GPU Inference time): one forward pass per batch
+        time.sleep(BATCH_LATENCY_S + PER_IMAGE_LATENCY_S * len(filenames))
+        return [VisionEngine._classify(filename) for filename in filenames]
+
     @staticmethod
     def analyze_damage(filename):
-        # Simulate processing delay (GPU Inference time)
-        time.sleep(2.5)
-        
+        return VisionEngine.analyze_batch([filename])[0]
+
+    @staticmethod
+    def _classify(filename):
         # Deterministic simulation based on filename/random
         # In a real app, this would use PyTorch/ResNet
         damage_score = random.randint(65, 95)
         detected_features = []
-        
+
         if damage_score > 85:
             verdict = "CATASTROPHIC_FAILURE"
             detected_features = ["Bridge Collapse", "Road Washout", "Deep Cracks"]
@@ -36,3 +61,142 @@ class VisionEngine:
             "features_detected": detected_features,
             "recommendation": "IMMEDIATE_CLOSURE" if damage_score > 75 else "CAUTION"
         }
+
+
+class VisionJobQueue:
+    """
+    Drone uploads become jobs: submit() returns a job ID at once, a bounded
+    pool of worker threads pulls queued images in batches and runs them
+    through VisionEngine.analyze_batch. Clients poll get() or await wait().
+    """
+
+    def __init__(self, workers=VISION_WORKERS, max_queue=VISION_QUEUE_SIZE,
+                 batch_size=VISION_BATCH_SIZE, batch_window=VISION_BATCH_WINDOW, infer=None):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.infer = infer or VisionEngine.analyze_batch
+        self.queue = queue.Queue(maxsize=max_queue)
+
+        self.jobs = {}             # job_id -> job dict
+        self._waiters = {}         # job_id -> [(loop, future)]
+        self._finished = deque()   # Finished job IDs, oldest first (for eviction)
+        self._lock = threading.Lock()
+        self._threads = []
+        self.stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "running": 0,
+                      "batches": 0, "wait_ms_total": 0.0, "run_ms_total": 0.0}
+
+    # --- LIFECYCLE ---
+    def start(self):
+        with self._lock:
+            if not self._threads:
+                for i in range(self.workers):
+                    t = threading.Thread(target=self._worker, name=f"vision-worker-{i}", daemon=True)
+                    t.start()
+                    self._threads.append(t)
+        return self
+
+    # --- CLIENT API ---
+    def submit(self, filename):
+        """Queues an image; raises queue.Full when the backlog is at capacity."""
+        self.start()
+        job = {"job_id": f"VIS-{uuid.uuid4().hex[:12].upper()}", "file": filename, "status": "QUEUED",
+               "submitted_at": time.time(), "started_at": None, "finished_at": None, "result": None}
+        with self._lock:
+            try:
+                self.queue.put_nowait(job)
+            except queue.Full:
+                self.stats["rejected"] += 1
+                raise
+            self.jobs[job["job_id"]] = job
+            self.stats["submitted"] += 1
+        return job["job_id"]
+
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def wait(self, job_id, timeout=30.0):
+        """Resolves when the job finishes (or timeout); returns the job or None if unknown."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] in ("DONE", "FAILED"):
+                return dict(job)
+            self._waiters.setdefault(job_id, []).append((loop, future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.get(job_id)
+
+    # --- WORKERS ---
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.time() + self.batch_window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            started = time.time()
+            with self._lock:
+                self.stats["running"] += len(batch)
+                for job in batch:
+                    job["status"] = "RUNNING"
+                    job["started_at"] = started
+            try:
+                results = self.infer([job["file"] for job in batch])
+                error = None
+            except Exception as e:
+                results, error = [None] * len(batch), str(e)
+            finished = time.time()
+            self._finish(batch, results, error, started, finished)
+
+    def _finish(self, batch, results, error, started, finished):
+        with self._lock:
+            self.stats["running"] -= len(batch)
+            self.stats["batches"] += 1
+            self.stats["run_ms_total"] += (finished - started) * 1000 * len(batch)
+            for job, result in zip(batch, results):
+                job["status"] = "FAILED" if error else "DONE"
+                job["result"] = result if not error else {"status": "error", "message": error}
+                job["finished_at"] = finished
+                self.stats["failed" if error else "completed"] += 1
+                self.stats["wait_ms_total"] += (started - job["submitted_at"]) * 1000
+                self._finished.append(job["job_id"])
+                for loop, future in self._waiters.pop(job["job_id"], []):
+                    loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(True))
+            while len(self._finished) > MAX_FINISHED_JOBS:
+                self.jobs.pop(self._finished.popleft(), None)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+        done = stats["completed"] + stats["failed"]
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue.qsize(),
+            "running": stats["running"],
+            "submitted": stats["submitted"],
+            "completed": stats["completed"],
+            "failed": stats["failed"],
+            "rejected": stats["rejected"],
+            "batches": stats["batches"],
+            "avg_batch_size": round(done / stats["batches"], 2) if stats["batches"] else 0.0,
+            "avg_wait_ms": round(stats["wait_ms_total"] / done, 1) if done else 0.0,
+            "avg_run_ms": round(stats["run_ms_total"] / done, 1) if done else 0.0,
+        }
+
+
+# Shared queue (workers start on first submit)
+VISION_JOBS = VisionJobQueue()
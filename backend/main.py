@@ -1,19 +1,31 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+import time
+PROCESS_STARTED = time.time()  # Before the heavy imports: readiness reports time-to-warm from here
+
+import asyncio
+from contextlib import asynccontextmanager
+import gzip
 import os
 import sys
+import queue
+import threading
 from datetime import datetime
 
+import numpy as np
+
+from fastapi import FastAPI, File, Request, UploadFile
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
 # --- 🔧 CRITICAL PATH FIX ---
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-app = Flask(__name__)
-CORS(app)
+from core.cache import PREDICTION_CACHE, ROUTE_CACHE, TILE_CACHE, quantize_coords, quantize_features
+from core.executor import CPU_POOL, ExecutorSaturated, busy_response
 
 # --- 🧠 IMPORT AI ENGINE ---
 import_error = None
 try:
-    from ai_engine.ne_predictor import predict_ne_risk, find_safest_route
+    from ai_engine.ne_predictor import predict_ne_risk, find_safest_route, warm_up, MODEL_STATUS
     print("✅ AI Engine Loaded Successfully")
 except Exception as e:
     import_error = str(e)
@@ -26,76 +38,309 @@ except Exception as e:
     def predict_ne_risk(data):
         return {"error": f"Server Import Failed: {import_error}"}
 
+    def warm_up():
+        return None
+
+    MODEL_STATUS = {"loaded": False, "model": None, "load_ms": None, "error": import_error}
+
+# --- 📊 LIVE STATS (streaming counters) ---
+from intelligence.analytics import AnalyticsEngine
+from intelligence.audit import AuditLogger
+from intelligence.iot_network import IoTManager
+from intelligence.iot_feed import IOT_FEED
+from intelligence.vision import VISION_JOBS
+from intelligence.risk_model import LandslidePredictor
+from ai_engine.segment_risk import SEGMENT_RISK_JOB
+from database import db as GEO_DB
+from ai_engine.zone_index import get_zone_index
+from intelligence.gis import MAX_ZOOM, RISK_TILES
+from intelligence.offline_pack import OFFLINE_PACKS
+from intelligence.logistics import LogisticsManager
+
+STGNN_ENABLED = os.getenv("STGNN_ENABLED", "1") == "1"
+
+# "background" (serve at once, warm in a thread), "blocking" (warm before serving) or "off" (load on first use)
+WARMUP_MODE = os.getenv("DRISHTI_WARMUP", "background")
+READINESS = {"warm": False, "warmup_ms": None, "ready_after_s": None, "error": None}
+
+
+def _warm_up():
+    # Models + road graph once per worker, not per request
+    started = time.time()
+    try:
+        warm_up()
+        get_zone_index()  # /api/alert targeting; warm_up() builds it too unless the AI engine failed to import
+        LandslidePredictor.get_instance()
+        RISK_TILES.get_layers()
+        if STGNN_ENABLED:
+            SEGMENT_RISK_JOB.start()  # Needs the road graph warm_up() just built
+    except Exception as e:
+        READINESS["error"] = str(e)
+        print(f"❌ Warm-up failed: {e}")
+    finished = time.time()
+    READINESS["warmup_ms"] = round((finished - started) * 1000, 1)
+    READINESS["ready_after_s"] = round(finished - PROCESS_STARTED, 3)
+    READINESS["warm"] = True
+
+
+# --- 🗺️ MAP TILES: only tiles under changed features are dropped (see RiskTileService) ---
+IoTManager.POLLER.subscribe(lambda snapshot: RISK_TILES.on_weather(IoTManager.get_live_readings()))
+SEGMENT_RISK_JOB.subscribe(lambda table: RISK_TILES.on_segment_risk(np.maximum(SEGMENT_RISK_JOB.static_risk, table.current)))
+
+# --- 🧠 ST-GNN SEGMENT RISK (one network-wide pass per weather tick) ---
+# Live readings rather than the raw snapshot, so a running drill reaches the model too
+IoTManager.POLLER.subscribe(lambda snapshot: SEGMENT_RISK_JOB.tick(IoTManager.get_live_readings()))
+
+# --- 📡 IOT PUSH FEED (one producer per refresh, fanned out to every SSE client) ---
+IoTManager.POLLER.subscribe(lambda snapshot: IOT_FEED.publish(IoTManager.get_live_readings()))
+
+# --- 🗃️ RESULT CACHE INVALIDATION (only inputs the cached computations read) ---
+# Routes read the static env raster and the road graph's segment risk; weather reaches
+# them only through the ST-GNN pass. Point predictions depend on their features alone.
+if SEGMENT_RISK_JOB.feed_routing:
+    SEGMENT_RISK_JOB.subscribe(lambda table: ROUTE_CACHE.invalidate("segment_risk"))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    IOT_FEED.attach(asyncio.get_running_loop())
+    if WARMUP_MODE == "blocking":
+        _warm_up()
+    elif WARMUP_MODE != "off":
+        threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    yield
+    IOT_FEED.close()
+    CPU_POOL.shutdown()
+    SEGMENT_RISK_JOB.stop()
+    LogisticsManager.ENGINE.stop()
+    IoTManager.POLLER.stop()
+    AuditLogger.shutdown()
+
+
+app = FastAPI(title="Drishti Backend", lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+
 # ==========================================
 # 🏠 ROUTE 1: HOME
 # ==========================================
-@app.route('/')
-def home():
-    return jsonify({
+@app.get('/')
+async def home():
+    return {
         "status": "Online",
         "system": "Drishti Backend (Life Saviour Mode)",
         "ai_engine_status": "✅ Active" if not import_error else f"❌ Inactive ({import_error})"
-    })
+    }
 
 # ==========================================
 # 🛡️ ROUTE 2: LIFE SAVIOUR ROUTING
 # ==========================================
-@app.route('/api/v1/core/analyze-route', methods=['POST'])
-def analyze_route_risk():
+@app.post('/api/v1/core/analyze-route')
+async def analyze_route_risk(request: Request):
     try:
-        data = request.json
+        data = await request.json()
         start_lat = data.get('start_lat')
         start_lng = data.get('start_lng')
         end_lat = data.get('end_lat')
         end_lng = data.get('end_lng')
 
         if not all([start_lat, start_lng, end_lat, end_lng]):
-            return jsonify({"error": "Coordinates missing"}), 400
+            return JSONResponse({"error": "Coordinates missing"}, status_code=400)
+
+        # 🔥 Call AI Brain (off the event loop); repeated / concurrent identical trips share one run
+        coords = quantize_coords(start_lat, start_lng, end_lat, end_lng)
+        result = await ROUTE_CACHE.run(coords, lambda: CPU_POOL.run(find_safest_route, *coords))
 
-        # 🔥 Call AI Brain
-        result = find_safest_route(start_lat, start_lng, end_lat, end_lng)
-        
         if "error" in result:
-            return jsonify(result), 500
+            return JSONResponse(result, status_code=500)
 
         # ✅ Extract Best Route & Risky Alternatives
         best_route = result.get('best_route', {})
         alternatives = result.get('alternatives', []) # Risky routes
-        
-        return jsonify({
+        AnalyticsEngine.record_route_analysis(best_route.get('risk_level'))
+
+        return {
             "status": "success",
             "route_analysis": best_route,   # GREEN ROUTE
             "risky_routes": alternatives,   # RED ROUTES (DANGER)
+            "road_context": result.get('road_context'),  # Slope/rain of the roads at origin & destination
             "timestamp": datetime.now().isoformat()
-        })
+        }
 
+    except ExecutorSaturated:
+        return busy_response()
     except Exception as e:
         print(f"❌ Routing API Error: {e}")
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=500)
 
 # ==========================================
 # 🚀 ROUTE 3: PREDICTION
 # ==========================================
-@app.route('/api/predict-ne', methods=['POST'])
-def predict_north_east():
+@app.post('/api/predict-ne')
+async def predict_north_east(request: Request):
     try:
-        data = request.json
-        result = predict_ne_risk(data)
-        return jsonify({"status": "success", "data": result})
+        data, key = quantize_features(await request.json())
+        result = await PREDICTION_CACHE.run(key, lambda: CPU_POOL.run(predict_ne_risk, data))
+        return {"status": "success", "data": result}
+    except ExecutorSaturated:
+        return busy_response()
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=500)
 
 # ==========================================
 # ⚠️ ROUTE 4: ALERTS
 # ==========================================
-@app.route('/api/alert', methods=['POST'])
-def send_alert():
+@app.post('/api/alert')
+async def send_alert(request: Request):
     try:
-        data = request.json
-        print(f"⚠️ ALERT: {data}")
-        return jsonify({"status": "sent", "message": "Alert Broadcasted"})
+        data = await request.json()
+        response = {"status": "sent", "message": "Alert Broadcasted"}
+        if "lat" in data and "lng" in data:
+            # Target by hazard zone (in-process R-tree, no DB round trip). In a thread: a cold worker
+            # builds the index on first use. Not CPU_POOL: a saturated pool must never shed SOS traffic.
+            response["zone"] = await asyncio.to_thread(GEO_DB.query_risk_zone, float(data["lat"]), float(data["lng"]))
+        print(f"⚠️ ALERT: {data} -> zone {response.get('zone', {}).get('zone_id')}")
+        return response
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+# ==========================================
+# 🛰️ ROUTE 5: DRONE DAMAGE ANALYSIS (async jobs)
+# ==========================================
+@app.post('/api/v1/vision/analyze', status_code=202)
+async def submit_damage_analysis(file: UploadFile = File(...)):
+    try:
+        job_id = VISION_JOBS.submit(file.filename)
+    except queue.Full:
+        return busy_response()
+    return {"status": "queued", "job_id": job_id, "poll_url": f"/api/v1/vision/jobs/{job_id}"}
+
+@app.get('/api/v1/vision/jobs/{job_id}')
+async def get_damage_analysis(job_id: str, wait: float = 0):
+    """Poll, or long-poll with ?wait=<seconds> (max 30) to be notified on completion."""
+    job = await VISION_JOBS.wait(job_id, min(wait, 30.0)) if wait > 0 else VISION_JOBS.get(job_id)
+    if job is None:
+        return JSONResponse({"status": "error", "message": "Unknown job"}, status_code=404)
+    return job
+
+# ==========================================
+# 📈 ROUTE 6: RUNTIME METRICS
+# ==========================================
+@app.get('/system/metrics')
+async def system_metrics():
+    return {
+        "cpu_pool": CPU_POOL.metrics(),
+        "audit": AuditLogger.get_stats(),
+        "vision": VISION_JOBS.metrics(),
+        "cache": {"routes": ROUTE_CACHE.metrics(), "predictions": PREDICTION_CACHE.metrics()},
+        "iot": IoTManager.POLLER.get_status(),
+        "segment_risk": SEGMENT_RISK_JOB.metrics(),
+        "tiles": RISK_TILES.metrics(),
+        "offline_packs": OFFLINE_PACKS.metrics(),
+        "iot_feed": IOT_FEED.metrics()
+    }
+
+@app.get('/system/readiness')
+async def system_readiness():
+    """200 once models and the road graph are warm (503 until then, or for good if warm-up failed) — for load balancer checks."""
+    warm = READINESS["warm"] or (WARMUP_MODE == "off" and MODEL_STATUS["loaded"])
+    ready = warm and not import_error and READINESS["error"] is None
+    body = {
+        "ready": ready,
+        "uptime_s": round(time.time() - PROCESS_STARTED, 1),
+        "warmup_mode": WARMUP_MODE,
+        "warmup": dict(READINESS),
+        "model": dict(MODEL_STATUS),
+        "ai_engine_error": import_error
+    }
+    return body if ready else JSONResponse(body, status_code=503)
+
+# ==========================================
+# 🗺️ ROUTE 7: RISK MAP TILES
+# ==========================================
+@app.get('/api/v1/gis/tiles/{z}/{x}/{y}')
+async def get_risk_tile(z: int, x: int, y: int, request: Request):
+    """Flood zones, landslide clusters and road-segment risk for one z/x/y tile (gzipped JSON)."""
+    if not (0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return JSONResponse({"status": "error", "message": "Tile out of range"}, status_code=400)
+    try:
+        tile = await TILE_CACHE.run((z, x, y), lambda: CPU_POOL.run(RISK_TILES.render_tile, z, x, y))
+    except ExecutorSaturated:
+        return busy_response()
+    headers = {"ETag": tile["etag"], "Cache-Control": "public, max-age=60", "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == tile["etag"]:
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(tile["body"], media_type="application/json", headers=dict(headers, **{"Content-Encoding": "gzip"}))
+    return Response(gzip.decompress(tile["body"]), media_type="application/json", headers=headers)
+
+# ==========================================
+# 📦 ROUTE 8: OFFLINE REGION PACK
+# ==========================================
+@app.get('/offline-pack')
+async def get_offline_pack(request: Request, region_id: str = "NE-Alpha", since: str = None):
+    """
+    xz-compressed, content-addressed region pack (see intelligence.offline_pack).
+    ?since=<version> returns a binary delta against a pack the client already holds.
+    """
+    try:
+        pack, delta = await CPU_POOL.run(OFFLINE_PACKS.get_delta, region_id, since)
+    except KeyError:
+        return JSONResponse({"status": "error", "message": f"Unknown region {region_id}"}, status_code=404)
+    except ExecutorSaturated:
+        return busy_response()
+    etag = f'"{pack["version"]}"'
+    headers = {"ETag": etag, "X-Pack-Version": pack["version"], "X-Pack-Size": str(pack["size"]),
+               "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag or since == pack["version"]:
+        return Response(status_code=304, headers=headers)
+    if delta is not None:
+        return Response(delta, media_type="application/vnd.drishti.pack-delta+xz",
+                        headers=dict(headers, **{"X-Pack-Base": since}))
+    return Response(pack["body"], media_type="application/x-xz", headers=headers)
+
+# ==========================================
+# 📡 ROUTE 9: IOT FEED (snapshot + push stream)
+# ==========================================
+@app.get('/api/v1/iot/feed')
+async def get_iot_feed():
+    """Latest readings with risk_index / threat_level — one shared assessment, not one per poll."""
+    state = IOT_FEED.latest
+    if state is None or time.time() - IOT_FEED.checked_at > IoTManager.POLLER.interval:
+        state = await asyncio.to_thread(IOT_FEED.current)
+    return state
+
+@app.get('/api/v1/iot/stream')
+async def stream_iot_feed(request: Request, since: int = None):
+    """
+    Server-Sent Events: "snapshot", then "readings" / "breach" as they happen.
+    Reconnects resume after Last-Event-ID (or ?since=<seq>).
+    """
+    IoTManager.POLLER.start()
+    last_id = request.headers.get("last-event-id")
+    last_seq = int(last_id) if last_id and last_id.isdigit() else since
+    if IOT_FEED.latest is None:
+        await asyncio.to_thread(IOT_FEED.current)
+    return StreamingResponse(
+        IOT_FEED.stream(last_seq),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ==========================================
+# 🧩 FASTAPI ROUTERS
+# ==========================================
+# core.routing's Random Forest variant lives under /api/v1/war-room so it
+# doesn't shadow (or hide behind) /api/v1/core/analyze-route above.
+from core.routing import router as routing_router
+from core.voice import router as voice_router
+from command.dashboard import router as command_router
+
+app.include_router(routing_router)
+app.include_router(voice_router)
+app.include_router(command_router)
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    import uvicorn
+
+    uvicorn.run(app, host='0.0.0.0', port=5000)
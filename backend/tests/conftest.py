@@ -0,0 +1,16 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Tests import the backend modules the way main.py does (backend/ on sys.path)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+@pytest.fixture
+def run_async():
+    """Runs a coroutine to completion on a fresh event loop; a hung test fails after `timeout` seconds."""
+    def run(coro, timeout=10):
+        return asyncio.run(asyncio.wait_for(coro, timeout))
+    return run
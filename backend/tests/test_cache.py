@@ -0,0 +1,132 @@
+"""ResultCache: LRU + TTL, request coalescing and invalidation."""
+import asyncio
+
+import pytest
+
+from core.cache import ResultCache, quantize_coords, quantize_features
+
+
+def _value(result):
+    async def compute():
+        return result
+    return compute
+
+
+def test_hit_after_miss(run_async):
+    cache = ResultCache("t")
+
+    async def scenario():
+        assert await cache.run("k", _value(1)) == 1
+        assert await cache.run("k", _value(2)) == 1
+
+    run_async(scenario())
+    assert cache.stats["misses"] == 1 and cache.stats["hits"] == 1
+
+
+def test_ttl_expiry(monkeypatch, run_async):
+    cache = ResultCache("t", ttl_s=10)
+    clock = [1000.0]
+    monkeypatch.setattr("core.cache.time.time", lambda: clock[0])
+
+    async def scenario():
+        await cache.run("k", _value(1))
+        clock[0] += 11
+        return await cache.run("k", _value(2))
+
+    assert run_async(scenario()) == 2
+    assert cache.stats["expirations"] == 1
+
+
+def test_lru_eviction(run_async):
+    cache = ResultCache("t", max_entries=2)
+
+    async def scenario():
+        await cache.run("a", _value(1))
+        await cache.run("b", _value(2))
+        await cache.run("a", _value(0))  # Touch a: b is now least recently used
+        await cache.run("c", _value(3))
+
+    run_async(scenario())
+    assert sorted(cache.keys()) == ["a", "c"]
+    assert cache.stats["evictions"] == 1
+
+
+def test_concurrent_identical_requests_compute_once(run_async):
+    cache = ResultCache("t")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "route"
+
+    async def scenario():
+        return await asyncio.gather(*(cache.run("k", compute) for _ in range(20)))
+
+    assert run_async(scenario()) == ["route"] * 20
+    assert len(calls) == 1
+    assert cache.stats["coalesced"] == 19
+    assert cache.metrics()["hit_rate"] == 0.95
+
+
+def test_failure_reaches_waiters_and_is_not_cached(run_async):
+    cache = ResultCache("t")
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("no route")
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.run("k", boom) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        return await cache.run("k", _value("ok"))
+
+    assert run_async(scenario()) == "ok"
+    assert cache.stats["errors"] == 1
+
+
+def test_uncacheable_results_are_returned_but_not_kept(run_async):
+    cache = ResultCache("t", cacheable=lambda result: "error" not in result)
+
+    async def scenario():
+        await cache.run("k", _value({"error": "outside coverage"}))
+        return await cache.run("k", _value({"ok": True}))
+
+    assert run_async(scenario()) == {"ok": True}
+
+
+@pytest.mark.parametrize("drop", ["invalidate", "discard"])
+def test_result_computed_across_invalidation_is_not_cached(drop, run_async):
+    cache = ResultCache("t")
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "old"
+
+    async def scenario():
+        leader = asyncio.create_task(cache.run("k", slow))
+        await asyncio.sleep(0.005)
+        cache.invalidate("weather") if drop == "invalidate" else cache.discard(["k"], "tile")
+        assert await leader == "old"
+        return await cache.run("k", _value("new"))
+
+    assert run_async(scenario()) == "new"
+
+
+def test_discard_only_drops_given_keys(run_async):
+    cache = ResultCache("t")
+
+    async def scenario():
+        for key in "abc":
+            await cache.run(key, _value(key))
+
+    run_async(scenario())
+    assert cache.discard(["a", "zz"], "tile") == 1
+    assert sorted(cache.keys()) == ["b", "c"]
+
+
+def test_quantization_shares_keys_for_nearby_requests():
+    assert quantize_coords(26.14021, 91.73012) == quantize_coords(26.14018, 91.73039)
+    data, key = quantize_features({"rainfall": "120.4", "soil_moisture": 40.2, "slope": 30.3, "other": 1})
+    assert data["rainfall"] == 120.0 and data["slope"] == 30.5 and data["other"] == 1
+    assert key == quantize_features({"rainfall": 119.6, "soil_moisture": 39.9, "slope": 30.4})[1]
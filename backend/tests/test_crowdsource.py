@@ -0,0 +1,92 @@
+"""The bucket index in CrowdManager must give the same verdicts as the original full scan."""
+import random
+
+import pytest
+
+from intelligence.crowdsource import CrowdManager
+
+
+def _baseline_verdict(reports, lat, lng):
+    # The pre-index evaluate_zone, verbatim: a scan over every report
+    nearby_reports = [r for r in reports if abs(r["lat"] - lat) < 0.01 and abs(r["lng"] - lng) < 0.01]
+    count = len(nearby_reports)
+    if count >= CrowdManager.THRESHOLD_CRITICAL:
+        return {"risk": "CRITICAL", "source": f"Confirmed by {count} Citizens"}
+    elif count >= CrowdManager.THRESHOLD_WARNING:
+        return {"risk": "HIGH", "source": f"Reported by {count} Citizens"}
+    elif count > 0:
+        return {"risk": "MODERATE", "source": "Unverified User Report"}
+    return None
+
+
+@pytest.fixture(autouse=True)
+def empty_index(monkeypatch):
+    monkeypatch.setattr(CrowdManager, "active_reports", [])
+    monkeypatch.setattr(CrowdManager, "_cell_counts", {})
+    monkeypatch.setattr(CrowdManager, "_cell_points", {})
+    monkeypatch.setattr(CrowdManager, "_listeners", [])
+
+
+def _assert_same(lat, lng):
+    assert CrowdManager.evaluate_zone(lat, lng) == _baseline_verdict(CrowdManager.active_reports, lat, lng), (lat, lng)
+
+
+def _edge_points(rng, count):
+    """Points on (or a hair off) cell edges and exactly one radius away from other points."""
+    size, r = CrowdManager.CELL_SIZE, CrowdManager.CLUSTER_RADIUS
+    points = []
+    for _ in range(count):
+        i, j = rng.randrange(10400, 10480), rng.randrange(36680, 36760)  # ~26 N, ~91.7 E
+        lat, lng = i * size, j * size
+        nudge = rng.choice([0.0, 1e-12, -1e-12, 1e-9, -1e-9])
+        points.append((lat + nudge, lng - nudge))
+        points.append((lat + r, lng))
+        points.append((lat, lng - r))
+    return points
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_reports_match_baseline(seed):
+    rng = random.Random(seed)
+    hotspots = [(rng.uniform(26.0, 26.2), rng.uniform(91.7, 91.9)) for _ in range(8)]
+    queries = []
+    for n in range(600):
+        if rng.random() < 0.7:
+            lat, lng = rng.choice(hotspots)
+            lat, lng = lat + rng.gauss(0, 0.006), lng + rng.gauss(0, 0.006)
+        else:
+            lat, lng = rng.choice(_edge_points(rng, 1))
+        verdict = CrowdManager.submit_report(lat, lng, "LANDSLIDE")
+        assert verdict == _baseline_verdict(CrowdManager.active_reports, lat, lng)
+        queries.append((lat, lng))
+        if n % 50 == 0:
+            CrowdManager.admin_override(lat + rng.choice([0.0, 0.01, -0.01]), lng, "CLOSED")
+
+    # Query the reports themselves, points exactly one radius away and fresh random spots
+    r = CrowdManager.CLUSTER_RADIUS
+    for lat, lng in queries[::3]:
+        for d_lat, d_lng in ((0, 0), (r, 0), (-r, 0), (0, r), (r, -r), (r / 2, r / 2)):
+            _assert_same(lat + d_lat, lng + d_lng)
+    for lat, lng in _edge_points(rng, 100):
+        _assert_same(lat, lng)
+    for _ in range(300):
+        _assert_same(rng.uniform(25.95, 26.25), rng.uniform(91.65, 91.95))
+
+
+def test_admin_override_forces_critical():
+    CrowdManager.submit_report(26.1, 91.7, "FLOOD")
+    assert CrowdManager.evaluate_zone(26.1, 91.7)["risk"] == "MODERATE"
+    CrowdManager.admin_override(26.105, 91.7, "CLOSED")
+    assert CrowdManager.evaluate_zone(26.1, 91.7) == {"risk": "CRITICAL", "source": "Confirmed by 11 Citizens"}
+    _assert_same(26.1, 91.7)
+    # Exactly one radius away is outside the (strict) box, as in the original scan
+    _assert_same(26.115, 91.7)
+    _assert_same(26.105, 91.71)
+
+
+def test_thresholds():
+    for n, risk in ((1, "MODERATE"), (2, "MODERATE"), (3, "HIGH"), (4, "HIGH"), (5, "CRITICAL")):
+        verdict = CrowdManager.submit_report(26.2, 91.8, "LANDSLIDE")
+        assert verdict["risk"] == risk
+        _assert_same(26.2, 91.8)
+    assert CrowdManager.evaluate_zone(27.0, 92.0) is None
@@ -0,0 +1,114 @@
+"""IngestionScheduler: concurrent polling, backoff, timeouts and backpressure."""
+import asyncio
+import time
+
+import pytest
+
+import data_pipeline
+from data_pipeline import DEFAULT_SCHEDULE, IngestionScheduler, Source, default_sources, run_pipeline_async
+
+
+def _records(raw):
+    return [{"kind": "weather", "data": raw}]
+
+
+def test_backoff_doubles_up_to_the_cap():
+    scheduler = IngestionScheduler(sources=[])
+    source = Source("S", lambda: {}, _records, interval_s=1.0, jitter_s=0.0, backoff_max_s=5.0)
+    assert [scheduler._delay(source, failures) for failures in range(5)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+def test_jitter_stays_within_bounds():
+    scheduler = IngestionScheduler(sources=[])
+    source = Source("S", lambda: {}, _records, interval_s=1.0, jitter_s=0.25)
+    assert all(0.75 <= scheduler._delay(source, 0) <= 1.25 for _ in range(200))
+
+
+def test_sources_are_polled_concurrently(run_async):
+    async def slow_fetch():
+        await asyncio.sleep(0.1)
+        return {"rain": 1}
+
+    async def scenario():
+        sources = [Source(f"S{i}", slow_fetch, _records, interval_s=10.0) for i in range(5)]
+        scheduler = IngestionScheduler(sources)
+        scheduler.start()
+        started = time.monotonic()
+        records = [await scheduler.queue.get() for _ in range(5)]
+        elapsed = time.monotonic() - started
+        await scheduler.stop()
+        return records, elapsed
+
+    records, elapsed = run_async(scenario())
+    assert elapsed < 0.3  # Five 100 ms fetches overlap
+    assert sorted(r["source"] for r in records) == ["S0", "S1", "S2", "S3", "S4"]
+    assert all("ingested_at" in r and r["provider"] == r["source"] for r in records)
+
+
+def test_failures_back_off_and_recover(run_async):
+    calls = []
+
+    def flaky():
+        calls.append(time.monotonic())
+        if len(calls) <= 2:
+            raise ConnectionError("upstream down")
+        return {"rain": 3}
+
+    async def scenario():
+        scheduler = IngestionScheduler([Source("S", flaky, _records, interval_s=0.02, backoff_max_s=1.0)])
+        scheduler.start()
+        record = await scheduler.queue.get()
+        await scheduler.stop()
+        return scheduler.metrics["S"], record
+
+    stats, record = run_async(scenario())
+    assert record["data"] == {"rain": 3}
+    assert stats["errors"] == 2 and stats["consecutive_failures"] == 0
+    assert stats["last_error"] == "upstream down"
+    # Second retry waited ~2x the first (0.04 s then 0.08 s)
+    assert calls[2] - calls[1] > calls[1] - calls[0]
+
+
+def test_timeouts_are_counted(run_async):
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def scenario():
+        scheduler = IngestionScheduler([Source("S", hang, _records, interval_s=0.01, timeout_s=0.02)])
+        scheduler.start()
+        await asyncio.sleep(0.15)
+        await scheduler.stop()
+        return scheduler.metrics["S"]
+
+    stats = run_async(scenario())
+    assert stats["timeouts"] >= 1 and stats["timeouts"] == stats["errors"]
+    assert stats["last_error"].startswith("timeout")
+
+
+def test_full_queue_blocks_producers(run_async):
+    async def scenario():
+        scheduler = IngestionScheduler([Source("S", lambda: {"rain": 1}, _records, interval_s=0.0)], queue_size=3)
+        scheduler.start()
+        await asyncio.sleep(0.1)
+        depth, records = scheduler.queue.qsize(), scheduler.metrics["S"]["records"]
+        await scheduler.stop()
+        return depth, records
+
+    depth, records = run_async(scenario())
+    assert depth == 3 and records == 3
+
+
+def test_source_without_schedule_row_uses_default(monkeypatch):
+    monkeypatch.delitem(data_pipeline.SOURCE_SCHEDULE, "DISASTER")
+    sources = {source.name: source for source in default_sources()}
+    assert set(sources) == set(data_pipeline.DATA_SOURCES)
+    assert sources["DISASTER"].interval_s == DEFAULT_SCHEDULE["interval_s"]
+
+
+@pytest.mark.parametrize("duration", [0.15, 0.3])
+def test_run_honours_duration(duration, run_async):
+    sources = [Source("S", lambda: {"rainfall_24h": 10, "source": "T"}, data_pipeline.normalize_weather, interval_s=0.05)]
+    started = time.monotonic()
+    metrics = run_async(run_pipeline_async(duration=duration, metrics_every=0.2, sources=sources))
+    assert duration <= time.monotonic() - started < duration + 0.1
+    assert metrics["sources"]["S"]["records"] >= 1
@@ -0,0 +1,150 @@
+"""IoT push feed: one producer, SSE fan-out, resume and slow-consumer handling."""
+import asyncio
+
+from intelligence.iot_feed import IoTFeed
+
+
+def _readings(rain, river=10):
+    return [
+        {"id": "S-01", "type": "RAIN_GAUGE", "value": rain, "unit": "mm"},
+        {"id": "S-02", "type": "RIVER_LEVEL", "value": river, "unit": "cm"},
+    ]
+
+
+def _event(chunk):
+    """(event name, id) of one SSE chunk; comments and retry lines come back as (None, None)."""
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n") if not line.startswith(":"))
+    return fields.get("event"), int(fields["id"]) if "id" in fields else None
+
+
+async def _attached(**kwargs):
+    feed = IoTFeed(**kwargs)
+    feed.attach(asyncio.get_running_loop())
+    return feed
+
+
+def test_unchanged_readings_are_not_republished():
+    feed = IoTFeed()
+    assert feed.publish(_readings(10)) is True
+    assert feed.publish(_readings(10)) is False
+    assert feed.seq == 1 and feed.stats["unchanged"] == 1
+    assert feed.latest["threat_level"] == "LOW"
+
+
+def test_breach_transition_adds_a_breach_event():
+    feed = IoTFeed()
+    feed.publish(_readings(10))
+    feed.publish(_readings(120))  # Over RAIN_CRITICAL_MM
+    assert feed.seq == 3  # readings, readings + breach
+    assert feed.latest["breach"] == "FLOOD_RISK" and feed.latest["threat_level"] == "CRITICAL"
+    feed.publish(_readings(130))  # Still breached: no new breach event
+    assert feed.seq == 4 and feed.stats["breach_events"] == 1
+
+
+def test_new_client_gets_snapshot_then_live_events(run_async):
+    async def scenario():
+        feed = await _attached()
+        feed.publish(_readings(10))
+        stream = feed.stream()
+        assert (await anext(stream)).startswith(b"retry:")
+        assert _event(await anext(stream)) == ("snapshot", 1)
+        asyncio.get_running_loop().call_later(0.01, feed.publish, _readings(20))
+        assert _event(await anext(stream)) == ("readings", 2)
+        await stream.aclose()
+        return feed
+
+    feed = run_async(scenario())
+    assert feed.subscribers == 0
+
+
+def test_every_subscriber_sees_the_same_sequence(run_async):
+    async def client(feed, count):
+        stream = feed.stream()
+        await anext(stream)  # retry
+        seen = [_event(await anext(stream))]
+        while len(seen) < count:
+            seen.append(_event(await anext(stream)))
+        await stream.aclose()
+        return seen
+
+    async def scenario():
+        feed = await _attached()
+        feed.publish(_readings(1))
+        clients = [asyncio.create_task(client(feed, 4)) for _ in range(50)]
+        await asyncio.sleep(0.01)
+        for rain in (2, 3, 4):
+            feed.publish(_readings(rain))
+            await asyncio.sleep(0)
+        return await asyncio.gather(*clients)
+
+    results = run_async(scenario())
+    assert all(seen == results[0] for seen in results)
+    assert [seq for _, seq in results[0]] == [1, 2, 3, 4]
+
+
+def test_resume_after_last_event_id(run_async):
+    async def scenario():
+        feed = await _attached()
+        for rain in (1, 2, 3, 4):
+            feed.publish(_readings(rain))
+        stream = feed.stream(last_seq=2)
+        await anext(stream)
+        events = [_event(await anext(stream)) for _ in range(2)]
+        await stream.aclose()
+        return feed, events
+
+    feed, events = run_async(scenario())
+    assert events == [("readings", 3), ("readings", 4)]
+    assert feed.stats["resumed"] == 1 and feed.stats["resets"] == 0
+
+
+def test_resume_from_expired_sequence_resets_with_snapshot(run_async):
+    async def scenario():
+        feed = await _attached(replay=3)
+        for rain in range(1, 7):
+            feed.publish(_readings(rain))
+        stream = feed.stream(last_seq=1)  # Long gone from a 3-event ring
+        await anext(stream)
+        event = _event(await anext(stream))
+        await stream.aclose()
+        return feed, event
+
+    feed, event = run_async(scenario())
+    assert event == ("snapshot", 6)
+    assert feed.stats["resets"] == 1
+
+
+def test_slow_consumer_is_dropped(run_async):
+    async def scenario():
+        feed = await _attached(client_buffer=2)
+        feed.publish(_readings(1))
+        stream = feed.stream()
+        await anext(stream)
+        assert _event(await anext(stream)) == ("snapshot", 1)
+        for rain in range(2, 7):  # Client reads nothing meanwhile
+            feed.publish(_readings(rain))
+        event = _event(await anext(stream))
+        remaining = [chunk async for chunk in stream]
+        return feed, event, remaining
+
+    feed, event, remaining = run_async(scenario())
+    assert event == ("dropped", 1)  # resume_from the last event it did get
+    assert remaining == []
+    assert feed.stats["dropped_slow"] == 1
+
+
+def test_idle_stream_sends_heartbeats_and_ends_on_close(run_async):
+    async def scenario():
+        feed = await _attached(heartbeat_s=0.02)
+        feed.publish(_readings(1))
+        stream = feed.stream()
+        await anext(stream)
+        await anext(stream)
+        ping = await anext(stream)
+        asyncio.get_running_loop().call_later(0.005, feed.close)
+        rest = [chunk async for chunk in stream]
+        return ping, rest
+
+    ping, rest = run_async(scenario())
+    assert ping == b": ping\n\n"
+    assert all(chunk == b": ping\n\n" for chunk in rest)
@@ -0,0 +1,123 @@
+"""IoT poller against a local upstream stub: first snapshot, stale-while-revalidate and the circuit breaker."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from intelligence.iot_network import CircuitBreaker, IoTPoller
+
+
+class _Upstream(BaseHTTPRequestHandler):
+    # Per-server knobs live on the server object (see the fixture)
+    def do_GET(self):
+        server = self.server
+        server.hits += 1
+        time.sleep(server.delay)
+        if server.status != 200:
+            self.send_response(server.status)
+            self.end_headers()
+            return
+        body = json.dumps({"current": {"rain": server.rain, "wind_speed_10m": 12.0}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Upstream)
+    server.hits, server.delay, server.status, server.rain = 0, 0.0, 200, 3.5
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/v1/forecast"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_first_snapshot_is_served(upstream):
+    poller = IoTPoller(26.14, 91.73, url=upstream.url, interval=30, timeout=1)
+    try:
+        snapshot = poller.get_snapshot()
+        assert snapshot is not None
+        rain = next(r for r in snapshot["readings"] if r["type"] == "RAIN_GAUGE")
+        assert rain["value"] == 3.5
+        assert upstream.hits == 1 and poller.stats["fetches"] == 1
+    finally:
+        poller.stop()
+
+
+def test_stale_snapshot_is_served_without_waiting_and_wakes_the_poller(upstream):
+    poller = IoTPoller(26.14, 91.73, url=upstream.url, interval=30, timeout=2)
+    try:
+        first = poller.get_snapshot()
+        assert first is not None
+        stale = dict(first, fetched_at=time.time() - 60)
+        poller.snapshot = stale
+        upstream.delay, upstream.rain = 0.5, 7.0
+
+        started = time.perf_counter()
+        assert poller.get_snapshot() is stale
+        assert time.perf_counter() - started < 0.2  # Did not wait on the slow upstream
+
+        # The poller would otherwise sleep for the full 30 s interval
+        assert _wait_for(lambda: poller.snapshot is not stale)
+        assert upstream.hits == 2
+        assert poller.snapshot["readings"][0]["value"] == 7.0
+    finally:
+        poller.stop()
+
+
+def test_breaker_opens_skips_upstream_and_recovers(upstream):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.3)
+    poller = IoTPoller(26.14, 91.73, url=upstream.url, interval=30, timeout=1, breaker=breaker)
+    upstream.status = 503
+    try:
+        for _ in range(3):
+            assert poller.refresh() is False
+        assert breaker.state == "OPEN" and upstream.hits == 3
+
+        # OPEN: no upstream traffic and no cold-start wait for callers
+        for _ in range(5):
+            assert poller.refresh() is False
+        assert upstream.hits == 3 and poller.stats["skipped_open_circuit"] == 5
+        assert poller._may_wait() is False
+
+        upstream.status = 200
+        time.sleep(0.35)
+        assert breaker.allow() is True and breaker.state == "HALF_OPEN"
+        assert poller.refresh() is True
+        assert breaker.state == "CLOSED" and breaker.failures == 0
+        assert upstream.hits == 4 and poller.snapshot is not None
+    finally:
+        poller.stop()
+
+
+def test_failed_half_open_trial_reopens(upstream):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    poller = IoTPoller(26.14, 91.73, url=upstream.url, interval=30, timeout=1, breaker=breaker)
+    upstream.status = 500
+    try:
+        poller.refresh()
+        assert breaker.state == "OPEN"
+        time.sleep(0.15)
+        assert poller.refresh() is False  # The HALF_OPEN trial goes out and fails
+        assert breaker.state == "OPEN" and upstream.hits == 2
+    finally:
+        poller.stop()
@@ -0,0 +1,128 @@
+"""Offline region packs: content addressing, deltas and their round trip."""
+import hashlib
+import lzma
+
+import numpy as np
+import pytest
+
+from intelligence.offline_pack import (
+    OfflinePackBuilder, _json_section, _section, apply_delta, decode_header, encode_delta, encode_pack,
+)
+
+
+def _sections(risk, resources=None, phrases=None):
+    rng = np.random.default_rng(0)
+    return [
+        _section("road.nodes", rng.integers(-1000, 1000, size=(500, 2), dtype=np.int32), "fixed1e5"),
+        _section("risk.segment", np.asarray(risk, dtype=np.uint8), "u8/255"),
+        _json_section("resources", resources if resources is not None else [{"id": "R-1", "qty": 5}]),
+        _json_section("phrases", phrases if phrases is not None else {"hi": "नमस्ते"}),
+    ]
+
+
+def _pack(sections):
+    raw, _ = encode_pack("NE-Alpha", sections)
+    return raw, hashlib.sha256(raw).hexdigest()[:16]
+
+
+def test_same_content_same_bytes():
+    risk = np.arange(300) % 256
+    assert encode_pack("NE-Alpha", _sections(risk))[0] == encode_pack("NE-Alpha", _sections(risk))[0]
+
+
+def test_header_describes_sections():
+    raw, header = encode_pack("NE-Alpha", _sections(np.zeros(300)))
+    decoded, body_start = decode_header(raw)
+    assert decoded == header
+    section = next(s for s in header["sections"] if s["name"] == "risk.segment")
+    blob = raw[body_start + section["offset"]:body_start + section["offset"] + section["nbytes"]]
+    assert hashlib.sha256(blob).hexdigest() == section["sha256"]
+    assert section["dtype"] == "|u1" and section["shape"] == [300]
+
+
+@pytest.mark.parametrize("change", ["risk", "resize", "resources", "none"])
+def test_delta_round_trip(change):
+    risk = np.zeros(300)
+    base_raw, base_version = _pack(_sections(risk))
+    if change == "risk":
+        risk = risk.copy()
+        risk[10:20] = 200  # Same size: sent XORed
+        target = _sections(risk)
+    elif change == "resize":
+        target = _sections(np.zeros(320))  # Different size: sent in full
+    elif change == "resources":
+        target = _sections(risk, resources=[{"id": "R-1", "qty": 4}, {"id": "R-2", "qty": 1}])
+    else:
+        target = _sections(risk)
+    target_raw, target_version = _pack(target)
+
+    delta = encode_delta(base_raw, target_raw, base_version, target_version)
+    assert apply_delta(base_raw, delta) == target_raw
+
+
+def test_small_change_gives_small_delta():
+    risk = np.random.default_rng(1).integers(0, 256, 50000)  # Incompressible on its own
+    base_raw, base_version = _pack(_sections(risk))
+    risk[:100] = 255
+    target_raw, target_version = _pack(_sections(risk))
+    delta = encode_delta(base_raw, target_raw, base_version, target_version)
+    assert len(delta) < len(lzma.compress(target_raw)) / 10
+
+
+def test_delta_against_wrong_base_is_rejected():
+    base_raw, base_version = _pack(_sections(np.zeros(300)))
+    target_raw, target_version = _pack(_sections(np.full(300, 9)))
+    other_raw, _ = _pack(_sections(np.full(300, 1)))
+    delta = encode_delta(base_raw, target_raw, base_version, target_version)
+    with pytest.raises(ValueError):
+        apply_delta(other_raw, delta)
+
+
+@pytest.fixture
+def builder(monkeypatch):
+    builder = OfflinePackBuilder(history=3)
+    state = {"risk": np.zeros(300)}
+    monkeypatch.setattr(builder, "_inputs", lambda: _sections(state["risk"]))
+    return builder, state
+
+
+def test_builder_reuses_unchanged_pack(builder):
+    builder, _ = builder
+    first = builder.get_pack("NE-Alpha")
+    assert builder.get_pack("NE-Alpha") is first
+    assert builder.stats["builds"] == 1 and builder.stats["reuses"] == 1
+    assert lzma.decompress(first["body"]) == first["raw"]
+    assert first["version"] == hashlib.sha256(first["raw"]).hexdigest()[:16]
+
+
+def test_builder_delta_from_older_version(builder):
+    builder, state = builder
+    old = builder.get_pack("NE-Alpha")
+    state["risk"] = np.full(300, 7)
+    pack, delta = builder.get_delta("NE-Alpha", old["version"])
+    assert pack["version"] != old["version"]
+    assert apply_delta(old["raw"], delta) == pack["raw"]
+    # Cached: asking again doesn't rebuild it
+    assert builder.get_delta("NE-Alpha", old["version"])[1] is delta
+    assert builder.stats["deltas_built"] == 1
+
+
+def test_builder_unknown_or_current_base_gets_full_pack(builder):
+    builder, state = builder
+    pack = builder.get_pack("NE-Alpha")
+    assert builder.get_delta("NE-Alpha", pack["version"]) == (pack, None)
+    assert builder.get_delta("NE-Alpha", "0" * 16) == (pack, None)
+
+
+def test_builder_forgets_versions_beyond_history(builder):
+    builder, state = builder
+    first = builder.get_pack("NE-Alpha")["version"]
+    for value in range(1, 4):
+        state["risk"] = np.full(300, value)
+        builder.get_pack("NE-Alpha")
+    assert builder.get_delta("NE-Alpha", first)[1] is None
+
+
+def test_unknown_region():
+    with pytest.raises(KeyError):
+        OfflinePackBuilder().get_pack("Atlantis")
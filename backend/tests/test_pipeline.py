@@ -0,0 +1,66 @@
+"""DataPipeline: batch and per-record output must stay byte-identical to the original per-record ETL."""
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.pipeline import DataPipeline
+
+EDGE_RAIN = [0, 19.9, 20, 20.5, 21, 49, 50, 50.5, 51, 120, -5]
+
+
+def _baseline(location, rain):
+    # The original DataPipeline.transform_data, kept verbatim as the reference
+    context_parts = [f"Situation report for sector near lat {location['lat']} lng {location['lng']}."]
+    if rain > 50:
+        context_parts.append("CRITICAL: Severe heavy rainfall and extreme flooding detected.")
+        context_parts.append("Roads are likely submerged.")
+    elif rain > 20:
+        context_parts.append("WARNING: Moderate rainfall observed.")
+        context_parts.append("Potential for slippery roads and minor logging.")
+    else:
+        context_parts.append("Weather conditions are normal.")
+        context_parts.append("No immediate environmental threats reported.")
+    return " ".join(context_parts)
+
+
+def _records(n, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        # Mix of float and int coordinates: the report keeps each one's str() form
+        location = {"lat": round(rng.uniform(22, 29), rng.randint(0, 6)), "lng": rng.choice([91, 92.5, rng.uniform(89, 97)])}
+        rain = EDGE_RAIN[i % len(EDGE_RAIN)] if i % 3 == 0 else rng.choice([rng.randint(0, 100), rng.uniform(0, 100)])
+        records.append((location, rain))
+    return records
+
+
+@pytest.mark.parametrize("rain", EDGE_RAIN)
+def test_per_record_api_matches_baseline_at_band_edges(rain):
+    pipeline = DataPipeline()
+    location = {"lat": 26.14, "lng": 91.73}
+    raw = pipeline.ingest_data(location, rain)
+    assert raw == {"location": location, "rain": rain, "timestamp": "Current"}
+    assert pipeline.load_payload(pipeline.transform_data(raw)) == _baseline(location, rain)
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 1024])
+def test_run_matches_baseline(batch_size):
+    records = _records(250)  # 7 does not divide 250: the last batch is short
+    pipeline = DataPipeline(batch_size=batch_size)
+    assert pipeline.run(records) == [_baseline(loc, rain) for loc, rain in records]
+
+    metrics = pipeline.metrics()
+    assert metrics["transform"]["items_in"] == metrics["load"]["items_out"] == 250
+    assert metrics["transform"]["batches"] == -(-250 // batch_size)
+
+
+def test_run_on_a_thread_pool_matches_baseline_in_order():
+    records = _records(1000, seed=1)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        out = DataPipeline(executor=pool, batch_size=64, max_in_flight=2).run(records)
+    assert out == [_baseline(loc, rain) for loc, rain in records]
+
+
+def test_empty_input():
+    assert DataPipeline().run([]) == []
@@ -0,0 +1,56 @@
+"""ALT landmark search must return the same costs as plain Dijkstra."""
+import random
+
+import numpy as np
+import pytest
+
+from ai_engine.road_graph import RISK_WEIGHT, build_road_graph
+from ai_engine.road_store import load_road_store
+from ai_engine.route_index import LandmarkIndex, select_landmarks
+
+
+@pytest.fixture(scope="module")
+def graph():
+    # A private instance: set_segment_risk() below must not touch the shared graph
+    graph = load_road_store() or build_road_graph()
+    graph.landmarks = LandmarkIndex(graph, select_landmarks(graph))
+    return graph
+
+
+def _pairs(graph, count, seed):
+    rng = random.Random(seed)
+    return [(rng.randrange(graph.num_nodes), rng.randrange(graph.num_nodes)) for _ in range(count)]
+
+
+def _assert_parity(graph, pairs, risk_weight):
+    weights = graph.edge_weights(risk_weight)
+    for source, target in pairs:
+        fast = graph.landmarks.query(source, target, risk_weight)
+        slow = graph.shortest_path(source, target, weights)
+        assert (fast is None) == (slow is None), (source, target)
+        if slow is None:
+            continue
+        edges, cost = fast
+        assert cost == pytest.approx(slow[1], rel=1e-9)
+        # The returned path really costs what it claims and connects the endpoints
+        assert float(weights[edges].sum()) == pytest.approx(cost, rel=1e-9)
+        if edges:
+            assert int(graph.edge_source[edges[0]]) == source
+            assert int(graph.edge_target[edges[-1]]) == target
+
+
+def test_alt_matches_dijkstra(graph):
+    _assert_parity(graph, _pairs(graph, 200, seed=42), RISK_WEIGHT)
+
+
+def test_alt_matches_dijkstra_for_other_risk_weight(graph):
+    _assert_parity(graph, _pairs(graph, 50, seed=1), 0.0)
+
+
+def test_alt_matches_dijkstra_after_risk_update(graph):
+    graph.set_segment_risk(np.random.default_rng(0).random(graph.num_segments))
+    _assert_parity(graph, _pairs(graph, 100, seed=7), RISK_WEIGHT)
+
+
+def test_same_node_is_an_empty_path(graph):
+    assert graph.landmarks.query(5, 5, RISK_WEIGHT) == ([], 0.0)
@@ -0,0 +1,89 @@
+"""Packed NumPy trees must score exactly like the models they were exported from."""
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+from ai_engine.tree_ensemble import check_matches, export_model, load_packed_model, load_tree_ensemble
+
+xgboost = pytest.importorskip("xgboost")
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.uniform([0, 0, 0, 0], [300, 100, 60, 1], size=(2000, 4)).astype(np.float32)
+    score = X[:, 0] / 300 * 0.5 + X[:, 2] / 60 * 0.3 + X[:, 1] / 100 * 0.2
+    y = np.select([score > 0.6, score > 0.3], [2, 1], 0)
+    return X, y
+
+
+def _holdout(data):
+    X, _ = data
+    rows = np.random.default_rng(1).uniform(-50, 350, size=(500, X.shape[1])).astype(np.float32)
+    return np.vstack([X[:500], rows])
+
+
+@pytest.mark.parametrize("estimator", [
+    RandomForestClassifier(n_estimators=30, max_depth=8, random_state=0),
+    ExtraTreesClassifier(n_estimators=30, min_samples_leaf=3, random_state=0),
+])
+def test_sklearn_forest_parity(data, estimator):
+    X, y = data
+    model = estimator.fit(X, y)
+    packed = export_model(model)
+    X_check = _holdout(data)
+    assert check_matches(model, packed, X_check) <= 1e-5
+    np.testing.assert_array_equal(packed.predict(X_check), model.predict(X_check))
+
+
+@pytest.mark.parametrize("params", [
+    {"objective": "binary:logistic"},
+    {"objective": "multi:softprob"},
+])
+def test_xgboost_classifier_parity(data, params):
+    X, y = data
+    if params["objective"].startswith("binary:"):
+        y = (y == 2).astype(int)
+    model = xgboost.XGBClassifier(n_estimators=40, max_depth=5, **params).fit(X, y)
+    packed = export_model(model)
+    X_check = _holdout(data)
+    assert check_matches(model, packed, X_check) <= 1e-5
+    np.testing.assert_array_equal(packed.predict(X_check), model.predict(X_check))
+
+
+def test_xgboost_missing_values_follow_default_direction(data):
+    X, y = data
+    X = X.copy()
+    X[::7, 1] = np.nan
+    model = xgboost.XGBClassifier(n_estimators=20, max_depth=4).fit(X, (y == 2).astype(int))
+    assert check_matches(model, export_model(model), X) <= 1e-5
+
+
+def test_xgboost_regressor_parity(data):
+    X, y = data
+    model = xgboost.XGBRegressor(n_estimators=40, max_depth=5).fit(X, y.astype(float))
+    packed = export_model(model)
+    X_check = _holdout(data)
+    np.testing.assert_allclose(packed.predict(X_check), model.predict(X_check), atol=1e-4)
+
+
+def test_save_load_round_trip(tmp_path, data):
+    X, y = data
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    packed = export_model(model)
+    packed.source_sha256 = "abc"
+    path = packed.save(str(tmp_path / "model.npz"))
+    loaded = load_tree_ensemble(path)
+    np.testing.assert_array_equal(loaded.predict_proba(X), packed.predict_proba(X))
+    np.testing.assert_array_equal(loaded.classes_, model.classes_)
+
+
+def test_stale_package_is_ignored(tmp_path, data):
+    X, y = data
+    packed = export_model(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y))
+    source = tmp_path / "model.pkl"
+    source.write_bytes(b"new pickle")
+    packed.source_sha256 = "0" * 64  # Exported from some other pickle
+    path = packed.save(str(tmp_path / "model.npz"))
+    assert load_packed_model(path, str(source)) is None
+    assert load_packed_model(path) is not None
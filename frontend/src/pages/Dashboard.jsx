@@ -33,6 +33,14 @@ const DashboardView = () => {
     };
     initNative();
     fetchRisk();
+
+    // Live push: the browser's EventSource resumes after Last-Event-ID on reconnect
+    if (typeof EventSource === "undefined") return;
+    const feed = new EventSource(`${API_BASE_URL}/api/v1/iot/stream`);
+    const onState = (e) => setStats(JSON.parse(e.data));
+    feed.addEventListener("snapshot", onState);
+    feed.addEventListener("readings", onState);
+    return () => feed.close();
   }, []);
 
   // --- 2. DATA FETCHING ---